@@ -0,0 +1 @@
+"""Бенчмарки и инструменты для локальных замеров."""
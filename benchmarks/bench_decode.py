@@ -0,0 +1,71 @@
+"""Замер декодирования ответов API на записанных ответах из fixtures.
+
+Сравнивает старый путь (r.text() + json.loads + полный debug лог) с декодированием
+из байтов доступными декодерами и извлечением только нужных полей в Film:
+
+    python -m benchmarks.bench_decode
+"""
+
+from __future__ import annotations
+
+import json
+import timeit
+import tracemalloc
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from film_bot.decoding import DECODERS
+from film_bot.models import Film
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+FIXTURES = Path(__file__).parent / "fixtures"
+NUMBER = 200
+
+
+def _old_path(body: bytes) -> list[dict[str, Any]]:
+    text = body.decode()
+    f"{text}"  # formatting of the full debug log message
+    return json.loads(text)["docs"]
+
+
+def _new_path(decode: Callable[[bytes], Any]) -> Callable[[bytes], list[Film]]:
+    def run(body: bytes) -> list[Film]:
+        return [Film.from_doc(doc) for doc in decode(body)["docs"]]
+
+    return run
+
+
+def _measure(func: Callable[[bytes], Any], body: bytes) -> tuple[float, int, int]:
+    """Func to get decode time (ms), peak allocations and retained size (bytes)."""
+    seconds = timeit.timeit(lambda: func(body), number=NUMBER) / NUMBER
+
+    tracemalloc.start()
+    result = func(body)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return seconds * 1000, peak, retained
+
+
+def main() -> None:
+    """Run benchmark."""
+    paths = {"старый путь (text + json)": _old_path}
+    for name, factory in DECODERS.items():
+        try:
+            paths[f"{name} + Film"] = _new_path(factory())
+        except ImportError:
+            print(f"{name}: не установлен, пропускаем")  # noqa: T201
+
+    for fixture in sorted(FIXTURES.glob("movie_*.json")):
+        body = fixture.read_bytes()
+        print(f"\n{fixture.name}: {len(body)} байт")  # noqa: T201
+        print(f"{'':30} {'время, мс':>10} {'пик, КБ':>10} {'удержано, КБ':>13}")  # noqa: T201
+        for name, func in paths.items():
+            ms, peak, retained = _measure(func, body)
+            print(f"{name:30} {ms:10.3f} {peak / 1024:10.1f} {retained / 1024:13.1f}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Замер запуска избранного на 1M синтетических записей.
+
+Сравнивает старую загрузку всех пользователей при старте (SELECT * в словарь) с
+ленивой загрузкой списка одного пользователя через FavoritesRepository: время до
+обработки первого обновления и память.
+
+    python -m benchmarks.bench_favorites_startup --rows 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from film_bot.db import KINDS, SCHEMA, FavoritesRepository
+
+FAVORITES_PER_USER = 10
+
+
+def _fill(path: Path, rows: int) -> None:
+    """Func to create database with synthetic favorites."""
+    connection = sqlite3.connect(path)
+    connection.executescript(SCHEMA)
+    with connection:
+        connection.executemany(
+            "INSERT INTO favorites VALUES (?, ?, ?, ?)",
+            (
+                (
+                    i // FAVORITES_PER_USER,
+                    "anime" if i % 2 else "dorama",
+                    f"Сериал {i}",
+                    "посмотреть на выходных",
+                )
+                for i in range(rows)
+            ),
+        )
+    connection.close()
+
+
+def _full_scan(path: Path) -> dict:
+    """Load all users' favorites into one dict (old startup)."""
+    connection = sqlite3.connect(path)
+    user_data: dict = {}
+    for chat_id, kind, name, comment in connection.execute(
+        "SELECT chat_id, kind, name, comment FROM favorites",
+    ):
+        user = user_data.setdefault(chat_id, {"doramas": [], "anime": []})
+        key = "anime" if kind == "anime" else "doramas"
+        user[key].append(KINDS[kind](name, comment))
+    connection.close()
+    return user_data
+
+
+async def _lazy(path: Path, chat_id: int) -> list:
+    """Open repository and load only the user of the first update."""
+    repository = FavoritesRepository(str(path))
+    await repository.start()
+    films = await repository.list(chat_id, "anime")
+    await repository.close()
+    return films
+
+
+def _measure(title: str, func: object, *args: object) -> None:
+    tracemalloc.start()
+    started_at = time.perf_counter()
+    result = func(*args)
+    if asyncio.iscoroutine(result):
+        result = asyncio.run(result)
+    elapsed = time.perf_counter() - started_at
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(  # noqa: T201
+        f"{title:35} {elapsed * 1000:10.1f} мс {peak / 2**20:10.1f} МБ пик "
+        f"{retained / 2**20:10.1f} МБ удержано",
+    )
+
+
+def main() -> None:
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "index.db"
+        _fill(path, args.rows)
+        print(f"{args.rows} записей, {path.stat().st_size / 2**20:.1f} МБ")  # noqa: T201
+
+        _measure("полная загрузка (load_user_data)", _full_scan, path)
+        _measure("ленивая загрузка одного пользователя", _lazy, path, 42)
+
+
+if __name__ == "__main__":
+    main()
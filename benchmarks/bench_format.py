@@ -0,0 +1,118 @@
+"""Замер форматирования карточек фильмов на 10 000 синтетических описаний.
+
+Сравнивает прежний рендер (f-строка + textwrap.fill на каждый показ) с
+CardFormatter (первый и повторный показ) и упаковку списка карточек в
+сообщения: накоплением строки через += и функцией pack:
+
+    python -m benchmarks.bench_format --films 10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import textwrap
+import time
+from typing import TYPE_CHECKING
+
+from film_bot.formatting import MESSAGE_LIMIT, CardFormatter, pack
+from film_bot.models import Film
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+WORDS = (
+    "молодой",
+    "герой",
+    "отправляется",
+    "в",
+    "путешествие",
+    "по",
+    "миру",
+    "где",
+    "магия",
+    "и",
+    "дружба",
+    "решают",
+    "всё",
+    "Токио",
+    "Сеул",
+    "школа",
+    "любовь",
+    "тайна",
+)
+
+
+def make_films(count: int, seed: int = 0) -> list[Film]:
+    """Func to generate films with descriptions of 30-500 words."""
+    rnd = random.Random(seed)  # noqa: S311
+    return [
+        Film(
+            id=i,
+            name=f"Сериал {i}",
+            year=rnd.randint(1990, 2025),
+            description=" ".join(rnd.choices(WORDS, k=rnd.randint(30, 500))),
+        )
+        for i in range(count)
+    ]
+
+
+def _old_render(film: Film) -> str:
+    return f"{film.name}, {film.year}\n\n{textwrap.fill(film.description, 100)}"
+
+
+def _old_pack(cards: list[str]) -> list[str]:
+    """Pack by growing one string, as a handler would do naively."""
+    messages = []
+    text = ""
+    for card in cards:
+        if text and len(text) + len(card) + 1 > MESSAGE_LIMIT:
+            messages.append(text)
+            text = ""
+        text = f"{text}\n{card}" if text else card
+    if text:
+        messages.append(text)
+    return messages
+
+
+def _timed(func: Callable[[], object]) -> float:
+    started_at = time.perf_counter()
+    func()
+    return time.perf_counter() - started_at
+
+
+def main() -> None:
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description="Замер форматирования карточек")
+    parser.add_argument("--films", type=int, default=10_000)
+    args = parser.parse_args()
+
+    films = make_films(args.films)
+    formatter = CardFormatter(size=args.films)
+    print(f"Фильмов: {len(films)}")  # noqa: T201
+
+    results = {
+        "прежний рендер": _timed(lambda: [_old_render(film) for film in films]),
+        "CardFormatter, первый показ": _timed(
+            lambda: [formatter.render(film) for film in films],
+        ),
+        "CardFormatter, повторный показ": _timed(
+            lambda: [formatter.render(film) for film in films],
+        ),
+    }
+    cards = formatter.render_list(films, layout="card")
+    results["упаковка через +="] = _timed(lambda: _old_pack(cards))
+    results["упаковка pack"] = _timed(lambda: pack(cards))
+
+    for name, seconds in results.items():
+        print(f"{name:<32} {seconds * 1000:9.1f} мс")  # noqa: T201
+
+    messages = pack(cards)
+    print(  # noqa: T201
+        f"Сообщений: {len(messages)}, самое длинное: {max(map(len, messages))} "
+        f"символов, попаданий в кэш: {formatter.stats.hit_ratio:.0%}",
+    )
+
+
+if __name__ == "__main__":
+    main()
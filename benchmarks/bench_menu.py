@@ -0,0 +1,104 @@
+"""Замер накладных расходов маршрутизации нажатий на кнопки меню.
+
+Сравнивает прежнюю цепочку фильтров `F.text.casefold() == "..."` (по одному
+обработчику на кнопку) с одним обработчиком и поиском в словаре MenuFilter на
+синтетических сообщениях, без сети и FSM:
+
+    python -m benchmarks.bench_menu
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import UTC, datetime
+
+from aiogram import F, Router
+from aiogram.types import Chat, Message
+
+from film_bot.menu import MenuEntry, MenuFilter, build_routes, normalize
+
+NUMBER = 20_000
+# Кнопки в порядке обработчиков прежнего main.py
+BUTTONS = [
+    "Вернуться в главное меню 📌",
+    "❓ Что я умею?",
+    "🌸 Аниме",
+    "📺 Дорамы",
+    "❤️ Избранное",
+    "Поиск аниме по названию 🔎",
+    "Поиск дорамы по названию 🔎",
+    "Поиск аниме по жанру 🎭",
+    "Поиск дорамы по жанру 🎭",
+    "Поиск аниме по актеру 💎",
+    "Поиск дорамы по актеру 💎",
+    "Поиск аниме по году 🎯",
+    "Поиск дорамы по году 🎯",
+    "Случайное аниме 💡",
+    "Случайная дорама 💡",
+    "Добавить в Избранное 📝",
+    "Мой список 📜",
+    "Удалить из Избранного 🚫",
+]
+
+
+async def _noop(message: Message) -> None:
+    pass
+
+
+def _filter_chain() -> Router:
+    router = Router()
+    for text in BUTTONS:
+        router.message.register(_noop, F.text.casefold() == normalize(text))
+    return router
+
+
+def _menu_router() -> Router:
+    router = Router()
+    routes = build_routes({text: MenuEntry(text) for text in BUTTONS})
+    router.message.register(_noop, MenuFilter(routes))
+    return router
+
+
+def _message(text: str) -> Message:
+    return Message(
+        message_id=1,
+        date=datetime.now(UTC),
+        chat=Chat(id=1, type="private"),
+        text=text,
+    )
+
+
+async def _measure(router: Router, messages: list[Message]) -> float:
+    """Func to get mean dispatch time of one message in microseconds."""
+    trigger = router.message.trigger
+    started_at = time.perf_counter()
+    for i in range(NUMBER):
+        await trigger(messages[i % len(messages)])
+    return (time.perf_counter() - started_at) / NUMBER * 1_000_000
+
+
+async def run() -> None:
+    """Run benchmark."""
+    cases = {
+        "первая кнопка": [_message(BUTTONS[0])],
+        "последняя кнопка": [_message(BUTTONS[-1])],
+        "все кнопки": [_message(text) for text in BUTTONS],
+        "не кнопка (ввод в FSM)": [_message("драма, комедия")],
+    }
+    routers = {"цепочка фильтров": _filter_chain(), "словарь": _menu_router()}
+
+    for case, messages in cases.items():
+        print(case)  # noqa: T201
+        for name, router in routers.items():
+            micros = await _measure(router, messages)
+            print(f"  {name:<18} {micros:8.1f} мкс/обновление")  # noqa: T201
+
+
+def main() -> None:
+    """Run benchmark."""
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
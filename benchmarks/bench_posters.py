@@ -0,0 +1,124 @@
+"""Замер отправки постеров с кэшем file_id.
+
+Поднимает фейковый сервер kinopoisk.dev, который отдаёт постеры по 20-80 КБ, и
+отправляет карточки случайных фильмов (популярность распределена по Ципфу)
+через сессию бота без сети. Показывает долю постеров, отправленных по file_id,
+сэкономленные байты и задержку отправки; второй прогон начинается с file_id,
+сохранёнными первым, как после перезапуска бота:
+
+    python -m benchmarks.bench_posters --films 2000 --sends 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from datetime import UTC, datetime
+from itertools import accumulate
+from pathlib import Path
+
+from aiogram import Bot
+from aiogram.types import Chat, Message
+from aiohttp import web
+
+from benchmarks.fake_kinopoisk import FakeKinopoisk, make_records
+from benchmarks.fakes import FAKE_TOKEN, FakeSession
+from film_bot.models import Card, Film
+from film_bot.posters import PosterStore
+
+HOST = "127.0.0.1"
+
+
+def _percentiles(latencies: list[float]) -> str:
+    q = statistics.quantiles(latencies, n=100)
+    return ", ".join(f"p{p} {q[p - 1] * 1000:6.2f} мс" for p in (50, 95, 99))
+
+
+async def _run(
+    name: str,
+    fake: FakeKinopoisk,
+    films: list[Film],
+    args: argparse.Namespace,
+    db_path: Path,
+) -> None:
+    """Send the cards of random films, args.concurrency at a time."""
+    store = PosterStore(
+        str(db_path),
+        base_url=f"http://{HOST}:{args.port}/v1.4/",
+        concurrency=args.fetch_concurrency,
+        max_bytes=args.max_bytes,
+        timeout=10.0,
+    )
+    await store.start()
+    bot = Bot(FAKE_TOKEN, session=FakeSession(latency=args.telegram_latency))
+    message = Message(
+        message_id=1,
+        date=datetime.now(UTC),
+        chat=Chat(id=1, type="private"),
+    ).as_(bot)
+
+    rnd = random.Random(args.seed)  # noqa: S311
+    weights = list(accumulate(1 / (rank + 1) for rank in range(len(films))))
+    cards = [
+        Card(film.description, film)
+        for film in rnd.choices(films, cum_weights=weights, k=args.sends)
+    ]
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: list[float] = []
+
+    async def send(card: Card) -> None:
+        async with semaphore:
+            started_at = time.perf_counter()
+            await store.send(message, card)
+            latencies.append(time.perf_counter() - started_at)
+
+    poster_bytes = fake.poster_bytes
+    started_at = time.perf_counter()
+    await asyncio.gather(*(send(card) for card in cards))
+    elapsed = time.perf_counter() - started_at
+    await store.stop()
+
+    stats = store.stats
+    print(  # noqa: T201
+        f"{name}: {args.sends / elapsed:7.0f} карточек/с, {_percentiles(latencies)}\n"
+        f"  по file_id {stats.hit_ratio:.1%}, ошибок {stats.failures}, "
+        f"скачано {(fake.poster_bytes - poster_bytes) / 2**20:.1f} МБ, "
+        f"сэкономлено {stats.bytes_saved / 2**20:.1f} МБ",
+    )
+
+
+async def main() -> None:
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description="Замер отправки постеров")
+    parser.add_argument("--films", type=int, default=2000)
+    parser.add_argument("--sends", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--fetch-concurrency", type=int, default=4)
+    parser.add_argument("--max-bytes", type=int, default=5 * 1024 * 1024)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--telegram-latency", type=float, default=0.01)
+    parser.add_argument("--port", type=int, default=8093)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    records = make_records(args.films, args.seed)
+    films = [Film.from_doc(doc) for doc in records]
+    fake = FakeKinopoisk(records, latency=args.latency)
+    runner = web.AppRunner(fake.app())
+    await runner.setup()
+    await web.TCPSite(runner, HOST, args.port).start()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / "posters.db"
+            await _run("Первый запуск", fake, films, args, db_path)
+            await _run("После перезапуска", fake, films, args, db_path)
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,153 @@
+"""Замер рекомендаций "Похожее на моё избранное" на синтетическом каталоге.
+
+Генерирует каталог с жанрами, странами, актёрами и годами (популярность
+актёров распределена по Ципфу), строит индекс и замеряет задержку подбора для
+случайного избранного в 1-30 фильмов. Для сравнения тот же косинус считается
+перебором каталога на словарях признаков:
+
+    python -m benchmarks.bench_recommend --films 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import random
+import statistics
+import time
+from collections import Counter
+from itertools import accumulate
+from typing import Any
+
+from film_bot.recommend import FEATURE_WEIGHTS, YEAR_BUCKET, SimilarityIndex
+from film_bot.vocabulary import COUNTRIES, GENRES
+
+TYPES = ("anime", "tv-series", "movie", "cartoon")
+
+
+def make_catalog(
+    count: int,
+    persons: int,
+    seed: int = 0,
+) -> tuple[list[tuple[int, str, int, list[str]]], list[tuple[str, int, Any]]]:
+    """Func to generate films and their genre, country and person links."""
+    rnd = random.Random(seed)  # noqa: S311
+    # Cumulative weights, rnd.choices does not sum them on every call
+    person_weights = list(accumulate(1 / (rank + 1) for rank in range(persons)))
+    films = []
+    links = []
+    for film_id in range(1, count + 1):
+        films.append(
+            (film_id, rnd.choice(TYPES), rnd.randint(1960, 2025), [f"Фильм {film_id}"]),
+        )
+        links.extend(
+            ("genre", film_id, g) for g in rnd.sample(GENRES, rnd.randint(1, 4))
+        )
+        links.extend(
+            ("country", film_id, c) for c in rnd.sample(COUNTRIES, rnd.randint(1, 2))
+        )
+        cast = rnd.choices(
+            range(persons),
+            cum_weights=person_weights,
+            k=rnd.randint(5, 25),
+        )
+        links.extend(("person", film_id, p) for p in set(cast))
+    return films, links
+
+
+class BruteForce:
+    """Same cosine similarity over feature dicts of every film."""
+
+    def __init__(
+        self,
+        films: list[tuple[int, str, int, list[str]]],
+        links: list[tuple[str, int, Any]],
+    ) -> None:
+        """Build feature dicts with the same weights as the index."""
+        features: dict[int, set[tuple[str, Any]]] = {film[0]: set() for film in films}
+        for kind, film_id, value in links:
+            features[film_id].add((kind, value))
+        for film_id, _, year, _ in films:
+            features[film_id].add(("year", year // YEAR_BUCKET))
+        df = Counter(f for values in features.values() for f in values)
+        weight = {
+            f: FEATURE_WEIGHTS[f[0]] * math.log(len(films) / n) if n > 1 else 0.0
+            for f, n in df.items()
+        }
+        self.vectors = []
+        for film_id, values in features.items():
+            norm = math.sqrt(sum(weight[f] ** 2 for f in values)) or 1.0
+            self.vectors.append((film_id, {f: weight[f] / norm for f in values}))
+
+    def similar(self, rows: list[int], k: int) -> list[int]:
+        """Ids of the most similar films."""
+        profile: Counter[tuple[str, Any]] = Counter()
+        for row in rows:
+            profile.update(self.vectors[row][1])
+        chosen = set(rows)
+        scores = [
+            (sum(w * profile.get(f, 0.0) for f, w in vector.items()), film_id)
+            for row, (film_id, vector) in enumerate(self.vectors)
+            if row not in chosen
+        ]
+        scores.sort(reverse=True)
+        return [film_id for _, film_id in scores[:k]]
+
+
+def _percentiles(latencies: list[float]) -> str:
+    q = statistics.quantiles(latencies, n=100)
+    return ", ".join(f"p{p} {q[p - 1] * 1000:6.2f} мс" for p in (50, 95, 99))
+
+
+def main() -> None:
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description="Замер рекомендаций")
+    parser.add_argument("--films", type=int, default=100_000)
+    parser.add_argument("--persons", type=int, default=200_000)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--brute-requests", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    films, links = make_catalog(args.films, args.persons, args.seed)
+    started_at = time.perf_counter()
+    index = SimilarityIndex(films, links)
+    print(  # noqa: T201
+        f"Индекс: {len(index)} фильмов, {index.matrix.shape[1]} признаков, "
+        f"{index.matrix.nnz} ненулевых, {index.nbytes / 2**20:.1f} МБ, "
+        f"построен за {time.perf_counter() - started_at:.1f} с",
+    )
+
+    rnd = random.Random(args.seed)  # noqa: S311
+    requests = [
+        (
+            rnd.sample(range(len(films)), rnd.randint(1, 30)),
+            rnd.choice(("аниме", "дорама")),
+        )
+        for _ in range(args.requests)
+    ]
+    latencies = []
+    for rows, film_type in requests:
+        started_at = time.perf_counter()
+        index.similar(rows, film_type, args.top)
+        latencies.append(time.perf_counter() - started_at)
+    print(f"  матрица  {_percentiles(latencies)}")  # noqa: T201
+
+    brute = BruteForce(films, links)
+    latencies = []
+    agree = 0
+    for rows, _ in requests[: args.brute_requests]:
+        started_at = time.perf_counter()
+        expected = brute.similar(rows, args.top)
+        latencies.append(time.perf_counter() - started_at)
+        found = index.similar(rows, None, args.top)
+        agree += len(set(found) & set(expected)) / args.top
+    print(  # noqa: T201
+        f"  перебор  среднее {statistics.mean(latencies) * 1000:7.0f} мс, "
+        f"совпадение топа с матрицей {agree / len(latencies):.0%}",
+    )
+
+
+if __name__ == "__main__":
+    main()
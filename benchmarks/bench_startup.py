@@ -0,0 +1,147 @@
+"""Замер холодного запуска: ленивый импорт и фабрика против прежнего пути.
+
+Каждый сценарий запускается в новом процессе несколько раз, берётся медиана
+времени от запуска процесса до нужной точки:
+
+- `import film_bot`: прежний __init__ импортировал все подмодули и читал .env,
+  теперь подмодули загружаются при обращении;
+- главный процесс film_bot.workers: раньше строил всё приложение ради списка
+  типов обновлений, теперь ему хватает обработчиков (`router`);
+- первое обновление: импорт, создание приложения, startup и обработка /start с
+  фейковой сессией Telegram; прежний путь импортировал все модули бота заранее.
+
+    python -m benchmarks.bench_startup --runs 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.fakes import FAKE_TOKEN
+
+ROOT = Path(__file__).resolve().parent.parent
+# Модули, которые прежде импортировались при импорте пакета или main.py
+EAGER_MODULES = (
+    "film_bot.api",
+    "film_bot.config",
+    "film_bot.main",
+    "film_bot.messages",
+    "film_bot.models",
+    "film_bot.metrics",
+    "film_bot.flood",
+    "film_bot.storage",
+    "film_bot.db",
+    "film_bot.warmer",
+    "film_bot.webhook",
+)
+EAGER_IMPORT = "\n".join(
+    [f"import {name}" for name in EAGER_MODULES]
+    + ["from film_bot.config import get_config", "get_config()"],
+)
+FIRST_UPDATE = """
+import asyncio
+from aiogram import Bot
+from aiogram.types import Update
+from benchmarks.fakes import FAKE_TOKEN, FakeSession
+from film_bot.main import create_dispatcher
+
+async def first_update():
+    dp = create_dispatcher()
+    bot = Bot(FAKE_TOKEN, session=FakeSession())
+    await dp.emit_startup(bot=bot, dispatcher=dp)
+    update = {
+        "update_id": 1,
+        "message": {
+            "message_id": 1,
+            "date": 0,
+            "chat": {"id": 1, "type": "private"},
+            "from": {"id": 1, "is_bot": False, "first_name": "a"},
+            "text": "/start",
+        },
+    }
+    await dp.feed_update(bot, Update.model_validate(update, context={"bot": bot}))
+    report()
+    await dp.emit_shutdown(bot=bot, dispatcher=dp)
+
+asyncio.run(first_update())
+"""
+SCENARIOS = {
+    "import film_bot": {
+        "прежний": EAGER_IMPORT + "\nreport()",
+        "ленивый": "import film_bot\nreport()",
+    },
+    "главный процесс workers": {
+        "прежний": "from film_bot.main import dp\ndp.resolve_used_update_types()"
+        "\nreport()",
+        "ленивый": "from film_bot.main import router\n"
+        "router.resolve_used_update_types()\nreport()",
+    },
+    "первое обновление": {
+        "прежний": EAGER_IMPORT + FIRST_UPDATE,
+        "ленивый": FIRST_UPDATE,
+    },
+}
+# Префикс строки с результатом, остальной вывод процесса (например, логи)
+# пропускается
+REPORT_MARKER = "bench_startup:"
+
+
+def _run(code: str, env: dict[str, str]) -> float:
+    """Func to run the code in a new process, seconds until it calls report()."""
+    started_at = time.time()
+    prelude = (
+        "import time\n"
+        "def report():\n"
+        f"    print({REPORT_MARKER!r}, time.time() - {started_at!r}, flush=True)\n"
+    )
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", prelude + code],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    for line in result.stdout.splitlines():
+        if line.startswith(REPORT_MARKER):
+            return float(line.removeprefix(REPORT_MARKER))
+    msg = f"Нет строки {REPORT_MARKER!r} в выводе:\n{result.stdout}{result.stderr}"
+    raise RuntimeError(msg)
+
+
+def main() -> None:
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description="Замер холодного запуска")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "TELEGAM_BOT_TOKEN": FAKE_TOKEN,
+            "KINOPOISK_API_KEY": "fake",
+            "DB_PATH": str(Path(tmp) / "index.db"),
+            "SNAPSHOT_PATH": str(Path(tmp) / "snapshot.bin"),
+            "POSTER_DB_PATH": str(Path(tmp) / "posters.db"),
+            "WARMER_STATE_PATH": "",
+            "METRICS_ENABLED": "false",
+        }
+        for scenario, variants in SCENARIOS.items():
+            print(scenario)  # noqa: T201
+            for variant, code in variants.items():
+                times = [_run(code, env) * 1000 for _ in range(args.runs)]
+                print(  # noqa: T201
+                    f"  {variant:<10} медиана {statistics.median(times):7.0f} мс,"
+                    f" мин {min(times):7.0f} мс",
+                )
+
+
+if __name__ == "__main__":
+    main()
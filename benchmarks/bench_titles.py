@@ -0,0 +1,131 @@
+"""Замер автодополнения названий в inline-режиме.
+
+Генерирует названия из случайных слогов (по 1-4 слова, у части фильмов есть
+альтернативное название), строит индекс и замеряет поиск по началу названия,
+по началу второго слова и с опечаткой. Для сравнения те же запросы ищутся
+перебором всех названий:
+
+    python -m benchmarks.bench_titles --names 200000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+
+from film_bot.titles import TitleIndex
+from film_bot.vocabulary import normalize
+
+# Слоги из согласной и гласной, русские и латинские
+SYLLABLES = [
+    c + v
+    for consonants, vowels in (
+        ("бвгдзклмнпрстхчш", "аеиоуяю"),
+        ("bdghkmnprstyz", "aeiou"),
+    )
+    for c in consonants
+    for v in vowels
+]
+
+
+def make_names(count: int, seed: int = 0) -> list[tuple[int, list[str]]]:
+    """Func to generate films with one or two names."""
+    rnd = random.Random(seed)  # noqa: S311
+
+    def name() -> str:
+        words = (
+            "".join(rnd.choices(SYLLABLES, k=rnd.randint(1, 4)))
+            for _ in range(rnd.randint(1, 4))
+        )
+        return " ".join(words).capitalize()
+
+    films = []
+    total = 0
+    film_id = 0
+    while total < count:
+        film_id += 1
+        names = [name()] if rnd.random() < 0.5 else [name(), name()]  # noqa: PLR2004
+        films.append((film_id, names))
+        total += len(names)
+    return films
+
+
+def scan(names: list[tuple[str, int]], query: str, limit: int) -> list[int]:
+    """Ids of the names having all words of the query, the last one as a prefix."""
+    *words, last = normalize(query).split()
+    found = []
+    for name, film_id in names:
+        parts = name.split()
+        if all(w in parts for w in words) and any(p.startswith(last) for p in parts):
+            found.append(film_id)
+            if len(found) == limit:
+                break
+    return found
+
+
+def _typo(text: str, rnd: random.Random) -> str:
+    i = rnd.randrange(1, len(text))
+    return text[:i] + text[i + 1 :]
+
+
+def _percentiles(latencies: list[float]) -> str:
+    q = statistics.quantiles(latencies, n=100)
+    return ", ".join(f"p{p} {q[p - 1] * 1e6:7.1f} мкс" for p in (50, 95, 99))
+
+
+def main() -> None:
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description="Замер автодополнения названий")
+    parser.add_argument("--names", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--scan-queries", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    films = make_names(args.names, args.seed)
+    started_at = time.perf_counter()
+    index = TitleIndex()
+    for film_id, names in films:
+        index.add(film_id, names)
+    index.search("а", 1)
+    print(  # noqa: T201
+        f"Индекс: {len(index)} названий, "
+        f"построен за {time.perf_counter() - started_at:.1f} с",
+    )
+
+    rnd = random.Random(args.seed)  # noqa: S311
+    names = [name for name, _ in index.entries]
+    kinds = {
+        "начало": lambda name: name[: rnd.randint(1, len(name))],
+        "2 слова": lambda name: " ".join(
+            [name.split()[0], name.split()[-1][: rnd.randint(1, 3)]],
+        ),
+        "опечатка": lambda name: _typo(name[: rnd.randint(4, 12)], rnd),
+    }
+    for kind, make in kinds.items():
+        queries = [
+            make(name)
+            for name in rnd.choices(names, k=args.queries)
+            if kind != "опечатка" or len(name) > 4  # noqa: PLR2004
+        ]
+        latencies = []
+        for query in queries:
+            started_at = time.perf_counter()
+            index.search(query, args.limit)
+            latencies.append(time.perf_counter() - started_at)
+        scan_latencies = []
+        for query in queries[: args.scan_queries]:
+            started_at = time.perf_counter()
+            scan(index.entries, query, args.limit)
+            scan_latencies.append(time.perf_counter() - started_at)
+        print(  # noqa: T201
+            f"  {kind:<9} индекс {_percentiles(latencies)}; "
+            f"перебор среднее {statistics.mean(scan_latencies) * 1000:6.1f} мс",
+        )
+
+
+if __name__ == "__main__":
+    main()
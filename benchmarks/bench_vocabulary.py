@@ -0,0 +1,111 @@
+"""Замер исправления опечаток в жанрах и странах по всему словарю.
+
+Генерирует ввод с одной-двумя опечатками (замена, пропуск, лишняя буква,
+регистр, пробелы) и сравнивает поиск по индексу триграмм с перебором всего
+словаря с расстоянием Левенштейна: задержку на одно слово и долю исправленных:
+
+    python -m benchmarks.bench_vocabulary --inputs 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+from typing import TYPE_CHECKING
+
+from film_bot.vocabulary import (
+    COUNTRY_VOCABULARY,
+    GENRE_VOCABULARY,
+    Vocabulary,
+    distance,
+    max_distance,
+    normalize,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+LETTERS = "абвгдежзийклмнопрстуфхцчшщъыьэюя"
+
+
+def make_typo(word: str, rnd: random.Random, typos: int) -> str:
+    """Func to add typos, change case and spaces of the word."""
+    chars = list(word)
+    for _ in range(typos):
+        i = rnd.randrange(len(chars))
+        kind = rnd.choice(("replace", "delete", "insert"))
+        if kind == "replace":
+            chars[i] = rnd.choice(LETTERS)
+        elif kind == "delete" and len(chars) > 2:  # noqa: PLR2004
+            del chars[i]
+        else:
+            chars.insert(i, rnd.choice(LETTERS))
+    text = "".join(chars)
+    return f"  {text.upper() if rnd.random() < 0.2 else text} "  # noqa: PLR2004
+
+
+def brute_force(vocabulary: Vocabulary, text: str) -> str | None:
+    """Func to match the text by the distance to every name."""
+    key = normalize(text)
+    if key in vocabulary.names:
+        return vocabulary.names[key]
+    limit = max_distance(key)
+    best = sorted(
+        (distance(key, candidate, limit), vocabulary.names[candidate])
+        for candidate in vocabulary.names
+    )
+    if best[0][0] > limit or (len(best) > 1 and best[0][0] == best[1][0]):
+        return None
+    return best[0][1]
+
+
+def _measure(
+    func: Callable[[str], str | None],
+    inputs: list[tuple[str, str]],
+) -> tuple[list[float], int]:
+    """Latencies of every input and the count of correct matches."""
+    latencies = []
+    correct = 0
+    for text, expected in inputs:
+        started_at = time.perf_counter()
+        result = func(text)
+        latencies.append(time.perf_counter() - started_at)
+        correct += result == expected
+    return latencies, correct
+
+
+def main() -> None:
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description="Замер исправления опечаток")
+    parser.add_argument("--inputs", type=int, default=20_000)
+    parser.add_argument("--typos", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)  # noqa: S311
+    for vocabulary in (GENRE_VOCABULARY, COUNTRY_VOCABULARY):
+        names = list(vocabulary.names.items())
+        inputs = []
+        for _ in range(args.inputs):
+            key, name = rnd.choice(names)
+            inputs.append((make_typo(key, rnd, args.typos), name))
+
+        print(f"Словарь: {len(vocabulary)} названий, ввод: {len(inputs)}")  # noqa: T201
+        methods = {
+            "индекс триграмм": vocabulary.match,
+            "перебор словаря": lambda text, v=vocabulary: brute_force(v, text),
+        }
+        for method, func in methods.items():
+            latencies, correct = _measure(func, inputs)
+            percentiles = statistics.quantiles(latencies, n=100)
+            print(  # noqa: T201
+                f"  {method:<16} p50 {percentiles[49] * 1e6:7.1f} мкс, "
+                f"p99 {percentiles[98] * 1e6:7.1f} мкс, "
+                f"исправлено {correct / len(inputs):.1%}",
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""Локальный фейковый сервер kinopoisk.dev для запуска без сети.
+
+Отдаёт синтетические (или загруженные из выгрузки) записи по тем же эндпоинтам,
+что использует бот, с настраиваемой задержкой и долей ошибок:
+
+    python -m benchmarks.fake_kinopoisk --port 8081 --records 5000
+    KINOPOISK_API_URL=http://127.0.0.1:8081/v1.4/ python -m film_bot.sync
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+from aiohttp import web
+
+GENRES = ("аниме", "мультфильм", "комедия", "драма", "фэнтези", "мелодрама")
+COUNTRIES = ("Япония", "Корея Южная", "Китай")
+
+
+def make_records(count: int, seed: int = 0) -> list[dict[str, Any]]:
+    """Func to generate synthetic catalog records."""
+    rnd = random.Random(seed)  # noqa: S311
+    start = datetime(2020, 1, 1, tzinfo=UTC)
+    records = []
+    for i in range(1, count + 1):
+        is_anime = rnd.random() < 0.5  # noqa: PLR2004
+        records.append(
+            {
+                "id": i,
+                "type": "anime" if is_anime else "tv-series",
+                "name": f"Сериал {i}",
+                "alternativeName": f"Series {i}",
+                "year": rnd.randint(1990, 2025),
+                "description": " ".join(rnd.choices(GENRES, k=40)),
+                "genres": [{"name": g} for g in rnd.sample(GENRES, 2)],
+                "countries": [{"name": rnd.choice(COUNTRIES)}],
+                "persons": [
+                    {"id": p, "name": f"Актёр {p}", "enName": f"Actor {p}"}
+                    for p in rnd.sample(range(1, count // 10 + 2), 3)
+                ],
+                "poster": {"previewUrl": f"/poster/{i}.jpg"},
+                "updatedAt": (start + timedelta(minutes=i))
+                .isoformat(
+                    timespec="milliseconds",
+                )
+                .replace("+00:00", "Z"),
+            },
+        )
+    return records
+
+
+def _date_range(value: str) -> tuple[datetime, datetime]:
+    """Func to parse "dd.mm.yyyy-dd.mm.yyyy" filter."""
+    start, _, end = value.partition("-")
+    parse = lambda s: datetime.strptime(s, "%d.%m.%Y").replace(tzinfo=UTC)  # noqa: E731
+    return parse(start), parse(end or start) + timedelta(days=1)
+
+
+def _matches(doc: dict[str, Any], query: web.Request) -> bool:  # noqa: PLR0911
+    """Func to check the record against query filters."""
+    q = query.query
+    if (types := q.getall("type", [])) and doc["type"] not in types:
+        return False
+    countries = {c["name"] for c in doc["countries"]}
+    if (wanted := q.getall("countries.name", [])) and not countries & set(wanted):
+        return False
+    genres = {g["name"] for g in doc["genres"]}
+    if not set(q.getall("genres.name", [])) <= genres:
+        return False
+    persons = {str(p["id"]) for p in doc["persons"]}
+    if not set(q.getall("persons.id", [])) <= persons:
+        return False
+    if year := q.get("year"):
+        start, _, end = year.partition("-")
+        if not int(start) <= doc["year"] <= int(end or start):
+            return False
+    if updated := q.get("updatedAt"):
+        start, end = _date_range(updated)
+        if not start <= datetime.fromisoformat(doc["updatedAt"]) < end:
+            return False
+    return True
+
+
+class FakeKinopoisk:
+    """Fake kinopoisk.dev application."""
+
+    def __init__(
+        self,
+        records: list[dict[str, Any]],
+        *,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ) -> None:
+        """Init server.
+
+        :param latency: delay of every response in seconds
+        :param error_rate: share of responses with 500 status
+        """
+        self.records = records
+        self.latency = latency
+        self.error_rate = error_rate
+        self.requests = 0
+        # Bytes of the posters sent
+        self.poster_bytes = 0
+        self._random = random.Random(seed)  # noqa: S311
+
+    def app(self) -> web.Application:
+        """Build aiohttp application."""
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_get("/v1.4/movie", self.movie)
+        app.router.add_get("/v1.4/movie/search", self.movie_search)
+        app.router.add_get("/v1.4/movie/random", self.movie_random)
+        app.router.add_get("/v1.4/person/search", self.person_search)
+        app.router.add_get("/poster/{film_id}.jpg", self.poster)
+        return app
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler: Any) -> web.Response:  # noqa: ANN401
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self._random.random() < self.error_rate:
+            return web.json_response({"message": "fake error"}, status=500)
+        try:
+            return await handler(request)
+        except ValueError as e:
+            # Invalid filter values, e.g. a year that is not a number
+            return web.json_response({"message": str(e)}, status=400)
+
+    @staticmethod
+    def _page(request: web.Request, docs: list[dict[str, Any]]) -> web.Response:
+        page = int(request.query.get("page", 1))
+        limit = int(request.query.get("limit", 10))
+        if request.query.get("sortField") == "updatedAt":
+            reverse = request.query.get("sortType") == "-1"
+            docs = sorted(docs, key=lambda d: d["updatedAt"], reverse=reverse)
+        return web.json_response(
+            {
+                "docs": docs[(page - 1) * limit : page * limit],
+                "total": len(docs),
+                "limit": limit,
+                "page": page,
+                "pages": max(1, -(-len(docs) // limit)),
+            },
+        )
+
+    async def movie(self, request: web.Request) -> web.Response:
+        """Movie list with filters."""
+        return self._page(request, [d for d in self.records if _matches(d, request)])
+
+    async def movie_search(self, request: web.Request) -> web.Response:
+        """Search by name."""
+        query = request.query.get("query", "").casefold()
+        docs = [
+            d
+            for d in self.records
+            if query in d["name"].casefold() or query in d["alternativeName"].casefold()
+        ]
+        return self._page(request, docs)
+
+    async def movie_random(self, request: web.Request) -> web.Response:
+        """Random film."""
+        docs = [d for d in self.records if _matches(d, request)]
+        if not docs:
+            return web.json_response({"message": "not found"}, status=404)
+        return web.json_response(self._random.choice(docs))
+
+    async def person_search(self, request: web.Request) -> web.Response:
+        """Search person by name."""
+        queries = [q.casefold() for q in request.query.getall("query", [])]
+        persons = {
+            p["id"]: p
+            for d in self.records
+            for p in d["persons"]
+            if any(q in p["name"].casefold() for q in queries)
+        }
+        return self._page(request, list(persons.values()))
+
+    async def poster(self, request: web.Request) -> web.Response:
+        """Poster image of 20-80 KB, the same for the same film."""
+        film_id = int(request.match_info["film_id"])
+        size = random.Random(film_id).randint(20, 80) * 1024  # noqa: S311
+        self.poster_bytes += size
+        return web.Response(
+            body=b"\xff\xd8\xff" + bytes(size - 3),
+            content_type="image/jpeg",
+        )
+
+
+def main() -> None:
+    """Run fake server."""
+    parser = argparse.ArgumentParser(description="Фейковый сервер kinopoisk.dev")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--records", type=int, default=1000)
+    parser.add_argument("--dump", type=Path, help="JSON выгрузка вместо синтетики")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    if args.dump:
+        data = json.loads(args.dump.read_text(encoding="utf-8"))
+        records = data["docs"] if isinstance(data, dict) else data
+    else:
+        records = make_records(args.records)
+
+    server = FakeKinopoisk(records, latency=args.latency, error_rate=args.error_rate)
+    web.run_app(server.app(), port=args.port)
+
+
+if __name__ == "__main__":
+    main()
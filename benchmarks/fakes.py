@@ -0,0 +1,121 @@
+"""Фейковые объекты Telegram для замеров без сети."""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+import itertools
+import json
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import EditMessageText, GetMe, SendMessage, SendPhoto
+from aiogram.types import Chat, Message, PhotoSize, User
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator
+
+    from aiogram import Bot
+    from aiogram.methods import TelegramMethod
+
+FIXTURES = Path(__file__).parent / "fixtures"
+# Токен подходящего формата, запросы в Telegram не отправляются
+FAKE_TOKEN = "123456:fake-token-for-benchmarks"  # noqa: S105
+
+
+class FakeSession(BaseSession):
+    """Bot session that captures outgoing requests instead of sending them."""
+
+    def __init__(self, latency: float = 0.0) -> None:
+        """Init session.
+
+        :param latency: delay of every Telegram API call in seconds
+        """
+        super().__init__()
+        self.latency = latency
+        self.requests: list[tuple[float, TelegramMethod]] = []
+        self._message_ids = itertools.count(1)
+
+    async def close(self) -> None:
+        """Nothing to close."""
+
+    async def make_request(
+        self,
+        bot: Bot,  # noqa: ARG002
+        method: TelegramMethod,
+        timeout: int | None = None,  # noqa: ARG002, ASYNC109
+    ) -> Any:  # noqa: ANN401
+        """Capture the request and return a plausible result."""
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.requests.append((time.perf_counter(), method))
+        return self._result(method)
+
+    async def stream_content(
+        self,
+        url: str,  # noqa: ARG002
+        headers: dict[str, Any] | None = None,  # noqa: ARG002
+        timeout: int = 30,  # noqa: ARG002, ASYNC109
+        chunk_size: int = 65536,  # noqa: ARG002
+        raise_for_status: bool = True,  # noqa: ARG002, FBT001, FBT002
+    ) -> AsyncGenerator[bytes]:
+        """No files in benchmarks."""
+        yield b""
+
+    def _result(self, method: TelegramMethod) -> Any:  # noqa: ANN401
+        if isinstance(method, GetMe):
+            return User(id=1, is_bot=True, first_name="Fake", username="FakeBot")
+        if isinstance(method, SendMessage | EditMessageText | SendPhoto):
+            message_id = next(self._message_ids)
+            photo = None
+            if isinstance(method, SendPhoto):
+                photo = [
+                    PhotoSize(
+                        file_id=f"photo-{message_id}",
+                        file_unique_id=f"unique-{message_id}",
+                        width=300,
+                        height=450,
+                    ),
+                ]
+            return Message(
+                message_id=message_id,
+                date=datetime.now(UTC),
+                chat=Chat(id=method.chat_id or 0, type="private"),
+                text=getattr(method, "text", None),
+                photo=photo,
+            )
+        return True
+
+    @property
+    def sent_messages(self) -> list[TelegramMethod]:
+        """Captured outgoing messages."""
+        return [
+            method
+            for _, method in self.requests
+            if isinstance(method, SendMessage | SendPhoto | EditMessageText)
+        ]
+
+
+def load_conversations(name: str = "updates.json") -> list[list[dict[str, Any]]]:
+    """Func to load recorded conversations (lists of updates of one chat)."""
+    return json.loads((FIXTURES / name).read_text(encoding="utf-8"))
+
+
+def for_chat(
+    conversation: list[dict[str, Any]],
+    chat_id: int,
+    update_ids: itertools.count,
+) -> list[dict[str, Any]]:
+    """Func to copy recorded updates for another chat."""
+    updates = copy.deepcopy(conversation)
+    for update in updates:
+        update["update_id"] = next(update_ids)
+        message = update.get("message")
+        if message is not None:
+            message["chat"]["id"] = chat_id
+            message["from"]["id"] = chat_id
+            message["date"] = int(time.time())
+    return updates
@@ -0,0 +1,299 @@
+"""Нагрузочный тест всего бота на записанных или синтетических обновлениях.
+
+Прогоняет обновления через настоящий диспетчер `dp` из film_bot.main с
+фейковой сессией Telegram (исходящие сообщения только запоминаются) и фейковым
+kinopoisk.dev с настраиваемой задержкой и долей ошибок. Считает обновления в
+секунду, задержку обработки p50/p95/p99 и память процесса по ходу прогона.
+Результат сохраняется в JSON, два таких файла можно сравнить:
+
+    python -m benchmarks.load_test --users 500 --latency 0.02 --output base.json
+    python -m benchmarks.load_test --users 500 --latency 0.02 --output new.json
+    python -m benchmarks.load_test --compare base.json new.json --threshold 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from aiohttp import web
+
+from benchmarks.fake_kinopoisk import GENRES, FakeKinopoisk, make_records
+from benchmarks.fakes import FAKE_TOKEN, FakeSession, for_chat, load_conversations
+
+if TYPE_CHECKING:
+    from aiogram import Bot, Dispatcher
+
+HOST = "127.0.0.1"
+# Метрики, по которым сравниваются прогоны, и лучшее направление их изменения
+COMPARED = {
+    "updates_per_second": "higher",
+    "p50_ms": "lower",
+    "p95_ms": "lower",
+    "p99_ms": "lower",
+    "peak_rss_mb": "lower",
+    "api_requests": "lower",
+}
+# Шаблоны синтетических диалогов, {} заменяется случайным значением
+TEMPLATES = (
+    ("/start", "🌸 Аниме", "Поиск аниме по году 🎯", "{year}", "Случайное аниме 💡"),
+    ("/start", "📺 Дорамы", "Поиск дорамы по жанру 🎭", "{genre}"),
+    ("🌸 Аниме", "Поиск аниме по жанру 🎭", "{genre}", "Вернуться в главное меню 📌"),
+    ("📺 Дорамы", "Поиск дорамы по году 🎯", "{years}", "Случайная дорама 💡"),
+    ("🌸 Аниме", "Поиск аниме по названию 🔎", "Сериал {id}", "/help"),
+    ("📺 Дорамы", "Поиск дорамы по актеру 💎", "Актёр {person}"),
+    ("❤️ Избранное", "Мой список 📜", "аниме", "Вернуться в главное меню 📌"),
+)
+
+
+def _setup_env(api_port: int, db_path: Path) -> None:
+    """Point the bot to the fake services before film_bot is imported."""
+    os.environ.setdefault("TELEGAM_BOT_TOKEN", FAKE_TOKEN)
+    os.environ.setdefault("KINOPOISK_API_KEY", "fake")
+    os.environ["KINOPOISK_API_URL"] = f"http://{HOST}:{api_port}/v1.4/"
+    os.environ["DB_PATH"] = str(db_path)
+    os.environ["SNAPSHOT_PATH"] = str(db_path.with_name("snapshot.bin"))
+    os.environ["POSTER_DB_PATH"] = str(db_path.with_name("posters.db"))
+    os.environ["API_RATE"] = "100000"
+    os.environ["API_BURST"] = "100000"
+    # Фоновые задачи и сервер метрик делают результаты невоспроизводимыми
+    os.environ.setdefault("WARMER_ENABLED", "false")
+    os.environ.setdefault("METRICS_ENABLED", "false")
+    # Users of the test write faster than the flood control allows
+    os.environ.setdefault("FLOOD_CONTROL", "false")
+
+
+def _message(text: str) -> dict[str, Any]:
+    return {
+        "update_id": 0,
+        "message": {
+            "message_id": 0,
+            "date": 0,
+            "chat": {"id": 0, "type": "private"},
+            "from": {"id": 0, "is_bot": False, "first_name": "Пользователь"},
+            "text": text,
+        },
+    }
+
+
+def make_conversations(
+    count: int,
+    records: int,
+    seed: int = 0,
+) -> list[list[dict[str, Any]]]:
+    """Func to generate synthetic conversations from the templates."""
+    rnd = random.Random(seed)  # noqa: S311
+    conversations = []
+    for _ in range(count):
+        start = rnd.randint(1990, 2020)
+        values = {
+            "year": rnd.randint(1990, 2025),
+            "years": f"{start}-{start + rnd.randint(1, 5)}",
+            "genre": rnd.choice(GENRES),
+            "id": rnd.randint(1, records),
+            "person": rnd.randint(1, records // 10 + 1),
+        }
+        template = rnd.choice(TEMPLATES)
+        conversations.append([_message(text.format(**values)) for text in template])
+    return conversations
+
+
+def _rss_mb() -> float:
+    """Func to get resident memory of the process in megabytes."""
+    try:
+        pages = int(Path("/proc/self/statm").read_text().split()[1])
+    except (OSError, IndexError, ValueError):
+        # Not Linux, the peak is the best available value
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 / (1024 if sys.platform == "darwin" else 1)
+    return pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+
+
+async def _sample_memory(
+    samples: list[tuple[float, float, int]],
+    latencies: list[float],
+    interval: float,
+) -> None:
+    """Record (seconds, RSS, processed updates) every interval."""
+    started_at = time.perf_counter()
+    while True:
+        samples.append((time.perf_counter() - started_at, _rss_mb(), len(latencies)))
+        await asyncio.sleep(interval)
+
+
+async def _user(
+    dp: Dispatcher,
+    bot: Bot,
+    updates: list[dict[str, Any]],
+    latencies: list[float],
+) -> int:
+    """Feed updates of one chat one by one, return count of failed ones."""
+    from aiogram.types import Update  # noqa: PLC0415
+
+    errors = 0
+    for data in updates:
+        update = Update.model_validate(data, context={"bot": bot})
+        started_at = time.perf_counter()
+        try:
+            await dp.feed_update(bot, update)
+        except Exception:  # noqa: BLE001
+            errors += 1
+        latencies.append(time.perf_counter() - started_at)
+    return errors
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    """Run load test, return the report."""
+    fake_api = FakeKinopoisk(
+        make_records(args.records),
+        latency=args.latency,
+        error_rate=args.error_rate,
+    )
+    api_runner = web.AppRunner(fake_api.app())
+    await api_runner.setup()
+    await web.TCPSite(api_runner, HOST, args.api_port).start()
+
+    if args.updates:
+        conversations = json.loads(args.updates.read_text(encoding="utf-8"))
+    elif args.synthetic:
+        conversations = make_conversations(args.synthetic, args.records, args.seed)
+    else:
+        conversations = load_conversations()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _setup_env(args.api_port, Path(tmp) / "index.db")
+
+        from aiogram import Bot  # noqa: PLC0415
+
+        from film_bot.main import dp  # noqa: PLC0415
+
+        session = FakeSession(latency=args.telegram_latency)
+        bot = Bot(FAKE_TOKEN, session=session)
+        await dp.emit_startup(bot=bot, dispatcher=dp)
+
+        update_ids = itertools.count(1)
+        chats = [
+            for_chat(conversations[i % len(conversations)], i, update_ids)
+            for i in range(1, args.users + 1)
+        ]
+        latencies: list[float] = []
+        samples: list[tuple[float, float, int]] = []
+        sampler = asyncio.create_task(
+            _sample_memory(samples, latencies, args.sample_interval),
+        )
+
+        started_at = time.perf_counter()
+        errors = await asyncio.gather(
+            *(_user(dp, bot, updates, latencies) for updates in chats),
+        )
+        elapsed = time.perf_counter() - started_at
+
+        sampler.cancel()
+        samples.append((elapsed, _rss_mb(), len(latencies)))
+        await dp.emit_shutdown(bot=bot, dispatcher=dp)
+    await api_runner.cleanup()
+
+    percentiles = statistics.quantiles(latencies, n=100)
+    return {
+        "settings": {
+            "users": args.users,
+            "records": args.records,
+            "latency": args.latency,
+            "error_rate": args.error_rate,
+            "telegram_latency": args.telegram_latency,
+            "conversations": len(conversations),
+        },
+        "updates": len(latencies),
+        "errors": sum(errors),
+        "seconds": elapsed,
+        "updates_per_second": len(latencies) / elapsed,
+        "p50_ms": percentiles[49] * 1000,
+        "p95_ms": percentiles[94] * 1000,
+        "p99_ms": percentiles[98] * 1000,
+        "peak_rss_mb": max(rss for _, rss, _ in samples),
+        "api_requests": fake_api.requests,
+        "sent_messages": len(session.sent_messages),
+        "memory": samples,
+    }
+
+
+def print_report(report: dict[str, Any]) -> None:
+    """Func to print the report of one run."""
+    print(  # noqa: T201
+        f"Обновлений: {report['updates']} за {report['seconds']:.2f} с "
+        f"({report['updates_per_second']:.0f}/с), ошибок: {report['errors']}\n"
+        f"Задержка обработки, мс: p50 {report['p50_ms']:.1f}, "
+        f"p95 {report['p95_ms']:.1f}, p99 {report['p99_ms']:.1f}\n"
+        f"Отправлено сообщений: {report['sent_messages']}, "
+        f"запросов к API: {report['api_requests']}\n"
+        "Память:",
+    )
+    samples = report["memory"]
+    # Not more than 10 lines of the timeline
+    step = max(1, len(samples) // 10)
+    for seconds, rss, updates in [*samples[:-1:step], samples[-1]]:
+        print(f"  {seconds:7.2f} с {rss:8.1f} МБ {updates:8} обновлений")  # noqa: T201
+
+
+def compare(base: dict[str, Any], new: dict[str, Any], threshold: float) -> bool:
+    """Func to print the difference of two runs, False if any metric regressed.
+
+    :param threshold: allowed worsening of a metric in percent
+    """
+    if base["settings"] != new["settings"]:
+        print(  # noqa: T201
+            "Настройки прогонов отличаются:\n"
+            f"  {base['settings']}\n  {new['settings']}",
+        )
+    ok = True
+    for name, better in COMPARED.items():
+        old, value = base[name], new[name]
+        change = (value - old) / old * 100 if old else 0.0
+        worse = change < -threshold if better == "higher" else change > threshold
+        ok = ok and not worse
+        mark = "регрессия" if worse else ""
+        print(f"{name:<20} {old:12.1f} {value:12.1f} {change:+8.1f}% {mark}")  # noqa: T201
+    return ok
+
+
+def main() -> None:
+    """Parse arguments and run load test or comparison."""
+    parser = argparse.ArgumentParser(description="Нагрузочный тест бота")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--records", type=int, default=2000)
+    parser.add_argument("--updates", type=Path, help="JSON с записанными диалогами")
+    parser.add_argument("--synthetic", type=int, help="число синтетических диалогов")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--telegram-latency", type=float, default=0.0)
+    parser.add_argument("--sample-interval", type=float, default=0.5)
+    parser.add_argument("--api-port", type=int, default=8092)
+    parser.add_argument("--output", type=Path, help="куда сохранить JSON отчёт")
+    parser.add_argument("--compare", type=Path, nargs=2, metavar=("BASE", "NEW"))
+    parser.add_argument("--threshold", type=float, default=5.0)
+    args = parser.parse_args()
+
+    if args.compare:
+        base, new = (json.loads(p.read_text(encoding="utf-8")) for p in args.compare)
+        sys.exit(0 if compare(base, new, args.threshold) else 1)
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Нагрузочный стенд для режима вебхука.
+
+Поднимает приложение вебхука с настоящим диспетчером бота, фейковой сессией
+Telegram и фейковым kinopoisk.dev, затем параллельно отправляет записанные
+обновления от множества пользователей и считает обновления в секунду и задержку
+обработки:
+
+    python -m benchmarks.webhook_load --users 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from aiohttp import ClientSession, web
+
+from benchmarks.fake_kinopoisk import FakeKinopoisk, make_records
+from benchmarks.fakes import FAKE_TOKEN, FakeSession, for_chat, load_conversations
+
+HOST = "127.0.0.1"
+SECRET = "benchmark-secret"  # noqa: S105
+
+
+def _setup_env(api_port: int, db_path: Path) -> None:
+    """Point the bot to the fake services before film_bot is imported."""
+    os.environ.setdefault("TELEGAM_BOT_TOKEN", FAKE_TOKEN)
+    os.environ.setdefault("KINOPOISK_API_KEY", "fake")
+    os.environ["KINOPOISK_API_URL"] = f"http://{HOST}:{api_port}/v1.4/"
+    os.environ["DB_PATH"] = str(db_path)
+    os.environ["SNAPSHOT_PATH"] = str(db_path.with_name("snapshot.bin"))
+    os.environ["POSTER_DB_PATH"] = str(db_path.with_name("posters.db"))
+    os.environ["API_RATE"] = "100000"
+    os.environ["API_BURST"] = "100000"
+    # Users of the test write faster than the flood control allows
+    os.environ.setdefault("FLOOD_CONTROL", "false")
+
+
+async def _user(
+    client: ClientSession,
+    url: str,
+    updates: list[dict],
+    latencies: list[float],
+) -> int:
+    """Send updates of one chat one by one, return count of failed ones."""
+    errors = 0
+    for update in updates:
+        started_at = time.perf_counter()
+        async with client.post(
+            url,
+            json=update,
+            headers={"X-Telegram-Bot-Api-Secret-Token": SECRET},
+        ) as r:
+            await r.read()
+            errors += r.status != 200  # noqa: PLR2004
+        latencies.append(time.perf_counter() - started_at)
+    return errors
+
+
+async def run(users: int, api_port: int, port: int) -> None:
+    """Run load test."""
+    fake_api = FakeKinopoisk(make_records(2000), latency=0.005)
+    api_runner = web.AppRunner(fake_api.app())
+    await api_runner.setup()
+    await web.TCPSite(api_runner, HOST, api_port).start()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _setup_env(api_port, Path(tmp) / "index.db")
+
+        from aiogram import Bot  # noqa: PLC0415
+
+        from film_bot.config import config  # noqa: PLC0415
+        from film_bot.main import dp  # noqa: PLC0415
+        from film_bot.webhook import create_app  # noqa: PLC0415
+
+        session = FakeSession()
+        bot = Bot(FAKE_TOKEN, session=session)
+        runner = web.AppRunner(
+            create_app(dp, bot, SECRET, handle_in_background=False),
+        )
+        await runner.setup()
+        await web.TCPSite(runner, HOST, port).start()
+        url = f"http://{HOST}:{port}{config.webhook_path}"
+
+        conversations = load_conversations()
+        update_ids = itertools.count(1)
+        latencies: list[float] = []
+        async with ClientSession() as client:
+            # Requests with a wrong secret token must be rejected
+            async with client.post(url, json={}) as r:
+                print(f"Запрос без секретного токена: {r.status}")  # noqa: T201
+
+            started_at = time.perf_counter()
+            errors = await asyncio.gather(
+                *(
+                    _user(
+                        client,
+                        url,
+                        for_chat(conversations[i % len(conversations)], i, update_ids),
+                        latencies,
+                    )
+                    for i in range(1, users + 1)
+                ),
+            )
+            elapsed = time.perf_counter() - started_at
+
+        await runner.cleanup()
+    await api_runner.cleanup()
+
+    percentiles = statistics.quantiles(latencies, n=100)
+    print(  # noqa: T201
+        f"Обновлений: {len(latencies)} за {elapsed:.2f} с "
+        f"({len(latencies) / elapsed:.0f}/с), ошибок: {sum(errors)}\n"
+        f"Задержка обработки, мс: p50 {percentiles[49] * 1000:.1f}, "
+        f"p95 {percentiles[94] * 1000:.1f}, p99 {percentiles[98] * 1000:.1f}\n"
+        f"Отправлено сообщений: {len(session.sent_messages)}, "
+        f"запросов к API: {fake_api.requests}",
+    )
+
+
+def main() -> None:
+    """Parse arguments and run load test."""
+    parser = argparse.ArgumentParser(description="Нагрузочный стенд вебхука")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--api-port", type=int, default=8091)
+    parser.add_argument("--port", type=int, default=8090)
+    args = parser.parse_args()
+    asyncio.run(run(args.users, args.api_port, args.port))
+
+
+if __name__ == "__main__":
+    main()
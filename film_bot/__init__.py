@@ -1,5 +1,24 @@
-"""Just init file."""
+"""Just init file.
 
-from film_bot import __main__, api, bot, config, main, messages, models
+Submodules are imported on the first access (film_bot.api and so on), so
+importing the package does not read settings or load aiogram.
+"""
 
-__all__ = ("__main__", "api", "bot", "config", "main", "messages", "models")
+import importlib
+from typing import Any
+
+__all__ = (
+    "api",
+    "config",
+    "main",
+    "messages",
+    "models",
+)
+
+
+def __getattr__(name: str) -> Any:  # noqa: ANN401
+    """Import submodule on the first access."""
+    if name in __all__:
+        return importlib.import_module(f"{__name__}.{name}")
+    msg = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(msg)
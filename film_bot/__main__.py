@@ -1,8 +1,31 @@
 """Just bot start."""
 
+import argparse
 import asyncio
 
-from film_bot.main import main
+from film_bot.startup import ImportProfiler
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Бот для подбора аниме и дорам")
+    parser.add_argument(
+        "--mode",
+        choices=("polling", "webhook"),
+        help="способ получения обновлений (по умолчанию BOT_MODE из .env)",
+    )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="замерить импорт модулей и время до первого обновления",
+    )
+    args = parser.parse_args()
+
+    profiler = ImportProfiler() if args.profile_startup else None
+    if profiler is not None:
+        profiler.enable()
+
+    # Imported after the profiler is enabled
+    from film_bot.main import create_dispatcher, main
+
+    if profiler is not None:
+        profiler.setup(create_dispatcher())
+    asyncio.run(main(args.mode))
@@ -19,16 +19,46 @@ Telegram Bot API.
 # * Kramarenko Yuri Andreevich
 # on 16/06/2024.
 
-import json
-import textwrap
+import asyncio
+import random
+import time
+from typing import TYPE_CHECKING
 
-from aiohttp import ClientSession
+from aiohttp import ClientError
 from loguru import logger
 
+from film_bot.breaker import CircuitBreaker
+from film_bot.cache import (
+    ENDPOINT_TTL,
+    ResponseCache,
+    key_digest,
+    make_key,
+    ttl_for,
+)
+from film_bot.catalog import Catalog
 from film_bot.config import config
-
-URL = "https://api.kinopoisk.dev/v1.4/"
-HEADERS = {"X-API-KEY": config.kinopoisk_api_key}
+from film_bot.decoding import get_decoder
+from film_bot.formatting import CardFormatter
+from film_bot.limiter import Priority, TokenBucket, backoff, retry_after
+from film_bot.messages import STALE_MSG, SUGGEST_MSG, UNKNOWN_GENRE_MSG
+from film_bot.models import Card, Film
+from film_bot.pages import Page, Query
+from film_bot.snapshot import ResponseSnapshot, StaleResponse
+from film_bot.storage import SharedCache
+from film_bot.titles import TitleIndex
+from film_bot.transport import ConnectionStats, create_session
+from film_bot.vocabulary import normalize, parse_genres, suggest
+from film_bot.warmer import RandomPool
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+# Films of every actor that are intersected for a search by several actors
+PERSON_FILMS_LIMIT = 250
+# Names of the film in the documents of the API and of the catalog
+NAME_FIELDS = ("name", "alternativeName", "enName")
+# Seconds a film found by the API is kept for the inline autocomplete
+TITLE_FILM_TTL = 24 * 60 * 60
 
 
 def get_params(film_type: str) -> dict[str:any]:
@@ -55,149 +85,672 @@ def normalize_user_input(user_input: str) -> list:
 class API:
     """Class for interacting with API."""
 
+    def __init__(self, shared_cache: SharedCache | None = None) -> None:
+        """Init response cache.
+
+        :param shared_cache: cache shared by the workers, checked on a local miss
+        """
+        self.cache = ResponseCache(config.cache_max_bytes)
+        self.shared_cache = shared_cache
+        # Requests that are currently in flight, by cache key
+        self._inflight: dict[tuple, asyncio.Task] = {}
+        # Background requests (prefetching, slow lookups), references keep them alive
+        self._background: set[asyncio.Task] = set()
+        # Number of requests that were served by an already running request
+        self.coalesced = 0
+        # Optional local catalog, the remote API is used on a miss
+        self.catalog = Catalog(config.catalog_path) if config.catalog_path else None
+        # Rate limit shared by all the requests to the API
+        self.limiter = TokenBucket(config.api_rate, config.api_burst)
+        self.connection_stats = ConnectionStats()
+        self.decoder_name, self.decode = get_decoder(config.json_decoder)
+        self.formatter = CardFormatter(config.cards_cache_size, config.parse_mode)
+        # Bound of concurrent requests of one query fan-out (e.g. several actors)
+        self.fanout = asyncio.Semaphore(config.api_fanout)
+        # Person ids by casefolded name, every entry counts as size 1
+        self.person_ids = ResponseCache(config.person_cache_size)
+        # Prefetched random films, refilled by the cache warmer
+        self.random_pool = RandomPool(config.random_pool_size)
+        # Callback (endpoint, status or None, seconds) of every HTTP request
+        self.observe_request: Callable[[str, int | None, float], None] | None = None
+        # Circuit breakers by endpoint, failing fast while the API is down
+        self.breakers = {
+            endpoint: self._new_breaker(endpoint) for endpoint in ENDPOINT_TTL
+        }
+        # Responses saved on disk, served while the API is down
+        self.snapshot = (
+            ResponseSnapshot(
+                config.snapshot_path,
+                config.snapshot_max_bytes,
+                config.snapshot_max_age,
+            )
+            if config.snapshot_path
+            else None
+        )
+        # Number of responses served from the snapshot
+        self.stale_served = 0
+        # Background refreshes of the stale responses, by cache key
+        self._refreshing: dict[tuple, asyncio.Task] = {}
+        # Names of the catalog films and of the films found by the API
+        self.titles = TitleIndex()
+        # Films found by the API by id, sized by the description
+        self.title_films = ResponseCache(config.titles_cache_bytes)
+        # Inline autocomplete films by normalized query, every entry counts as size 1
+        self.title_results = ResponseCache(config.inline_cache_size)
+
     async def init(self) -> None:
         """Just init function."""
-        self.session = ClientSession(base_url=URL)
-
-    async def _request(self, url: str, params: dict[str:any]) -> any:
-        """Do a request."""
-        async with self.session.get(url, headers=HEADERS, params=params) as r:
-            status_code = r.status
-            if status_code == 200:  # noqa: PLR2004
-                text = await r.text()
-                logger.debug(text)
-                return json.loads(text)
-        logger.error("Сервер вернул неожиданный статус-код: {}", status_code)
-        return None
+        self.session = create_session(
+            config.kinopoisk_api_url,
+            {"X-API-KEY": config.kinopoisk_api_key},
+            self.connection_stats,
+        )
+        if self.snapshot is not None:
+            self.snapshot.open()
+        if self.catalog is not None:
+            self._keep(asyncio.ensure_future(self._index_titles()))
+
+    async def close(self) -> None:
+        """Close HTTP session and local catalog."""
+        tasks = [*self._background, *self._inflight.values()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.session.close()
+        if self.catalog is not None:
+            self.catalog.close()
+        if self.snapshot is not None:
+            self.snapshot.close()
+
+    async def _request(
+        self,
+        url: str,
+        params: dict[str:any],
+        *,
+        cache: bool = True,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> any:
+        """Do a request.
+
+        :param cache: use response cache (disable for bulk jobs like catalog sync)
+        :param priority: queue priority, background jobs yield to user's searches
+        """
+        key = make_key(url, params)
+        ttl = ttl_for(url, params)
+        if not ttl or not cache:
+            # Uncacheable responses (e.g. random film) must not be shared
+            data, _ = await self._fetch(url, params, priority)
+            return data
+
+        # Checking the cache
+        data = self.cache.get(key)
+        if data is not None:
+            return data
+
+        # Joining an identical request that is already running
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return await asyncio.shield(task)
+
+        task = asyncio.ensure_future(self._load(url, params, key, ttl, priority))
+        self._inflight[key] = task
+        # The load goes on if the caller is cancelled, so it is tracked until done
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _load(
+        self,
+        url: str,
+        params: dict[str:any],
+        key: tuple,
+        ttl: float,
+        priority: Priority,
+    ) -> any:
+        """Get response from the shared cache or the API and cache it."""
+        shared_key = key_digest(key) if self.shared_cache is not None else None
+        if shared_key is not None:
+            body = await self.shared_cache.get(shared_key)
+            if body is not None:
+                data = self.decode(body)
+                self.cache.set(key, data, len(body), ttl)
+                return data
+
+        data, body = await self._fetch(url, params, priority)
+        if data is None:
+            return self._stale(url, params, key)
+
+        self.cache.set(key, data, len(body), ttl)
+        if shared_key is not None:
+            await self.shared_cache.set(shared_key, body, ttl)
+        if self.snapshot is not None:
+            self.snapshot.set(key_digest(key), body)
+        return data
+
+    def _stale(self, url: str, params: dict[str:any], key: tuple) -> any:
+        """Get the response from the snapshot and refresh it in the background.
+
+        :return: StaleResponse or None if the response was not saved
+        """
+        saved = self.snapshot.get(key_digest(key)) if self.snapshot else None
+        if saved is None:
+            return None
+        body, saved_at = saved
+        self.stale_served += 1
+        if key not in self._refreshing:
+            task = asyncio.ensure_future(self._refresh(url, params))
+            self._refreshing[key] = task
+            task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+            self._keep(task)
+        return StaleResponse(self.decode(body), saved_at)
+
+    async def _refresh(self, url: str, params: dict[str:any]) -> None:
+        """Load the response to the cache when the breaker lets a probe through."""
+        await asyncio.sleep(self._breaker(url).retry_in)
+        await self._request(url, params=params, priority=Priority.BACKGROUND)
+
+    @staticmethod
+    def _new_breaker(endpoint: str) -> CircuitBreaker:
+        return CircuitBreaker(
+            endpoint,
+            config.breaker_threshold,
+            config.breaker_reset_timeout,
+        )
+
+    def _breaker(self, url: str) -> CircuitBreaker:
+        """Circuit breaker of the endpoint."""
+        endpoint = url.strip("/")
+        breaker = self.breakers.get(endpoint)
+        if breaker is None:
+            breaker = self.breakers[endpoint] = self._new_breaker(endpoint)
+        return breaker
+
+    def _mark_stale(self, text: str, *responses: any) -> str:
+        """Add the note about saved data if some of the responses are stale."""
+        saved = [r.saved_at for r in responses if isinstance(r, StaleResponse)]
+        if not saved:
+            return text
+        date = time.strftime("%d.%m.%Y %H:%M", time.localtime(min(saved)))
+        return f"{self.formatter.escape(STALE_MSG.format(date))}\n\n{text}"
+
+    async def _local(self, search: str, *args: any, **kwargs: any) -> dict | None:
+        """Search in the local catalog.
+
+        :param search: name of the Catalog search method
+        :return: data in the API format or None if nothing was found
+        """
+        if self.catalog is None:
+            return None
+
+        docs = await asyncio.to_thread(getattr(self.catalog, search), *args, **kwargs)
+        return {"docs": docs} if docs else None
+
+    async def _page(  # noqa: PLR0913
+        self,
+        search: str,
+        value: any,
+        url: str,
+        params: dict[str:any],
+        page: int,
+        *,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> Page | None:
+        """Get one page of results from the local catalog or the API.
+
+        :param search: name of the Catalog search method
+        :param value: search value for the catalog
+        :param page: number of the page, from 1
+        :param priority: queue priority of the API request
+        """
+        # Searching in the local catalog
+        result = await self._local_page(search, value, params, page)
+        if result is not None:
+            return result
+
+        # Sending a request to the API
+        size = config.page_size
+        start = (page - 1) * size
+        params = {**params, "page": page, "limit": size}
+        data = await self._request(url, params=params, priority=priority)
+        if not data or not data["docs"]:
+            return None
+
+        has_next = page < data.get("pages", page)
+        if has_next and not isinstance(data, StaleResponse):
+            self._prefetch(url, {**params, "page": page + 1})
+        text = self._mark_stale(self._render_page(data["docs"], start), data)
+        return Page(text, page, has_next)
+
+    async def _local_page(
+        self,
+        search: str,
+        value: any,
+        params: dict[str:any],
+        page: int,
+    ) -> Page | None:
+        """Get one page of results from the local catalog."""
+        size = config.page_size
+        start = (page - 1) * size
+
+        # One extra film shows there is a next page
+        data = await self._local(search, value, params, limit=size + 1, offset=start)
+        if not data:
+            return None
+        docs = data["docs"]
+        return Page(self._render_page(docs[:size], start), page, len(docs) > size)
+
+    def _render_page(self, docs: list[dict[str:any]], start: int) -> str:
+        """Render numbered short cards of the page."""
+        films = map(Film.from_doc, docs)
+        return "\n".join(self.formatter.render_list(films, start=start + 1))
+
+    def _prefetch(self, url: str, params: dict[str:any]) -> None:
+        """Load the response to the cache in the background."""
+        self._keep(
+            asyncio.ensure_future(
+                self._request(url, params=params, priority=Priority.BACKGROUND),
+            ),
+        )
+
+    def _keep(self, task: asyncio.Future) -> None:
+        """Keep a reference to the background task until it is done."""
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _person_id(self, name: str) -> int | None:
+        """Func to resolve person name to id, cached."""
+        key = name.strip().casefold()
+        person_id = self.person_ids.get(key)
+        if person_id is None:
+            async with self.fanout:
+                data = await self._request("person/search", params={"query": name})
+            if not data or not data["docs"]:
+                return None
+            person_id = data["docs"][0]["id"]
+            self.person_ids.set(key, person_id, 1, ENDPOINT_TTL["person/search"])
+        return person_id
+
+    async def _person_films(
+        self,
+        name: str,
+        params: dict[str:any],
+    ) -> dict[str:any]:
+        """Func to get films of the person, by name.
+
+        :return: response of the API, its docs are empty if nothing was found
+        """
+        person_id = await self._person_id(name)
+        if person_id is None:
+            return {"docs": []}
+
+        params = {**params, "persons.id": person_id, "page": 1}
+        params["limit"] = PERSON_FILMS_LIMIT
+        async with self.fanout:
+            data = await self._request("movie", params=params)
+        return data or {"docs": []}
+
+    async def _fetch(
+        self,
+        url: str,
+        params: dict[str:any],
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> tuple[any, bytes]:
+        """Do a HTTP request, return decoded data and raw body.
+
+        Rate limit and server errors are retried with jittered exponential
+        backoff, Retry-After pauses all the requests to the API. Network and
+        server errors open the circuit breaker of the endpoint, then requests
+        fail at once without waiting for the timeout.
+        """
+        breaker = self._breaker(url)
+        for attempt in range(config.api_max_retries + 1):
+            if not breaker.allow():
+                return None, b""
+            await self.limiter.acquire(priority)
+            delay = None
+            started_at = time.perf_counter()
+            try:
+                async with self.session.get(url, params=params) as r:
+                    status_code = r.status
+                    if status_code == 200:  # noqa: PLR2004
+                        body = await r.read()
+                        breaker.success()
+                        self._observe(url, status_code, started_at)
+                        self._log_body(url, body)
+                        return self.decode(body), body
+                    delay = retry_after(r.headers.get("Retry-After"))
+            except (ClientError, TimeoutError) as e:
+                status_code = None
+                logger.warning("Ошибка запроса к {}: {!r}", url, e)
+            self._observe(url, status_code, started_at)
+
+            if status_code is None or status_code >= 500:  # noqa: PLR2004
+                breaker.failure()
+            elif status_code != 429:  # noqa: PLR2004
+                # The API is up, the request itself is wrong
+                breaker.success()
+                break
+            if delay is not None:
+                # The next acquire waits for the pause
+                self.limiter.pause(delay)
+            elif attempt < config.api_max_retries and not breaker.retry_in:
+                await asyncio.sleep(backoff(attempt))
 
-    async def from_genre(self, genres: str, film_type: str) -> str:
+        logger.error("Сервер вернул неожиданный статус-код: {}", status_code)
+        return None, b""
+
+    def _observe(self, url: str, status_code: int | None, started_at: float) -> None:
+        """Pass the request to the metrics, if they are enabled."""
+        if self.observe_request is not None:
+            self.observe_request(url, status_code, time.perf_counter() - started_at)
+
+    @staticmethod
+    def _log_body(url: str, body: bytes) -> None:
+        """Log a sample of response bodies, truncated."""
+        if random.random() >= config.log_body_sample_rate:  # noqa: S311
+            return
+        logger.opt(lazy=True).debug(
+            "{} ({} байт): {}",
+            lambda: url,
+            lambda: len(body),
+            lambda: body[: config.log_body_max_length].decode(errors="replace"),
+        )
+
+    async def search(
+        self,
+        query: Query,
+        page: int = 1,
+        timeout: float | None = None,  # noqa: ASYNC109
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> Page | None:
+        """Func to get a page of results of the paged search.
+
+        :param query: search query of the user
+        :param page: number of the page, from 1
+        :param timeout: seconds to wait for slow lookups of the actor search
+        :param priority: queue priority of genre and year requests
+        :return: page or None if nothing was found
+        """
+        if query.search == "actor":
+            return await self.from_actor(query.value, query.film_type, page, timeout)
+
+        searches = {"genre": self.from_genre, "year": self.from_year}
+        return await searches[query.search](
+            query.value,
+            query.film_type,
+            page,
+            priority=priority,
+        )
+
+    async def from_genre(
+        self,
+        genres: str,
+        film_type: str,
+        page: int = 1,
+        *,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> Page | None:
         """Func for search by genre.
 
-        :param message: user's message
+        Genres and countries are corrected by the local vocabulary, input
+        without a close genre is answered with suggestions and no request.
+
+        :param genres: user's message
         :param film_type: anime or dorama
+        :param page: number of the page, from 1
+        :param priority: queue priority of the API request
         :return: result (anime or dorama)
         """
+        query = parse_genres(genres)
+        if query.unknown:
+            return Page(self._suggestions(query.unknown), 1, has_next=False)
+        if not query.genres and not query.countries:
+            return None
+
         # Forming request parameters
         params = get_params(film_type)
-        params["genres.name"] = normalize_user_input(genres)
-
-        # Sending a request to the API
-        data = await self._request("movie", params)
-        if data:
-            docs = data["docs"]
-            # Forming a message
-            return "\n".join(
-                [
-                    f"{i + 1}. {film['name']}, {film['year']}\n\n{
-                        textwrap.fill(film['description'], 100)
-                    }"
-                    for i, film in enumerate(docs)
-                ],
-            )
-
-        return "Не удалось получить данные."
-
-    async def from_title(self, query: str, film_type: str) -> str:
+        if query.genres:
+            params["genres.name"] = list(query.genres)
+        if query.countries:
+            params["countries.name"] = list(query.countries)
+
+        return await self._page(
+            "search_genres",
+            list(query.genres),
+            "movie",
+            params,
+            page,
+            priority=priority,
+        )
+
+    def _suggestions(self, unknown: tuple[str, ...]) -> str:
+        """Text about unknown genres with similar known ones."""
+        lines = []
+        for part in unknown:
+            lines.append(UNKNOWN_GENRE_MSG.format(part))
+            if names := suggest(part):
+                lines.append(SUGGEST_MSG.format(", ".join(names)))
+        return self.formatter.escape("\n".join(lines))
+
+    async def from_title(self, query: str, film_type: str) -> Card | None:
         """Func for searching by name.
 
         :param query: user's query
         :param film_type: anime or dorama
-        :return: result (anime or dorama)
+        :return: card of the result (anime or dorama)
         """
         # Forming request parameters
         params = get_params(film_type)
         params["query"] = query
 
-        # Sending a request to the API
-        data = await self._request("movie/search", params=params)
-        if data:
-            docs = data["docs"][0]
+        # Searching in the local catalog, then sending a request to the API
+        data = await self._local("search_title", query, params, 1)
+        data = data or await self._request("movie/search", params=params)
+        if data and data["docs"]:
             # Forming a message
-            return f"{docs['name']}, {docs['year']}\n\n{
-                textwrap.fill(docs['description'], 100)
-            }"
+            film = self._learn(data["docs"][0])
+            return Card(self._mark_stale(self.formatter.render(film), data), film)
 
-        return "Не удалось получить данные."
+        return None
+
+    async def _index_titles(self) -> None:
+        """Index the names of the catalog films in a thread."""
+        started_at = time.perf_counter()
+        try:
+            titles = await asyncio.to_thread(self._build_titles)
+        except Exception:  # noqa: BLE001
+            logger.exception("Не удалось построить индекс названий")
+            return
+        # Names learned from the API while the index was built
+        for name, film_id in self.titles.entries:
+            titles.add(film_id, [name])
+        self.titles = titles
+        logger.info(
+            "Индекс названий: {} названий за {:.1f} с",
+            len(titles),
+            time.perf_counter() - started_at,
+        )
+
+    def _build_titles(self) -> TitleIndex:
+        titles = TitleIndex()
+        for film_id, _, _, names in self.catalog.films():
+            titles.add(film_id, names)
+        return titles
+
+    def _learn(self, doc: dict[str:any]) -> Film:
+        """Add the film of the API document to the title index."""
+        film = Film.from_doc(doc)
+        if film.id is not None:
+            self.titles.add(film.id, [doc[n] for n in NAME_FIELDS if doc.get(n)])
+            size = len(film.name) + len(film.description)
+            self.title_films.set(film.id, film, size, TITLE_FILM_TTL)
+        return film
+
+    async def autocomplete(self, query: str, limit: int) -> list[Film] | None:
+        """Func to get films with names starting with the query, without the API.
+
+        :param query: text of the inline query
+        :param limit: max count of films
+        :return: films, None if nothing is known and the API should be asked
+        """
+        key = normalize(query)
+        if not key:
+            return []
+        films = self.title_results.get(key)
+        if films is not None:
+            return films
+
+        ids = self.titles.search(key, limit)
+        films = {i: film for i in ids if (film := self.title_films.get(i))}
+        missing = [i for i in ids if i not in films]
+        if missing and self.catalog is not None:
+            docs = await asyncio.to_thread(self.catalog.get_many, missing)
+            films.update((doc["id"], Film.from_doc(doc)) for doc in docs)
+        if not films:
+            return None
+        found = [films[i] for i in ids if i in films]
+        self.title_results.set(key, found, 1, config.inline_cache_time)
+        return found
+
+    async def find_titles(self, query: str, limit: int) -> list[Film]:
+        """Func to search films by name in the API for the inline autocomplete.
+
+        Found films are added to the title index, the next queries with the same
+        beginning are answered without the API.
+        """
+        # Forming request parameters, anime and series of all countries
+        params = get_params("")
+        params.update(type=["anime", "tv-series"], query=query, page=1, limit=limit)
 
-    async def from_actor(self, actor: str, film_type: str) -> str:
+        data = await self._request("movie/search", params=params)
+        films = [self._learn(doc) for doc in data["docs"]] if data else []
+        if films:
+            self.title_results.set(normalize(query), films, 1, config.inline_cache_time)
+        return films
+
+    async def from_actor(
+        self,
+        actor: str,
+        film_type: str,
+        page: int = 1,
+        timeout: float | None = None,  # noqa: ASYNC109
+    ) -> Page | None:
         """Func for searching by actor.
 
-        :param message: user's message
+        Every actor is looked up concurrently, films having all of them are
+        found by intersecting their film lists.
+
+        :param actor: user's message
         :param film_type: anime or dorama
+        :param page: number of the page, from 1
+        :param timeout: seconds to wait for the lookups, then the page is built
+            from the finished ones and marked incomplete (None - wait for all)
         :return: result (anime or dorama)
         """
         # Forming request parameters
-        params = {"query": normalize_user_input(actor)}
-
-        # Sending a request to the API
-        data = await self._request("person/search", params=params)
-        if data:
-            actor_id = data["docs"][0]["id"]
-
-            # Forming request parameters
-            params = get_params(film_type)
-            params["persons.id"] = actor_id
-            params["page"] = 1
-            params["limit"] = 10
+        names = [name.strip() for name in normalize_user_input(actor) if name.strip()]
+        if not names:
+            # Only commas and spaces, nobody to look up
+            return None
+        params = get_params(film_type)
 
-            # Sending a request to the API
-            data = await self._request("movie", params=params)
-            if data:
+        # Searching in the local catalog
+        result = await self._local_page("search_persons", names, params, page)
+        if result is not None:
+            return result
+
+        # Looking up all the actors at once
+        lookups = [asyncio.ensure_future(self._person_films(n, params)) for n in names]
+        done, pending = await asyncio.wait(lookups, timeout=timeout)
+        if not done:
+            # Nothing to show yet, waiting for the fastest lookup
+            done, pending = await asyncio.wait(
+                lookups,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+        for task in pending:
+            # Finished in the background, the full result is taken from the cache
+            self._keep(task)
+
+        # Intersecting film lists in the order of the first one
+        results = [task.result() for task in lookups if task in done]
+        docs = None
+        for data in results:
+            if docs is None:
                 docs = data["docs"]
-                # Forming a message
-                return "\n".join(
-                    [
-                        f"{i + 1}. {film[i]['name']}, {film[i]['year']}\n\n{
-                            textwrap.fill(film[i]['description'], 100)
-                        }"
-                        for i, film in enumerate(docs)
-                    ],
-                )
-
-        return "Не удалось получить данные."
-
-    async def from_year(self, year: str, film_type: str) -> str:
+            else:
+                ids = {doc["id"] for doc in data["docs"]}
+                docs = [doc for doc in docs if doc["id"] in ids]
+        if not docs:
+            return None
+
+        size = config.page_size
+        start = (page - 1) * size
+        text = self._render_page(docs[start : start + size], start)
+        text = self._mark_stale(text, *results)
+        if pending:
+            waiting = [n for n, t in zip(names, lookups, strict=True) if t in pending]
+            # Names are the user's input, escaped for the parse mode
+            note = self.formatter.escape(f"⏳ Ещё ищем: {', '.join(waiting)}")
+            text = f"{note}\n\n{text}"
+        return Page(text, page, len(docs) > start + size, complete=not pending)
+
+    async def from_year(
+        self,
+        year: str,
+        film_type: str,
+        page: int = 1,
+        *,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> Page | None:
         """Func for searching by years.
 
-        :param message: user's message
-        :param type: anime or dorama
+        :param year: user's message
+        :param film_type: anime or dorama
+        :param page: number of the page, from 1
+        :param priority: queue priority of the API request
         :return: result (anime or dorama)
         """
         # Forming request parameters
         params = get_params(film_type)
         params["year"] = year
 
-        # Sending a request to the API
-        data = await self._request("movie", params=params)
-        if data:
-            docs = data["docs"]
-            # Forming a message
-            return "\n".join(
-                [
-                    f"{i + 1}. {film['name']}, {film['year']}\n\n{
-                        textwrap.fill(film['description'], 100)
-                    }"
-                    for i, film in enumerate(docs)
-                ],
-            )
-
-        return "Не удалось получить данные."
+        return await self._page(
+            "search_year",
+            year,
+            "movie",
+            params,
+            page,
+            priority=priority,
+        )
+
+    async def random_doc(
+        self,
+        film_type: str,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> dict[str:any] | None:
+        """Func to get a random film document from the API.
 
-    async def random(self, film_type: str) -> str:
-        """Func for searching random dorama.
-
-        :param type: anime or dorama
-        :return: result (anime or dorama)
+        :param film_type: anime or dorama
+        :param priority: queue priority of the API request
         """
         # Forming request parameters
         params = get_params(film_type)
 
         # Sending a request to the API
-        data = await self._request("movie/random", params=params)
+        return await self._request("movie/random", params=params, priority=priority)
+
+    async def random(self, film_type: str) -> Card | None:
+        """Func for searching random dorama.
+
+        :param type: anime or dorama
+        :return: card of the result (anime or dorama)
+        """
+        # Taking a prefetched film, the API is requested only if the pool is empty
+        data = self.random_pool.take(film_type) or await self.random_doc(film_type)
         if data:
             # Forming a message
-            return f"{data['name']}, {data['year']}\n\n{
-                textwrap.fill(data['description'], 100)
-            }"
+            film = Film.from_doc(data)
+            return Card(self.formatter.render(film), film)
 
-        return "Не удалось получить данные."
+        return None
@@ -0,0 +1,106 @@
+"""Предохранитель запросов к API.
+
+После нескольких ошибок подряд эндпоинт считается недоступным, и запросы к нему
+сразу завершаются неудачей, не дожидаясь таймаута. Раз в RESET_TIMEOUT секунд
+пропускается один пробный запрос: удачный возвращает эндпоинт в работу,
+неудачный снова отключает его.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from enum import StrEnum
+from typing import TYPE_CHECKING
+
+from loguru import logger
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+
+class BreakerState(StrEnum):
+    """State of the circuit breaker."""
+
+    # Requests go through
+    CLOSED = "closed"
+    # Requests fail fast
+    OPEN = "open"
+    # One probe request goes through, the others fail fast
+    HALF_OPEN = "half_open"
+
+
+@dataclass
+class BreakerStats:
+    """Breaker metrics."""
+
+    opened: int = 0
+    rejected: int = 0
+
+
+class CircuitBreaker:
+    """Circuit breaker of one endpoint."""
+
+    def __init__(
+        self,
+        name: str,
+        threshold: int,
+        reset_timeout: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Init breaker.
+
+        :param name: endpoint, for logs
+        :param threshold: consecutive failures that open the breaker
+        :param reset_timeout: seconds until a probe request
+        :param clock: monotonic time source
+        """
+        self.name = name
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.state = BreakerState.CLOSED
+        self.failures = 0
+        self.stats = BreakerStats()
+        self._clock = clock
+        self._retry_at = 0.0
+
+    @property
+    def retry_in(self) -> float:
+        """Seconds until the next probe, 0 if requests go through."""
+        if self.state is BreakerState.CLOSED:
+            return 0.0
+        return max(0.0, self._retry_at - self._clock())
+
+    def allow(self) -> bool:
+        """Check if a request may be sent now."""
+        if self.state is BreakerState.CLOSED:
+            return True
+        now = self._clock()
+        if now < self._retry_at:
+            self.stats.rejected += 1
+            return False
+        # One probe per timeout, a hung probe does not block the endpoint forever
+        self.state = BreakerState.HALF_OPEN
+        self._retry_at = now + self.reset_timeout
+        return True
+
+    def success(self) -> None:
+        """Record a successful request."""
+        if self.state is not BreakerState.CLOSED:
+            logger.info("API {} снова доступно", self.name)
+        self.state = BreakerState.CLOSED
+        self.failures = 0
+
+    def failure(self) -> None:
+        """Record a failed request (network error or server error)."""
+        self.failures += 1
+        if self.state is BreakerState.HALF_OPEN or self.failures >= self.threshold:
+            if self.state is not BreakerState.OPEN:
+                self.stats.opened += 1
+                logger.warning(
+                    "API {} недоступно, запросы приостановлены на {} с",
+                    self.name,
+                    self.reset_timeout,
+                )
+            self.state = BreakerState.OPEN
+            self._retry_at = self._clock() + self.reset_timeout
@@ -0,0 +1,145 @@
+"""Кэш ответов API кинопоиска.
+
+LRU-кэш с ограничением по объёму и временем жизни записей, зависящим от эндпоинта.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Hashable
+
+# Время жизни записей (в секундах) для каждого эндпоинта, 0 - не кэшировать
+ENDPOINT_TTL: dict[str, float] = {
+    "movie": 6 * 60 * 60,
+    "movie/search": 60 * 60,
+    "person/search": 24 * 60 * 60,
+    "movie/random": 0,
+}
+# Подборки по году почти не меняются, поэтому храним их дольше
+YEAR_TTL = 24 * 60 * 60
+DEFAULT_TTL = 10 * 60
+
+
+def make_key(endpoint: str, params: dict[str, Any]) -> tuple:
+    """Func for building a cache key from endpoint and request params.
+
+    Списки значений сортируются, так как порядок жанров и стран не влияет на ответ.
+    """
+    items = []
+    for name, value in params.items():
+        if isinstance(value, list | tuple):
+            normalized = tuple(sorted(str(v).strip() for v in value))
+        else:
+            normalized = str(value).strip()
+        items.append((name, normalized))
+
+    return (endpoint.strip("/"), tuple(sorted(items)))
+
+
+def key_digest(key: tuple) -> str:
+    """Func to get a short string form of the key for external caches."""
+    return hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+
+
+def ttl_for(endpoint: str, params: dict[str, Any]) -> float:
+    """Func for get cache TTL by endpoint and params."""
+    endpoint = endpoint.strip("/")
+    if endpoint == "movie" and "year" in params:
+        return YEAR_TTL
+    return ENDPOINT_TTL.get(endpoint, DEFAULT_TTL)
+
+
+@dataclass
+class CacheStats:
+    """Счётчики работы кэша."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        """Доля попаданий в кэш."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class ResponseCache:
+    """LRU-кэш ответов с TTL и ограничением по памяти."""
+
+    def __init__(
+        self,
+        max_bytes: int,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Init cache.
+
+        :param max_bytes: memory budget (sum of response body sizes)
+        :param clock: monotonic time source
+        """
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.stats = CacheStats()
+        self._clock = clock
+        self._items: OrderedDict[Hashable, tuple[float, int, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        """Count of cached entries."""
+        return len(self._items)
+
+    def get(self, key: Hashable) -> Any | None:  # noqa: ANN401
+        """Get value by key or None on miss."""
+        item = self._items.get(key)
+        if item is None:
+            self.stats.misses += 1
+            return None
+
+        expires_at, _, value = item
+        if expires_at <= self._clock():
+            self._remove(key)
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            return None
+
+        self._items.move_to_end(key)
+        self.stats.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, size: int, ttl: float) -> None:  # noqa: ANN401
+        """Put value to the cache.
+
+        :param key: key from make_key
+        :param value: decoded response
+        :param size: approximate size of the value in bytes
+        :param ttl: time to live in seconds
+        """
+        if ttl <= 0 or size > self.max_bytes:
+            return
+
+        if key in self._items:
+            self._remove(key)
+
+        self._items[key] = (self._clock() + ttl, size, value)
+        self.size += size
+
+        # Evicting least recently used entries
+        while self.size > self.max_bytes:
+            old_key = next(iter(self._items))
+            self._remove(old_key)
+            self.stats.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        self._items.clear()
+        self.size = 0
+
+    def _remove(self, key: Hashable) -> None:
+        _, size, _ = self._items.pop(key)
+        self.size -= size
@@ -0,0 +1,365 @@
+"""Локальный каталог аниме и дорам.
+
+Записи кинопоиска хранятся в SQLite, поиск по названию выполняется через FTS5.
+Каталог заполняется из JSON/JSONL выгрузки:
+
+    python -m film_bot.catalog dump.jsonl --db catalog.db
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sqlite3
+import threading
+from itertools import islice
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from loguru import logger
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+INGEST_CHUNK_SIZE = 1000
+WORD_RE = re.compile(r"\w+")
+# Таблицы и столбцы жанров, стран и актёров фильмов
+LINKS = {
+    "genre": ("film_genres", "genre"),
+    "country": ("film_countries", "country"),
+    "person": ("film_persons", "person_id"),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS films (
+    id INTEGER PRIMARY KEY,
+    type TEXT,
+    name TEXT,
+    year INTEGER,
+    updated_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS films_type_year ON films (type, year);
+CREATE TABLE IF NOT EXISTS film_genres (film_id INTEGER, genre TEXT);
+CREATE INDEX IF NOT EXISTS film_genres_genre ON film_genres (genre, film_id);
+CREATE INDEX IF NOT EXISTS film_genres_film ON film_genres (film_id);
+CREATE TABLE IF NOT EXISTS film_countries (film_id INTEGER, country TEXT);
+CREATE INDEX IF NOT EXISTS film_countries_country ON film_countries (country, film_id);
+CREATE INDEX IF NOT EXISTS film_countries_film ON film_countries (film_id);
+CREATE TABLE IF NOT EXISTS film_persons (film_id INTEGER, person_id INTEGER, name TEXT);
+CREATE INDEX IF NOT EXISTS film_persons_name ON film_persons (name, film_id);
+CREATE INDEX IF NOT EXISTS film_persons_film ON film_persons (film_id);
+CREATE TABLE IF NOT EXISTS sync_state (name TEXT PRIMARY KEY, value TEXT);
+CREATE VIRTUAL TABLE IF NOT EXISTS films_fts USING fts5 (
+    name, alternative_names, description,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+
+def _names(doc: dict[str, Any]) -> list[str]:
+    """Func to collect all alternative names of the film."""
+    names = [doc.get("alternativeName"), doc.get("enName")]
+    names.extend(item.get("name") for item in doc.get("names") or [])
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def _match_query(query: str) -> str | None:
+    """Func to build FTS5 prefix query from user's input."""
+    words = WORD_RE.findall(query)
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def _year_range(year: str) -> tuple[int, int]:
+    """Func to parse year or range of years (год-год)."""
+    start, _, end = year.replace(" ", "").partition("-")
+    return int(start), int(end or start)
+
+
+def iter_dump(path: Path) -> Iterator[dict[str, Any]]:
+    """Func to read records from JSON or JSONL dump."""
+    with path.open(encoding="utf-8") as file:
+        if path.suffix == ".jsonl":
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+            return
+
+        data = json.load(file)
+        yield from data["docs"] if isinstance(data, dict) else data
+
+
+class Catalog:
+    """Local catalog with full text search.
+
+    The methods are called from the threads of asyncio.to_thread. Writes and
+    reads go through their own connections, each used by one thread at a time,
+    so a search does not wait for an ingest transaction.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Open (and create if needed) catalog database."""
+        self._writer = self._connect(path)
+        self._writer.executescript(SCHEMA)
+        self._write_lock = threading.Lock()
+        if path == ":memory:":
+            # Another connection would open another database
+            self._reader, self._read_lock = self._writer, self._write_lock
+        else:
+            self._reader, self._read_lock = self._connect(path), threading.Lock()
+
+    @staticmethod
+    def _connect(path: str) -> sqlite3.Connection:
+        connection = sqlite3.connect(path, check_same_thread=False)
+        connection.row_factory = sqlite3.Row
+        # Readers see the last commit while a write is in progress
+        connection.execute("PRAGMA journal_mode = WAL")
+        return connection
+
+    def close(self) -> None:
+        """Close catalog database."""
+        with self._write_lock:
+            self._writer.close()
+        with self._read_lock:
+            self._reader.close()
+
+    def _fetch(self, sql: str, args: Iterable[Any] = ()) -> list[sqlite3.Row]:
+        with self._read_lock:
+            return self._reader.execute(sql, args).fetchall()
+
+    def __len__(self) -> int:
+        """Count of films in the catalog."""
+        return self._fetch("SELECT COUNT(*) FROM films")[0][0]
+
+    def get_state(self, name: str) -> str | None:
+        """Get saved value of the sync state (e.g. cursor)."""
+        rows = self._fetch("SELECT value FROM sync_state WHERE name = ?", (name,))
+        return rows[0]["value"] if rows else None
+
+    def set_state(self, name: str, value: str) -> None:
+        """Save value of the sync state."""
+        with self._write_lock, self._writer:
+            self._writer.execute(
+                "INSERT OR REPLACE INTO sync_state (name, value) VALUES (?, ?)",
+                (name, value),
+            )
+
+    def ingest(self, docs: Iterable[dict[str, Any]]) -> int:
+        """Insert or update records, return count of processed records."""
+        count = 0
+        docs = iter(docs)
+        while chunk := list(islice(docs, INGEST_CHUNK_SIZE)):
+            with self._write_lock, self._writer:
+                cursor = self._writer.cursor()
+                for doc in chunk:
+                    self._upsert(cursor, doc)
+            count += len(chunk)
+        return count
+
+    @staticmethod
+    def _upsert(cursor: sqlite3.Cursor, doc: dict[str, Any]) -> None:
+        film_id = doc["id"]
+        cursor.execute(
+            "INSERT OR REPLACE INTO films (id, type, name, year, updated_at, data) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                film_id,
+                doc.get("type"),
+                doc.get("name"),
+                doc.get("year"),
+                doc.get("updatedAt"),
+                json.dumps(doc, ensure_ascii=False),
+            ),
+        )
+
+        # Rebuilding search data of the film
+        for table in ("film_genres", "film_countries", "film_persons"):
+            cursor.execute(f"DELETE FROM {table} WHERE film_id = ?", (film_id,))  # noqa: S608
+        cursor.execute("DELETE FROM films_fts WHERE rowid = ?", (film_id,))
+
+        cursor.executemany(
+            "INSERT INTO film_genres VALUES (?, ?)",
+            [(film_id, g["name"].casefold()) for g in doc.get("genres") or []],
+        )
+        cursor.executemany(
+            "INSERT INTO film_countries VALUES (?, ?)",
+            [(film_id, c["name"]) for c in doc.get("countries") or []],
+        )
+        cursor.executemany(
+            "INSERT INTO film_persons VALUES (?, ?, ?)",
+            [
+                (film_id, person.get("id"), name.casefold())
+                for person in doc.get("persons") or []
+                for name in {person.get("name"), person.get("enName")}
+                if name
+            ],
+        )
+        cursor.execute(
+            "INSERT INTO films_fts (rowid, name, alternative_names, description) "
+            "VALUES (?, ?, ?, ?)",
+            (
+                film_id,
+                doc.get("name") or "",
+                "\n".join(_names(doc)),
+                doc.get("description") or "",
+            ),
+        )
+
+    def _select(  # noqa: PLR0913
+        self,
+        params: dict[str, Any],
+        conditions: list[str],
+        args: list[Any],
+        *,
+        order: str = "films.year DESC",
+        limit: int = 10,
+        offset: int = 0,
+        join: str = "",
+    ) -> list[dict[str, Any]]:
+        """Func to select films matching film type params from get_params."""
+        conditions = list(conditions)
+        args = list(args)
+
+        if types := params.get("type"):
+            conditions.append(f"films.type IN ({','.join('?' * len(types))})")
+            args.extend(types)
+
+        if countries := params.get("countries.name"):
+            conditions.append(
+                "films.id IN (SELECT film_id FROM film_countries "  # noqa: S608
+                f"WHERE country IN ({','.join('?' * len(countries))}))",
+            )
+            args.extend(countries)
+
+        for field in params.get("notNullFields", []):
+            if field in {"name", "description"}:
+                conditions.append(f"json_extract(films.data, '$.{field}') IS NOT NULL")
+
+        where = " AND ".join(conditions) or "1"
+        rows = self._fetch(
+            f"SELECT films.data FROM films {join} WHERE {where} "  # noqa: S608
+            f"ORDER BY {order} LIMIT ? OFFSET ?",
+            [*args, limit, offset],
+        )
+        return [json.loads(row["data"]) for row in rows]
+
+    @staticmethod
+    def _all_of(table: str, column: str, values: list[str]) -> tuple[str, list]:
+        """Func to build condition "film has all listed values"."""
+        placeholders = ",".join("?" * len(values))
+        condition = (
+            f"films.id IN (SELECT film_id FROM {table} "  # noqa: S608
+            f"WHERE {column} IN ({placeholders}) "
+            f"GROUP BY film_id HAVING COUNT(DISTINCT {column}) = ?)"
+        )
+        return condition, [*values, len(values)]
+
+    def films(self) -> list[tuple[int, str | None, int | None, list[str]]]:
+        """Func to get id, type, year and all names of every film."""
+        rows = self._fetch(
+            "SELECT id, type, year, name, json_extract(data, '$.alternativeName'), "
+            "json_extract(data, '$.enName') FROM films ORDER BY id",
+        )
+        return [(row[0], row[1], row[2], [n for n in row[3:] if n]) for row in rows]
+
+    def links(self, kind: str) -> Iterator[tuple[int, Any]]:
+        """Func to get (film id, value) pairs of genres, countries or persons."""
+        table, column = LINKS[kind]
+        yield from self._fetch(
+            f"SELECT DISTINCT film_id, {column} FROM {table} "  # noqa: S608
+            f"WHERE {column} IS NOT NULL",
+        )
+
+    def get_many(self, ids: list[int]) -> list[dict[str, Any]]:
+        """Func to get films by ids in the same order, missing ones are skipped."""
+        rows = self._fetch(
+            f"SELECT id, data FROM films WHERE id IN ({','.join('?' * len(ids))})",  # noqa: S608
+            ids,
+        )
+        docs = {row["id"]: row["data"] for row in rows}
+        return [json.loads(docs[i]) for i in ids if i in docs]
+
+    def search_title(
+        self,
+        query: str,
+        params: dict[str, Any],
+        limit: int = 10,
+        offset: int = 0,
+    ) -> list[dict[str, Any]]:
+        """Func for searching films by name or alternative names."""
+        match = _match_query(query)
+        if match is None:
+            return []
+        return self._select(
+            params,
+            ["films_fts MATCH ?"],
+            [match],
+            order="bm25(films_fts, 10.0, 5.0, 1.0)",
+            limit=limit,
+            offset=offset,
+            join="JOIN films_fts ON films_fts.rowid = films.id",
+        )
+
+    def search_genres(
+        self,
+        genres: list[str],
+        params: dict[str, Any],
+        limit: int = 10,
+        offset: int = 0,
+    ) -> list[dict[str, Any]]:
+        """Func for searching films having all listed genres."""
+        genres = [genre.strip().casefold() for genre in genres if genre.strip()]
+        condition, args = self._all_of("film_genres", "genre", genres)
+        return self._select(params, [condition], args, limit=limit, offset=offset)
+
+    def search_persons(
+        self,
+        names: list[str],
+        params: dict[str, Any],
+        limit: int = 10,
+        offset: int = 0,
+    ) -> list[dict[str, Any]]:
+        """Func for searching films with all listed persons."""
+        names = [name.strip().casefold() for name in names if name.strip()]
+        condition, args = self._all_of("film_persons", "name", names)
+        return self._select(params, [condition], args, limit=limit, offset=offset)
+
+    def search_year(
+        self,
+        year: str,
+        params: dict[str, Any],
+        limit: int = 10,
+        offset: int = 0,
+    ) -> list[dict[str, Any]]:
+        """Func for searching films by year or range of years."""
+        try:
+            start, end = _year_range(year)
+        except ValueError:
+            return []
+        return self._select(
+            params,
+            ["films.year BETWEEN ? AND ?"],
+            [start, end],
+            limit=limit,
+            offset=offset,
+        )
+
+
+def main() -> None:
+    """Ingest command."""
+    parser = argparse.ArgumentParser(description="Загрузка выгрузки в каталог")
+    parser.add_argument("dump", type=Path, help="JSON или JSONL файл с записями")
+    parser.add_argument("--db", default="catalog.db", help="путь к базе каталога")
+    args = parser.parse_args()
+
+    catalog = Catalog(args.db)
+    count = catalog.ingest(iter_dump(args.dump))
+    logger.info("Загружено записей: {}, всего в каталоге: {}", count, len(catalog))
+    catalog.close()
+
+
+if __name__ == "__main__":
+    main()
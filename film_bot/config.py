@@ -2,6 +2,10 @@
 
 from __future__ import annotations
 
+import functools
+from typing import Any, Literal, cast
+
+from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings
 
 
@@ -10,6 +14,160 @@ class Config(BaseSettings):
 
     telegam_bot_token: str
     kinopoisk_api_key: str
+    kinopoisk_api_url: str = "https://api.kinopoisk.dev/v1.4/"
+
+    # Способ получения обновлений: polling или webhook
+    bot_mode: Literal["polling", "webhook"] = "polling"
+    # Публичный адрес бота (https://example.com), на который Telegram шлёт вебхук
+    webhook_url: str | None = None
+    webhook_path: str = "/webhook"
+    webhook_host: str = "0.0.0.0"  # noqa: S104
+    webhook_port: int = 8080
+    # Секретный токен вебхука, если не задан - генерируется при запуске; без
+    # WEBHOOK_URL вебхук устанавливается вручную, и токен обязателен
+    webhook_secret: str | None = None
+    # Сколько ждать обработки принятых обновлений при остановке (в секундах)
+    webhook_shutdown_timeout: float = 10.0
+
+    # Ограничение частоты запросов к API: запросов в секунду и размер всплеска
+    api_rate: float = 5.0
+    api_burst: int = 10
+    # Количество повторов запроса при 429/5xx
+    api_max_retries: int = 3
+    # Одновременные запросы одного поиска (например, по нескольким актёрам)
+    api_fanout: int = 4
+    # Сколько секунд ждать поиска актёров до показа частичного результата
+    fanout_timeout: float = 3.0
+    # Количество закэшированных id актёров по имени
+    person_cache_size: int = 10_000
+    # Предохранитель: ошибок подряд, после которых эндпоинт API отключается, и
+    # через сколько секунд пробовать снова
+    breaker_threshold: int = 5
+    breaker_reset_timeout: float = 30.0
+    # Снимок удачных ответов API, отдаётся, пока API недоступно; пусто - не сохранять
+    snapshot_path: str | None = "snapshot.bin"
+    # Объём файла снимка в байтах и самые старые ответы, которые можно показать
+    # (в секундах)
+    snapshot_max_bytes: int = 16 * 1024 * 1024
+    snapshot_max_age: float = 7 * 24 * 60 * 60
+
+    # Фоновый прогрев кэша: запас случайных фильмов и популярные поиски
+    warmer_enabled: bool = True
+    # Запас случайных фильмов каждого вида
+    random_pool_size: int = 20
+    # Запросов прогрева в секунду
+    warmer_rate: float = 1.0
+    # Интервал прогрева популярных поисков в секундах
+    warmer_interval: float = 600.0
+    # Прогрев популярных поисков (без него пополняется только запас случайных)
+    warmer_searches: bool = True
+    # Количество прогреваемых популярных поисков
+    warmer_top_k: int = 20
+    # Файл статистики поисков, пусто - не сохранять
+    warmer_state_path: str | None = "warmer.json"
+
+    # Защита от флуда: исходящих сообщений в секунду на весь бот и в один чат
+    flood_control: bool = True
+    send_rate: float = 30.0
+    chat_send_rate: float = 1.0
+    # Сообщений в один чат без ожидания и повторов после 429 (RetryAfter)
+    chat_send_burst: int = 3
+    send_retries: int = 3
+    # Входящих обновлений одного чата в секунду и без ограничения
+    chat_update_rate: float = 1.0
+    chat_update_burst: int = 5
+
+    # Метрики Prometheus на METRICS_HOST:METRICS_PORT/metrics
+    metrics_enabled: bool = True
+    metrics_host: str = "127.0.0.1"
+    metrics_port: int = 9100
+
+    # Redis (или совместимый сервер) для состояний FSM и общего кэша ответов API,
+    # нужен при запуске нескольких воркеров (python -m film_bot.workers)
+    redis_url: str | None = None
+
+    # Декодер JSON: auto, orjson, msgspec или json
+    json_decoder: str = "auto"
+    # Доля ответов, тело которых пишется в debug лог, и его максимальная длина
+    log_body_sample_rate: float = 0.01
+    log_body_max_length: int = 500
+
+    # Пул HTTP соединений к API и таймауты (в секундах)
+    http_pool_size: int = 100
+    http_pool_per_host: int = 20
+    http_dns_cache_ttl: int = 300
+    http_keepalive_timeout: float = 60.0
+    http_connect_timeout: float = 5.0
+    http_read_timeout: float = 10.0
+
+    # База данных списка избранного
+    db_path: str = "index.db"
+    # Количество списков избранного активных пользователей в памяти
+    favorites_cache_size: int = 10_000
+
+    # Объём кэша ответов API в байтах
+    cache_max_bytes: int = 32 * 1024 * 1024
+    # Путь к локальному каталогу (python -m film_bot.catalog), пусто - не использовать
+    catalog_path: str | None = None
+    # Рекомендации "Похожее на моё избранное" по локальному каталогу (нужны numpy и
+    # scipy: pip install film-bot[recommend])
+    recommend_enabled: bool = True
+    # Количество рекомендуемых фильмов
+    recommend_count: int = 10
+    # Количество пользователей с рекомендациями в кэше и время жизни (в секундах)
+    recommend_cache_size: int = 10_000
+    recommend_cache_ttl: float = 60 * 60
+    # Количество фильмов на одной странице результатов поиска (не больше 7, чтобы
+    # страница помещалась в одно сообщение)
+    page_size: int = Field(default=5, ge=1, le=7)
+    # Разметка карточек фильмов: HTML, MarkdownV2, пусто - без разметки
+    parse_mode: Literal["HTML", "MarkdownV2"] | None = None
+    # Количество карточек фильмов в кэше форматирования
+    cards_cache_size: int = 10_000
+    # Постеры фильмов: карточка отправляется фотографией, file_id загруженных
+    # постеров хранится в POSTER_DB_PATH
+    posters_enabled: bool = True
+    poster_db_path: str = "posters.db"
+    # Одновременных загрузок постеров, их максимальный размер (в байтах) и таймаут
+    # загрузки (в секундах)
+    poster_concurrency: int = 4
+    poster_max_bytes: int = 5 * 1024 * 1024
+    poster_timeout: float = 10.0
+    # Количество file_id постеров в памяти, остальные читаются из POSTER_DB_PATH
+    poster_cache_size: int = 10_000
+    # Автодополнение названий в inline-режиме (@бот название, включается у
+    # @BotFather командой /setinline): результатов в ответе, время кэширования
+    # ответа в Telegram и в боте (в секундах) и пауза ввода перед запросом к API
+    inline_limit: int = 10
+    inline_cache_time: int = 300
+    inline_debounce: float = 0.3
+    # Количество запросов с ответами в кэше и объём кэша найденных фильмов (в байтах)
+    inline_cache_size: int = 10_000
+    titles_cache_bytes: int = 8 * 1024 * 1024
+
+    @field_validator("parse_mode", mode="before")
+    @classmethod
+    def _empty_parse_mode(cls, value: Any) -> Any:  # noqa: ANN401
+        """Empty PARSE_MODE in .env means cards without markup."""
+        return value or None
+
+
+@functools.cache
+def get_config() -> Config:
+    """Func to read config from .env once."""
+    return Config(_env_file=".env")
+
+
+class _LazyConfig:
+    """Config that reads .env on the first access to a setting, not at import."""
+
+    __slots__ = ()
+
+    def __getattr__(self, name: str) -> Any:  # noqa: ANN401
+        return getattr(get_config(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:  # noqa: ANN401
+        setattr(get_config(), name, value)
 
 
-config: Config = Config(_env_file=".env")
+config: Config = cast("Config", _LazyConfig())
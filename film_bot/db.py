@@ -1,38 +1,244 @@
-"""Database module."""
+"""Database module.
 
+Список избранного хранится в SQLite в режиме WAL. Все запросы выполняются в
+отдельном потоке, поэтому не блокируют event loop. Записи, накопившиеся в очереди,
+пока выполнялась предыдущая транзакция, фиксируются одной транзакцией.
+
+Избранное загружается по запросу для конкретного пользователя и хранится в
+ограниченном LRU-кэше активных пользователей, изменения пишутся сразу и в базу,
+и в кэш.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import queue
 import sqlite3
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any
+
+from loguru import logger
 
 from film_bot.models import Anime, Dorama
 
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+# Виды избранного и соответствующие им модели
+KINDS = {"anime": Anime, "dorama": Dorama}
+
+SCHEMA = """
+PRAGMA journal_mode = WAL;
+PRAGMA synchronous = NORMAL;
+CREATE TABLE IF NOT EXISTS favorites (
+    chat_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    comment TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (chat_id, kind, name)
+) WITHOUT ROWID;
+-- Выборка по (chat_id, kind) идёт по префиксу первичного ключа, отдельный индекс
+-- из прежних версий только замедлял запись
+DROP INDEX IF EXISTS favorites_chat_kind;
+"""
+
+# Запросы - константы, поэтому sqlite3 подготавливает каждый один раз и берёт
+# из кэша подготовленных выражений соединения
+ADD_SQL = (
+    "INSERT INTO favorites (chat_id, kind, name, comment) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT (chat_id, kind, name) DO UPDATE SET comment = excluded.comment"
+)
+DELETE_SQL = "DELETE FROM favorites WHERE chat_id = ? AND kind = ? AND name = ?"
+LIST_SQL = "SELECT name, comment FROM favorites WHERE chat_id = ? AND kind = ?"
+
+# Таблицы старой схемы, данные из них переносятся в favorites
+LEGACY_TABLES = {"doramas": "dorama", "anime": "anime"}
+
+
+def _migrate(connection: sqlite3.Connection) -> None:
+    """Move favorites from the old doramas/anime tables."""
+    rows = connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    tables = {row[0] for row in rows}
+    for table, kind in LEGACY_TABLES.items():
+        if table not in tables:
+            continue
+        with connection:
+            connection.execute(
+                "INSERT OR IGNORE INTO favorites (chat_id, kind, name, comment) "  # noqa: S608
+                f"SELECT chat_id, ?, name, COALESCE(comment, '') FROM {table}",
+                (kind,),
+            )
+            connection.execute(f"DROP TABLE {table}")
+        logger.info("Избранное перенесено из таблицы {}", table)
+
+
+def _add(
+    connection: sqlite3.Connection,
+    chat_id: int,
+    kind: str,
+    name: str,
+    comment: str,
+) -> None:
+    connection.execute(ADD_SQL, (chat_id, kind, name, comment))
+
+
+def _delete(connection: sqlite3.Connection, chat_id: int, kind: str, name: str) -> bool:
+    return connection.execute(DELETE_SQL, (chat_id, kind, name)).rowcount > 0
+
+
+def _list(connection: sqlite3.Connection, chat_id: int, kind: str) -> list:
+    model = KINDS[kind]
+    return [model(*row) for row in connection.execute(LIST_SQL, (chat_id, kind))]
+
+
+class FavoritesRepository:
+    """Async repository of the favorites list."""
+
+    def __init__(
+        self,
+        path: str,
+        batch_size: int = 256,
+        cache_size: int = 10_000,
+    ) -> None:
+        """Init repository.
+
+        :param path: path to the database
+        :param batch_size: max count of operations committed in one transaction
+        :param cache_size: max count of (chat_id, kind) lists kept in memory
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self._cache: OrderedDict[tuple[int, str], list] = OrderedDict()
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    async def start(self) -> None:
+        """Open the database in the writer thread."""
+        self._loop = asyncio.get_running_loop()
+        ready = self._loop.create_future()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(ready,),
+            name="favorites-writer",
+            daemon=True,
+        )
+        self._thread.start()
+        await ready
+
+    async def close(self) -> None:
+        """Commit pending operations and stop the writer thread."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        await asyncio.to_thread(self._thread.join)
+        self._thread = None
+
+    async def add(self, chat_id: int, kind: str, name: str, comment: str) -> None:
+        """Add film to the favorites (or update its comment)."""
+        await self._submit(_add, chat_id, kind, name, comment)
+
+        films = self._cache.get((chat_id, kind))
+        if films is not None:
+            films[:] = [film for film in films if film.name != name]
+            films.append(KINDS[kind](name, comment))
+
+    async def delete(self, chat_id: int, kind: str, name: str) -> bool:
+        """Delete film from the favorites, False if it was not there."""
+        deleted = await self._submit(_delete, chat_id, kind, name)
+
+        films = self._cache.get((chat_id, kind))
+        if films is not None:
+            films[:] = [film for film in films if film.name != name]
+        return deleted
+
+    async def list(self, chat_id: int, kind: str) -> list:
+        """Get user's favorites of the kind."""
+        key = (chat_id, kind)
+        films = self._cache.get(key)
+        if films is None:
+            films = await self._submit(_list, chat_id, kind)
+            self._cache[key] = films
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+        self._cache.move_to_end(key)
+        return list(films)
+
+    async def _submit(self, func: Callable, *args: Any) -> Any:  # noqa: ANN401
+        future = self._loop.create_future()
+        self._queue.put((func, args, future))
+        return await future
+
+    def _resolve(
+        self,
+        future: asyncio.Future,
+        result: Any,  # noqa: ANN401
+        error: Exception | None,
+    ) -> None:
+        if future.cancelled():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
 
-def create_tables(db_connection: sqlite3.connect) -> None:
-    """Create tables."""
-    cursor = db_connection.cursor()
-    cursor.execute(
-        "CREATE TABLE IF NOT EXISTS doramas (chat_id INTEGER,name TEXT,comment TEXT)",
-    )
-    cursor.execute(
-        "CREATE TABLE IF NOT EXISTS anime (chat_id INTEGER,",
-        "name TEXT,",
-        "comment TEXT)",
-    )
-    db_connection.commit()
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, cached_statements=64)
+        try:
+            connection.executescript(SCHEMA)
+            _migrate(connection)
+        except Exception:
+            connection.close()
+            raise
+        return connection
 
+    def _execute(self, connection: sqlite3.Connection, batch: list) -> list[tuple]:
+        """Execute the operations in one transaction.
 
-def load_user_data(db_connection: sqlite3.connect) -> dict:
-    """Load users data."""
-    user_data = {}
+        :return: future, result and error of every operation
+        """
+        results = []
+        try:
+            with connection:
+                for func, args, future in batch:
+                    try:
+                        results.append((future, func(connection, *args), None))
+                    except Exception as e:  # noqa: BLE001
+                        logger.error("Ошибка базы данных: {!r}", e)
+                        results.append((future, None, e))
+        except sqlite3.Error as e:
+            # The commit failed, nothing of the batch is saved
+            logger.error("Ошибка базы данных: {!r}", e)
+            results = [(future, None, e) for *_, future in batch]
+        return results
 
-    cursor = db_connection.cursor()
-    cursor.execute("SELECT * FROM doramas")
-    doramas = cursor.fetchall()
-    cursor.execute("SELECT * FROM anime")
-    anime = cursor.fetchall()
+    def _run(self, ready: asyncio.Future) -> None:
+        """Writer thread: execute queued operations in batches."""
+        try:
+            connection = self._connect()
+        except Exception as e:  # noqa: BLE001
+            # start() raises it instead of waiting forever
+            self._loop.call_soon_threadsafe(ready.set_exception, e)
+            return
+        self._loop.call_soon_threadsafe(ready.set_result, None)
 
-    for chat_id, name, comments in doramas:
-        user_data[chat_id]["doramas"].append(Dorama(name, comments))
+        stop = False
+        while not stop:
+            batch = [self._queue.get()]
+            # Everything queued while the previous batch was committed
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                stop = True
+                batch = [item for item in batch if item is not None]
 
-    for chat_id, name, comments in anime:
-        user_data[chat_id]["anime"].append(Anime(name, comments))
+            for result in self._execute(connection, batch):
+                self._loop.call_soon_threadsafe(self._resolve, *result)
 
-    return user_data
+        connection.close()
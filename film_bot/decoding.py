@@ -0,0 +1,53 @@
+"""Декодирование JSON ответов API.
+
+Используется самый быстрый из доступных декодеров (orjson, msgspec), иначе
+стандартный json. Все декодеры принимают тело ответа в байтах, без копии в str.
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Callable
+from typing import Any
+
+Decoder = Callable[[bytes], Any]
+
+
+def _orjson() -> Decoder:
+    import orjson  # noqa: PLC0415
+
+    return orjson.loads
+
+
+def _msgspec() -> Decoder:
+    import msgspec  # noqa: PLC0415
+
+    return msgspec.json.Decoder().decode
+
+
+def _stdlib() -> Decoder:
+    return json.loads
+
+
+DECODERS: dict[str, Callable[[], Decoder]] = {
+    "orjson": _orjson,
+    "msgspec": _msgspec,
+    "json": _stdlib,
+}
+
+
+def get_decoder(name: str = "auto") -> tuple[str, Decoder]:
+    """Func to get JSON decoder by name.
+
+    :param name: decoder name or "auto" for the fastest available one
+    :return: name and decode function
+    """
+    if name != "auto":
+        return name, DECODERS[name]()
+
+    for candidate, factory in DECODERS.items():
+        try:
+            return candidate, factory()
+        except ImportError:
+            continue
+    return "json", _stdlib()
@@ -0,0 +1,261 @@
+"""Защита от флуда в обе стороны.
+
+Исходящие запросы к Telegram проходят через планировщик отправки: не больше
+SEND_RATE сообщений в секунду на весь бот и CHAT_SEND_RATE в один чат. Чат, у
+которого в очереди больше сообщений, пропускает вперёд остальные чаты. Идущие
+подряд сообщения в один чат, ждущие своей очереди, склеиваются в одно, а ответ
+429 (RetryAfter) обрабатывается в одном месте: отправка в этот чат
+приостанавливается и запрос повторяется.
+
+Входящие обновления одного чата сверх CHAT_UPDATE_RATE в секунду отбрасываются,
+чтобы один пользователь не израсходовал лимит запросов к API за всех.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Any
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage
+from loguru import logger
+
+from film_bot.formatting import MESSAGE_LIMIT
+from film_bot.limiter import Priority, TokenBucket
+from film_bot.messages import FLOOD_MSG
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+    from aiogram import Bot
+    from aiogram.client.session.middlewares.base import NextRequestMiddlewareType
+    from aiogram.methods import TelegramMethod
+    from aiogram.methods.base import TelegramType
+    from aiogram.types import TelegramObject
+
+# Количество чатов, после которого забываются лимиты неактивных чатов
+CHATS_LIMIT = 10_000
+# Разделитель склеенных сообщений
+SEPARATOR = "\n\n"
+
+
+class ChatBuckets:
+    """Token buckets by chat, idle ones are dropped when there are too many."""
+
+    def __init__(self, rate: float, burst: int, limit: int = CHATS_LIMIT) -> None:
+        """Init buckets.
+
+        :param rate: tokens per second of every chat
+        :param burst: bucket capacity of every chat
+        :param limit: count of chats to start dropping idle buckets at
+        """
+        self.rate = rate
+        self.burst = burst
+        self.limit = limit
+        self._buckets: dict[int, TokenBucket] = {}
+
+    def __len__(self) -> int:
+        """Count of chats with a bucket."""
+        return len(self._buckets)
+
+    def get(self, chat_id: int) -> TokenBucket:
+        """Get bucket of the chat."""
+        bucket = self._buckets.get(chat_id)
+        if bucket is None:
+            if len(self._buckets) >= self.limit:
+                self._buckets = {
+                    key: value for key, value in self._buckets.items() if not value.idle
+                }
+            bucket = self._buckets[chat_id] = TokenBucket(self.rate, self.burst)
+        return bucket
+
+
+class _Batch:
+    """Outgoing request waiting for its turn, later messages can join it."""
+
+    def __init__(self, method: TelegramMethod) -> None:
+        self.method = method
+        self.merged = 1
+        self.task: asyncio.Task | None = None
+
+    def merge(self, method: TelegramMethod) -> bool:
+        """Append text of the next message to the same chat if possible."""
+        first = self.method
+        if not (
+            isinstance(first, SendMessage)
+            and isinstance(method, SendMessage)
+            # Keyboard and entities belong to a particular text
+            and first.reply_markup is None
+            and first.entities is None
+            and method.entities is None
+            and len(first.text) + len(SEPARATOR) + len(method.text) <= MESSAGE_LIMIT
+        ):
+            return False
+        fields = {"text", "reply_markup"}
+        if first.model_dump(exclude=fields) != method.model_dump(exclude=fields):
+            return False
+        self.method = first.model_copy(
+            update={
+                "text": f"{first.text}{SEPARATOR}{method.text}",
+                "reply_markup": method.reply_markup,
+            },
+        )
+        self.merged += 1
+        return True
+
+
+class SendScheduler(BaseRequestMiddleware):
+    """Session middleware limiting outgoing messages globally and by chat."""
+
+    def __init__(
+        self,
+        *,
+        rate: float,
+        chat_rate: float,
+        chat_burst: int,
+        retries: int,
+    ) -> None:
+        """Init scheduler.
+
+        :param rate: messages per second of the whole bot
+        :param chat_rate: messages per second to one chat
+        :param chat_burst: messages to one chat sent without waiting
+        :param retries: repeats of a request after RetryAfter
+        """
+        self.bucket = TokenBucket(rate, max(1, int(rate)))
+        self.chats = ChatBuckets(chat_rate, chat_burst)
+        self.retries = retries
+        self.merged = 0
+        self.retried = 0
+        # The last request of the chat waiting for its turn
+        self._batches: dict[int, _Batch] = {}
+        # Count of requests of the chat being sent and their lock
+        self._pending: dict[int, int] = {}
+        self._locks: dict[int, asyncio.Lock] = {}
+
+    def setup(self, bot: Bot) -> None:
+        """Add the scheduler to the session of the bot (once)."""
+        if self not in bot.session.middleware:
+            bot.session.middleware(self)
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> TelegramType:
+        """Send the request in its turn."""
+        chat_id = getattr(method, "chat_id", None)
+        if not isinstance(chat_id, int):
+            # Not a message: getUpdates, answerCallbackQuery, messages to channels
+            return await self._send(make_request, bot, method)
+
+        batch = self._batches.get(chat_id)
+        if batch is not None and batch.merge(method):
+            self.merged += 1
+            return await asyncio.shield(batch.task)
+
+        batch = self._batches[chat_id] = _Batch(method)
+        batch.task = asyncio.create_task(
+            self._deliver(make_request, bot, chat_id, batch),
+        )
+        return await asyncio.shield(batch.task)
+
+    async def _deliver(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        chat_id: int,
+        batch: _Batch,
+    ) -> TelegramType:
+        """Wait for the limits of the chat and the bot, then send the batch."""
+        lock = self._locks.get(chat_id)
+        if lock is None:
+            lock = self._locks[chat_id] = asyncio.Lock()
+        self._pending[chat_id] = self._pending.get(chat_id, 0) + 1
+        try:
+            # Messages of one chat keep their order
+            async with lock:
+                await self.chats.get(chat_id).acquire()
+                # Chats with a longer queue let the others go first
+                await self.bucket.acquire(Priority.INTERACTIVE + self._pending[chat_id])
+                # Messages sent from now on are not merged into this one
+                if self._batches.get(chat_id) is batch:
+                    del self._batches[chat_id]
+                return await self._send(make_request, bot, batch.method, chat_id)
+        finally:
+            if self._batches.get(chat_id) is batch:
+                del self._batches[chat_id]
+            self._pending[chat_id] -= 1
+            if not self._pending[chat_id]:
+                del self._pending[chat_id], self._locks[chat_id]
+
+    async def _send(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+        chat_id: int | None = None,
+    ) -> TelegramType:
+        """Send the request, waiting and repeating it after RetryAfter."""
+        attempt = 0
+        while True:
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                if attempt >= self.retries:
+                    raise
+                attempt += 1
+                self.retried += 1
+                logger.warning(
+                    "Telegram просит подождать {} с перед {} в чат {}",
+                    e.retry_after,
+                    type(method).__name__,
+                    chat_id,
+                )
+                if chat_id is None:
+                    await asyncio.sleep(e.retry_after)
+                    continue
+                bucket = self.chats.get(chat_id)
+                bucket.pause(e.retry_after)
+                await bucket.acquire()
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """Drop updates of a chat coming faster than the limit.
+
+    The user is warned once, until updates of the chat are accepted again.
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        """Init middleware.
+
+        :param rate: updates per second of one chat
+        :param burst: updates of one chat accepted without the limit
+        """
+        self.chats = ChatBuckets(rate, burst)
+        self.dropped = 0
+        self._warned: set[int] = set()
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:  # noqa: ANN401
+        """Pass the update to the handler if the chat is within the limit."""
+        chat = data.get("event_chat") or data.get("event_from_user")
+        if chat is None:
+            return await handler(event, data)
+
+        if self.chats.get(chat.id).try_acquire():
+            self._warned.discard(chat.id)
+            return await handler(event, data)
+
+        self.dropped += 1
+        if chat.id not in self._warned:
+            self._warned.add(chat.id)
+            await event.answer(FLOOD_MSG)
+        return None
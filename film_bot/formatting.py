@@ -0,0 +1,206 @@
+"""Форматирование карточек фильмов и упаковка текста в сообщения.
+
+Карточка фильма рендерится один раз для пары (id фильма, вид карточки) и
+хранится в LRU-кэше. Список карточек упаковывается в сообщения не длиннее
+лимита Telegram за один проход.
+"""
+
+from __future__ import annotations
+
+import html
+import re
+import textwrap
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from film_bot.cache import CacheStats
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator
+
+    from film_bot.models import Film
+
+# Максимальная длина текста сообщения Telegram
+MESSAGE_LIMIT = 4096
+# Ширина строки описания
+WIDTH = 100
+# Длина описания в списках, чтобы страница помещалась в одно сообщение
+SHORT_DESCRIPTION = 400
+
+_MARKDOWN_SPECIAL = re.compile(r"([_*\[\]()~`>#+\-=|{}.!\\])")
+
+
+def escape_markdown(text: str) -> str:
+    """Func to escape text for MarkdownV2."""
+    return _MARKDOWN_SPECIAL.sub(r"\\\1", text)
+
+
+@dataclass(slots=True, frozen=True)
+class ParseMode:
+    """Escaping and bold text of a Telegram parse mode."""
+
+    escape: Callable[[str], str]
+    bold: str
+
+
+PARSE_MODES: dict[str | None, ParseMode] = {
+    None: ParseMode(str, "{}"),
+    "HTML": ParseMode(html.escape, "<b>{}</b>"),
+    "MarkdownV2": ParseMode(escape_markdown, "*{}*"),
+}
+
+
+def wrap(text: str, width: int = WIDTH) -> str:
+    """Func to wrap text by words, a faster textwrap.fill for plain prose.
+
+    Words are not broken at hyphens, a word longer than the width takes a line.
+    """
+    lines = []
+    line: list[str] = []
+    length = -1
+    for word in text.split():
+        if line and length + 1 + len(word) > width:
+            lines.append(" ".join(line))
+            line, length = [], -1
+        line.append(word)
+        length += 1 + len(word)
+    if line:
+        lines.append(" ".join(line))
+    return "\n".join(lines)
+
+
+def _render(film: Film, mode: ParseMode, description: str) -> str:
+    title = mode.bold.format(mode.escape(film.name))
+    return f"{title}, {film.year}\n\n{mode.escape(wrap(description))}"
+
+
+def _card(film: Film, mode: ParseMode) -> str:
+    return _render(film, mode, film.description)
+
+
+def _short(film: Film, mode: ParseMode) -> str:
+    return _render(film, mode, textwrap.shorten(film.description, SHORT_DESCRIPTION))
+
+
+# Виды карточек: полная и с сокращённым описанием для списков
+LAYOUTS: dict[str, Callable[[Film, ParseMode], str]] = {
+    "card": _card,
+    "short": _short,
+}
+
+
+class CardFormatter:
+    """Renderer of film cards with LRU cache by film id and layout."""
+
+    def __init__(self, size: int = 10_000, parse_mode: str | None = None) -> None:
+        """Init formatter.
+
+        :param size: max count of cached cards
+        :param parse_mode: None, HTML or MarkdownV2
+        """
+        self.size = size
+        self.parse_mode = parse_mode
+        self.stats = CacheStats()
+        self._mode = PARSE_MODES[parse_mode]
+        self._cards: OrderedDict[tuple[int, str], str] = OrderedDict()
+
+    def __len__(self) -> int:
+        """Count of cached cards."""
+        return len(self._cards)
+
+    def escape(self, text: str) -> str:
+        """Escape plain text for the parse mode."""
+        return self._mode.escape(text)
+
+    def render(self, film: Film, layout: str = "card") -> str:
+        """Render card of the film."""
+        if film.id is None:
+            # Nothing to cache by
+            return LAYOUTS[layout](film, self._mode)
+
+        key = (film.id, layout)
+        card = self._cards.get(key)
+        if card is not None:
+            self._cards.move_to_end(key)
+            self.stats.hits += 1
+            return card
+
+        self.stats.misses += 1
+        card = self._cards[key] = LAYOUTS[layout](film, self._mode)
+        if len(self._cards) > self.size:
+            self._cards.popitem(last=False)
+            self.stats.evictions += 1
+        return card
+
+    def render_list(
+        self,
+        films: Iterable[Film],
+        layout: str = "short",
+        start: int = 1,
+    ) -> list[str]:
+        """Render numbered cards of the films."""
+        return [
+            f"{self.escape(f'{i}. ')}{self.render(film, layout)}"
+            for i, film in enumerate(films, start)
+        ]
+
+
+def _cut(part: str, limit: int) -> int:
+    """Func to find where to split the rendered text before the limit.
+
+    Markup is only in the first line of a card, so a line end and then a space
+    of an escaped description are safe. A word longer than the limit is cut
+    outside of an HTML entity and of a MarkdownV2 escape.
+    """
+    for boundary in ("\n", " "):
+        cut = part.rfind(boundary, 0, limit)
+        if cut > 0:
+            return cut
+    cut = limit
+    entity = part.rfind("&", 0, cut)
+    if entity != -1 and ";" not in part[entity:cut]:
+        cut = entity
+    escapes = len(part[:cut]) - len(part[:cut].rstrip("\\"))
+    if escapes % 2:
+        # Not between a backslash and the escaped character
+        cut -= 1
+    return cut or limit
+
+
+def _split(part: str, limit: int) -> Iterator[str]:
+    """Split a text longer than the limit, by lines if possible."""
+    while len(part) > limit:
+        cut = _cut(part, limit)
+        yield part[:cut]
+        part = part[cut:]
+        if part[:1] in {"\n", " "}:
+            part = part[1:]
+    if part:
+        yield part
+
+
+def pack(
+    parts: Iterable[str],
+    limit: int = MESSAGE_LIMIT,
+    separator: str = "\n",
+) -> list[str]:
+    """Func to pack text parts into as few messages as possible.
+
+    Parts are kept whole unless a part alone is longer than the limit.
+    """
+    messages = []
+    current: list[str] = []
+    length = 0
+    for part in parts:
+        for chunk in _split(part, limit):
+            added = len(chunk) + (len(separator) if current else 0)
+            if length + added > limit:
+                messages.append(separator.join(current))
+                current, length = [], 0
+                added = len(chunk)
+            current.append(chunk)
+            length += added
+    if current:
+        messages.append(separator.join(current))
+    return messages
@@ -0,0 +1,146 @@
+"""Ограничение частоты запросов к API и повторы с экспоненциальной задержкой."""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+from enum import IntEnum
+
+
+class Priority(IntEnum):
+    """Request priority, lower value goes first."""
+
+    INTERACTIVE = 0
+    BACKGROUND = 10
+
+
+@dataclass
+class LimiterStats:
+    """Limiter metrics."""
+
+    acquired: int = 0
+    waited: int = 0
+    wait_time: float = 0.0
+    max_wait_time: float = 0.0
+    queue_depth: int = 0
+
+    @property
+    def avg_wait_time(self) -> float:
+        """Average wait time of the requests that had to wait."""
+        return self.wait_time / self.waited if self.waited else 0.0
+
+
+class TokenBucket:
+    """Token bucket with a priority queue of waiters."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        """Init bucket.
+
+        :param rate: tokens per second
+        :param burst: bucket capacity
+        """
+        self.rate = rate
+        self.burst = burst
+        self.stats = LimiterStats()
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+        self._drainer: asyncio.Task | None = None
+
+    def _refill(self) -> float:
+        now = time.monotonic()
+        self._tokens = min(
+            self.burst,
+            self._tokens + (now - self._updated_at) * self.rate,
+        )
+        self._updated_at = now
+        return now
+
+    def pause(self, delay: float) -> None:
+        """Stop giving tokens for `delay` seconds (e.g. on Retry-After)."""
+        now = self._refill()
+        self._paused_until = max(self._paused_until, now + delay)
+        self._tokens = 0.0
+
+    @property
+    def idle(self) -> bool:
+        """True if nobody waits and the bucket is full."""
+        now = self._refill()
+        return (
+            not self._waiters
+            and now >= self._paused_until
+            and self._tokens >= self.burst
+        )
+
+    def try_acquire(self) -> bool:
+        """Take a token without waiting, False if there is none."""
+        now = self._refill()
+        if self._waiters or now < self._paused_until or self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    async def acquire(self, priority: Priority = Priority.INTERACTIVE) -> None:
+        """Wait for a token."""
+        now = self._refill()
+        self.stats.acquired += 1
+        if not self._waiters and now >= self._paused_until and self._tokens >= 1:
+            self._tokens -= 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        self.stats.queue_depth = len(self._waiters)
+        if self._drainer is None or self._drainer.done():
+            self._drainer = asyncio.create_task(self._drain())
+
+        try:
+            await future
+        finally:
+            waited = time.monotonic() - now
+            self.stats.waited += 1
+            self.stats.wait_time += waited
+            self.stats.max_wait_time = max(self.stats.max_wait_time, waited)
+
+    async def _drain(self) -> None:
+        """Give tokens to waiters in the priority order."""
+        while self._waiters:
+            now = self._refill()
+            if now < self._paused_until:
+                await asyncio.sleep(self._paused_until - now)
+                continue
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                continue
+
+            _, _, future = heapq.heappop(self._waiters)
+            self.stats.queue_depth = len(self._waiters)
+            if not future.done():
+                self._tokens -= 1
+                future.set_result(None)
+
+
+def retry_after(value: str | None) -> float | None:
+    """Func to parse Retry-After header (seconds or HTTP date)."""
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (date - datetime.now(UTC)).total_seconds())
+
+
+def backoff(attempt: int, base: float = 0.5, cap: float = 30.0) -> float:
+    """Func to get exponential backoff delay with full jitter."""
+    return random.uniform(0, min(cap, base * 2**attempt))  # noqa: S311
@@ -1,248 +1,610 @@
-"""launching the bot."""
+"""launching the bot.
 
-import sqlite3
+Handlers are registered in `router` at import. Everything that reads the
+settings, opens sessions and databases is built by create_dispatcher on the
+first access to `dp`.
+"""
+
+from __future__ import annotations
+
+import functools
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
 
-from aiogram import Bot, Dispatcher, F
+from aiogram import Bot, Dispatcher, Router
 from aiogram.client.default import DefaultBotProperties
 from aiogram.filters import Command, CommandStart
-from aiogram.fsm.context import FSMContext
-from aiogram.types import KeyboardButton, Message, ReplyKeyboardMarkup
+from aiogram.types import InlineQueryResultArticle, InputTextMessageContent
+from loguru import logger
 
-from film_bot.api import API
 from film_bot.config import config
-from film_bot.db import create_tables, load_user_data
-from film_bot.messages import HELP_MSG, START_MSG
+from film_bot.formatting import pack
+from film_bot.menu import (
+    ANIME,
+    ANIME_KEYBOARD,
+    BACK,
+    DORAMA,
+    DORAMA_KEYBOARD,
+    FAVORITES,
+    FAVORITES_ADD,
+    FAVORITES_DELETE,
+    FAVORITES_KEYBOARD,
+    FAVORITES_LIST,
+    FAVORITES_SIMILAR,
+    HELP,
+    MAIN_KEYBOARD,
+    MenuEntry,
+    MenuFilter,
+    build_routes,
+)
+from film_bot.messages import (
+    ACTOR_PROMPT,
+    GENRE_PROMPT,
+    HELP_MSG,
+    NO_RECOMMENDATIONS_MSG,
+    NO_SIMILAR_MSG,
+    NOT_FOUND_MSG,
+    NOT_IN_CATALOG_MSG,
+    START_MSG,
+    TITLE_PROMPT,
+    YEAR_PROMPT,
+)
 from film_bot.models import (
+    FavoriteAddForm,
+    FavoriteDeleteForm,
+    FavoriteListForm,
+    FavoriteSimilarForm,
+    Film,
     FilmFromActorForm,
     FilmFromGenreForm,
     FilmFromTitleForm,
     FilmFromYearForm,
 )
-
-api = API()
-dp = Dispatcher()
-
-
-@dp.message(CommandStart())
-@dp.message(F.text.casefold() == "вернуться в главное меню 📌")
-async def command_start_handler(message: Message) -> None:
-    """Start command handler."""
-    # TODO: Добавить запись в бд для списка избранного
-    markup = ReplyKeyboardMarkup(
-        keyboard=[
-            [
-                KeyboardButton(text="🌸 Аниме"),
-                KeyboardButton(text="📺 Дорамы"),
-                KeyboardButton(text="❤️ Избранное"),
-            ],
-            [
-                KeyboardButton(text="❓ Что я умею?"),
-            ],
-        ],
-        resize_keyboard=True,
-    )
-
-    await message.answer(START_MSG, reply_markup=markup)
-
-
-@dp.message(Command("help"))
-@dp.message(F.text.casefold() == "❓ что я умею?")
-async def command_help_handler(message: Message) -> None:
-    """Start command handler."""
-    await message.answer(HELP_MSG)
-
-
-@dp.message(F.text.casefold() == "🌸 аниме")
-async def anime_button_handler(message: Message) -> None:
-    """Anime button handler."""
-    markup = ReplyKeyboardMarkup(
-        keyboard=[
-            [
-                KeyboardButton(text="Поиск аниме по названию 🔎"),
-                KeyboardButton(text="Поиск аниме по жанру 🎭"),
-                KeyboardButton(text="Поиск аниме по году 🎯"),
-            ],
-            [
-                KeyboardButton(text="Случайное аниме 💡"),
-                KeyboardButton(text="Вернуться в главное меню 📌"),
-            ],
-        ],
-        resize_keyboard=True,
+from film_bot.pages import PageCallback, Query, QueryStore, page_keyboard
+from film_bot.titles import Debouncer
+
+if TYPE_CHECKING:
+    from aiogram.fsm.context import FSMContext
+    from aiogram.types import CallbackQuery, InlineQuery, Message
+
+    from film_bot.api import API
+    from film_bot.db import FavoritesRepository
+    from film_bot.models import Card
+    from film_bot.posters import PosterStore
+    from film_bot.recommend import Recommender
+    from film_bot.warmer import CacheWarmer
+
+router = Router(name="film_bot")
+
+
+@dataclass(slots=True)
+class App:
+    """Objects of the bot passed to the handlers as `app`."""
+
+    api: API
+    favorites: FavoritesRepository
+    warmer: CacheWarmer
+    queries: QueryStore = field(default_factory=QueryStore)
+    # Inline queries of a user go to the API only after a pause in typing
+    debouncer: Debouncer = field(
+        default_factory=lambda: Debouncer(config.inline_debounce),
     )
-    await message.answer("Вы в разделе 🌸 Аниме", reply_markup=markup)
-
-
-@dp.message(F.text.casefold() == "📺 дорамы")
-async def dorama_button_handler(message: Message) -> None:
-    """Dorama button handler."""
-    markup = ReplyKeyboardMarkup(
-        keyboard=[
-            [
-                KeyboardButton(text="Поиск дорамы по названию 🔎"),
-                KeyboardButton(text="Поиск дорамы по жанру 🎭"),
-                KeyboardButton(text="Поиск дорамы по году 🎯"),
-            ],
-            [
-                KeyboardButton(text="Случайная дорама 💡"),
-                KeyboardButton(text="Поиск дорамы по актеру 💎"),
-                KeyboardButton(text="Вернуться в главное меню 📌"),
-            ],
-        ],
-        resize_keyboard=True,
+    # None if there is no local catalog or numpy and scipy are not installed
+    recommender: Recommender | None = None
+    # None if posters are disabled, cards are sent as text
+    posters: PosterStore | None = None
+
+
+@functools.cache
+def create_dispatcher() -> Dispatcher:
+    """Func to build the dispatcher with storages, API client and database.
+
+    Optional parts (metrics, flood control, cache warmer, recommendations, posters)
+    are imported only when they are enabled. Built once, `dp` returns the same
+    dispatcher.
+    """
+    from film_bot.api import API  # noqa: PLC0415
+    from film_bot.db import FavoritesRepository  # noqa: PLC0415
+    from film_bot.storage import create_storages  # noqa: PLC0415
+    from film_bot.warmer import CacheWarmer  # noqa: PLC0415
+
+    storage, shared_cache = create_storages()
+    if config.metrics_enabled:
+        from film_bot.metrics import TimedStorage  # noqa: PLC0415
+
+        storage = TimedStorage(storage)
+    api = API(shared_cache)
+    app = App(
+        api=api,
+        favorites=FavoritesRepository(
+            config.db_path,
+            cache_size=config.favorites_cache_size,
+        ),
+        warmer=CacheWarmer(
+            api,
+            rate=config.warmer_rate,
+            interval=config.warmer_interval,
+            top_k=config.warmer_top_k,
+            state_path=config.warmer_state_path,
+            warm_searches=config.warmer_searches,
+        ),
     )
-    await message.answer("Вы в разделе 📺 Дорамы", reply_markup=markup)
-
-
-@dp.message(F.text.casefold() == "❤️ избранное")
-async def favorites_button_handler(message: Message) -> None:
-    """Favorites button handler."""
-    markup = ReplyKeyboardMarkup(
-        keyboard=[
-            [
-                KeyboardButton(text="Мой список 📜"),
-                KeyboardButton(text="Добавить в Избранное 📝"),
-            ],
-            [
-                KeyboardButton(text="Удалить из Избранного 🚫"),
-                KeyboardButton(text="Вернуться в главное меню 📌"),
-            ],
-        ],
-        resize_keyboard=True,
+    if config.recommend_enabled and api.catalog is not None:
+        app.recommender = create_recommender(api)
+    if config.posters_enabled:
+        from film_bot.posters import PosterStore  # noqa: PLC0415
+
+        app.posters = PosterStore(
+            config.poster_db_path,
+            base_url=config.kinopoisk_api_url,
+            concurrency=config.poster_concurrency,
+            max_bytes=config.poster_max_bytes,
+            timeout=config.poster_timeout,
+            parse_mode=config.parse_mode,
+            cache_size=config.poster_cache_size,
+        )
+    dp = Dispatcher(storage=storage, app=app)
+    dp.include_router(router)
+    dp.startup.register(api.init)
+    dp.startup.register(app.favorites.start)
+    if config.warmer_enabled:
+        dp.startup.register(app.warmer.start)
+        # Stopped before the API session is closed
+        dp.shutdown.register(app.warmer.stop)
+    if app.recommender is not None:
+        dp.startup.register(app.recommender.start)
+        # Stopped before the catalog is closed
+        dp.shutdown.register(app.recommender.stop)
+    if app.posters is not None:
+        dp.startup.register(app.posters.start)
+        dp.shutdown.register(app.posters.stop)
+    dp.shutdown.register(api.close)
+    dp.shutdown.register(app.favorites.close)
+
+    if config.metrics_enabled:
+        from film_bot import metrics  # noqa: PLC0415
+
+        metrics.setup(dp, api, app.posters)
+    if config.flood_control:
+        from film_bot.flood import SendScheduler, ThrottlingMiddleware  # noqa: PLC0415
+
+        throttling = ThrottlingMiddleware(
+            config.chat_update_rate,
+            config.chat_update_burst,
+        )
+        # Inline queries are not throttled, every keystroke of the user is a query
+        dp.message.outer_middleware(throttling)
+        dp.callback_query.outer_middleware(throttling)
+        scheduler = SendScheduler(
+            rate=config.send_rate,
+            chat_rate=config.chat_send_rate,
+            chat_burst=config.chat_send_burst,
+            retries=config.send_retries,
+        )
+        # Added to the session of the bot the dispatcher is started with
+        dp.startup.register(scheduler.setup)
+    return dp
+
+
+def create_recommender(api: API) -> Recommender | None:
+    """Func to create recommender of the local catalog, None without numpy."""
+    try:
+        from film_bot.recommend import Recommender  # noqa: PLC0415
+    except ImportError:
+        logger.warning(
+            "Рекомендации отключены: нужны numpy и scipy (film-bot[recommend])",
+        )
+        return None
+    return Recommender(
+        api.catalog,
+        count=config.recommend_count,
+        cache_size=config.recommend_cache_size,
+        cache_ttl=config.recommend_cache_ttl,
     )
 
-    await message.answer("Вы в разделе ❤️ Избранное", reply_markup=markup)
 
+def __getattr__(name: str) -> Any:  # noqa: ANN401
+    """Build the dispatcher on the first access to `dp`."""
+    if name == "dp":
+        return create_dispatcher()
+    msg = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(msg)
 
-@dp.message(F.text.casefold() == "поиск аниме по названию 🔎")
-@dp.message(F.text.casefold() == "поиск дорамы по названию 🔎")
-async def film_from_title_handler(message: Message, state: FSMContext) -> None:
-    """Поиск аниме по названию."""
-    # Set state
-    await state.set_state(FilmFromTitleForm.title)
 
-    # Add film type parameter
-    film_type = message.text.split()[1]
-    state.update_data(film_type=film_type)
+# Названия видов избранного для пользователя
+KIND_TITLES = {"anime": "аниме", "dorama": "дорамы"}
+# Виды фильмов для поиска по видам избранного
+KIND_FILM_TYPES = {"anime": "аниме", "dorama": "дорама"}
 
-    # Responding to the user
-    await message.answer(
-        f"Введи название {film_type}, которое (-ую) хочешь посмотреть",
-    )
+
+def parse_kind(text: str) -> str | None:
+    """Func to get favorites kind from user's input."""
+    text = text.strip().casefold()
+    if text.startswith("аниме"):
+        return "anime"
+    if text.startswith("дорам"):
+        return "dorama"
+    return None
 
 
-@dp.message(F.text.casefold() == "поиск аниме по жанру 🎭")
-@dp.message(F.text.casefold() == "поиск дорамы по жанру 🎭")
-async def film_from_genre_handler(message: Message, state: FSMContext) -> None:
-    # Set state
-    await state.set_state(FilmFromGenreForm.genre)
+async def answer_card(message: Message, card: Card | None, app: App) -> None:
+    """Func to answer with a film card and its poster, split if it is too long."""
+    if card is None:
+        await message.answer(NOT_FOUND_MSG)
+        return
+    if app.posters is not None and await app.posters.send(message, card):
+        # The text is the caption of the poster
+        return
+    for text in pack([card.text]):
+        await message.answer(text, parse_mode=config.parse_mode)
 
-    # Add film type parameter
-    film_type = message.text.split()[1]
-    state.update_data(film_type=film_type)
 
+async def random_film_handler(message: Message, entry: MenuEntry, app: App) -> None:
+    """Случайное аниме/дорама."""
     # Responding to the user
     await message.answer(
-        "Введи нужные жанры (если их несколько, то укажи их через запятую).",
+        f"Случайное (-ая) {entry.film_type}, надеюсь, что оно (-а) тебе понравится:",
     )
+    await answer_card(message, await app.api.random(entry.film_type), app)
+
+
+MENU = build_routes(
+    {
+        BACK: MenuEntry(START_MSG, MAIN_KEYBOARD),
+        HELP: MenuEntry(HELP_MSG),
+        ANIME: MenuEntry("Вы в разделе 🌸 Аниме", ANIME_KEYBOARD),
+        DORAMA: MenuEntry("Вы в разделе 📺 Дорамы", DORAMA_KEYBOARD),
+        FAVORITES: MenuEntry("Вы в разделе ❤️ Избранное", FAVORITES_KEYBOARD),
+        # Search
+        "Поиск аниме по названию 🔎": MenuEntry(
+            TITLE_PROMPT.format("аниме"),
+            state=FilmFromTitleForm.title,
+            film_type="аниме",
+        ),
+        "Поиск дорамы по названию 🔎": MenuEntry(
+            TITLE_PROMPT.format("дорамы"),
+            state=FilmFromTitleForm.title,
+            film_type="дорама",
+        ),
+        "Поиск аниме по жанру 🎭": MenuEntry(
+            GENRE_PROMPT,
+            state=FilmFromGenreForm.genre,
+            film_type="аниме",
+        ),
+        "Поиск дорамы по жанру 🎭": MenuEntry(
+            GENRE_PROMPT,
+            state=FilmFromGenreForm.genre,
+            film_type="дорама",
+        ),
+        "Поиск аниме по актеру 💎": MenuEntry(
+            ACTOR_PROMPT,
+            state=FilmFromActorForm.actor,
+            film_type="аниме",
+        ),
+        "Поиск дорамы по актеру 💎": MenuEntry(
+            ACTOR_PROMPT,
+            state=FilmFromActorForm.actor,
+            film_type="дорама",
+        ),
+        "Поиск аниме по году 🎯": MenuEntry(
+            YEAR_PROMPT,
+            state=FilmFromYearForm.year,
+            film_type="аниме",
+        ),
+        "Поиск дорамы по году 🎯": MenuEntry(
+            YEAR_PROMPT,
+            state=FilmFromYearForm.year,
+            film_type="дорама",
+        ),
+        "Случайное аниме 💡": MenuEntry(
+            film_type="аниме",
+            handler=random_film_handler,
+            route="random",
+        ),
+        "Случайная дорама 💡": MenuEntry(
+            film_type="дорама",
+            handler=random_film_handler,
+            route="random",
+        ),
+        # Favorites
+        FAVORITES_ADD: MenuEntry(
+            "Введи, что ты хочешь добавить: аниме или дораму",
+            state=FavoriteAddForm.kind,
+        ),
+        FAVORITES_LIST: MenuEntry(
+            "Введи, что ты хочешь увидеть: аниме или дорамы",
+            state=FavoriteListForm.kind,
+        ),
+        FAVORITES_DELETE: MenuEntry(
+            "Введи, что ты хочешь удалить: аниме или дораму",
+            state=FavoriteDeleteForm.kind,
+        ),
+        FAVORITES_SIMILAR: MenuEntry(
+            "Введи, к чему подобрать похожее: аниме или дорамы",
+            state=FavoriteSimilarForm.kind,
+        ),
+    },
+)
 
 
-@dp.message(F.text.casefold() == "поиск аниме по актеру 💎")
-@dp.message(F.text.casefold() == "поиск дорамы по актеру 💎")
-async def film_from_actor_handler(message: Message, state: FSMContext) -> None:
-    # Set state
-    await state.set_state(FilmFromActorForm.genre)
-
-    # Add film type parameter
-    film_type = message.text.split()[1]
-    state.update_data(film_type=film_type)
-
-    # Responding to the user
-    await message.answer(
-        "Введи нужных актеров (если их несколько, "
-        "то укажи их через запятую, без пробелов)",
-    )
+@router.message(CommandStart(), flags={"route": "command"})
+async def command_start_handler(message: Message) -> None:
+    """Start command handler."""
+    # TODO: Добавить запись в бд для списка избранного
+    await message.answer(START_MSG, reply_markup=MAIN_KEYBOARD)
 
 
-@dp.message(F.text.casefold() == "поиск аниме по году 🎯")
-@dp.message(F.text.casefold() == "поиск дорамы по году 🎯")
-async def film_from_year_handler(message: Message, state: FSMContext) -> None:
-    # Set state
-    await state.set_state(FilmFromYearForm.genre)
+@router.message(Command("help"), flags={"route": "command"})
+async def command_help_handler(message: Message) -> None:
+    """Help command handler."""
+    await message.answer(HELP_MSG)
 
-    # Add film type parameter
-    film_type = message.text.split()[1]
-    state.update_data(film_type=film_type)
 
-    # Responding to the user
-    await message.answer(
-        "Введи нужный год или диапазон годов (если вводишь "
-        "диапазон, то вводи в формате год-год)",
+@router.message(MenuFilter(MENU))
+async def menu_handler(
+    message: Message,
+    state: FSMContext,
+    entry: MenuEntry,
+    app: App,
+) -> None:
+    """Menu buttons handler."""
+    if entry.handler is not None:
+        await entry.handler(message, entry, app)
+        return
+
+    if entry.state is not None:
+        await state.set_state(entry.state)
+    if entry.film_type is not None:
+        await state.update_data(film_type=entry.film_type)
+    await message.answer(entry.text, reply_markup=entry.keyboard)
+
+
+@router.message(FilmFromTitleForm.title, flags={"route": "title"})
+async def anime_from_title_state_handler(
+    message: Message,
+    state: FSMContext,
+    app: App,
+) -> None:
+    """Поиск аниме/дорам по названию."""
+    film_type = (await state.get_data())["film_type"]
+    card = await app.api.from_title(message.text, film_type)
+    await answer_card(message, card, app)
+
+
+async def send_page(
+    message: Message,
+    state: FSMContext,
+    app: App,
+    search: str,
+) -> None:
+    """Func to answer with the first page of the paged search."""
+    query = Query(search, message.text, (await state.get_data())["film_type"])
+    app.warmer.record(query)
+    page = await app.api.search(query, timeout=config.fanout_timeout)
+    if page is None:
+        await message.answer(NOT_FOUND_MSG)
+        return
+    query_id = app.queries.add(query)
+    answer = await message.answer(
+        page.text,
+        parse_mode=config.parse_mode,
+        reply_markup=page_keyboard(query_id, page),
     )
 
+    if not page.complete:
+        # Showing the full result when slow lookups are finished
+        page = await app.api.search(query)
+        if page is None:
+            await answer.edit_text(NOT_FOUND_MSG)
+            return
+        await answer.edit_text(
+            page.text,
+            parse_mode=config.parse_mode,
+            reply_markup=page_keyboard(query_id, page),
+        )
 
-@dp.message(F.text.casefold() == "случайное аниме 💡")
-@dp.message(F.text.casefold() == "случайная дорама 💡")
-async def random_film_handler(message: Message) -> None:
-    # Get the type of movie required by the user
-    film_type = message.text.split()[1]
 
-    # Responding to the user
-    await message.answer(
-        f"Случайное (-ая) {film_type}, надеюсь, что оно (-а) тебе понравится:",
+@router.message(FilmFromGenreForm.genre, flags={"route": "genre"})
+async def anime_from_genre_state_handler(
+    message: Message,
+    state: FSMContext,
+    app: App,
+) -> None:
+    """Поиск аниме/дорам по жанру."""
+    await send_page(message, state, app, "genre")
+
+
+@router.message(FilmFromActorForm.actor, flags={"route": "actor"})
+async def anime_from_actor_state_handler(
+    message: Message,
+    state: FSMContext,
+    app: App,
+) -> None:
+    """Поиск аниме/дорам по актёру."""
+    await send_page(message, state, app, "actor")
+
+
+@router.message(FilmFromYearForm.year, flags={"route": "year"})
+async def anime_from_year_state_handler(
+    message: Message,
+    state: FSMContext,
+    app: App,
+) -> None:
+    """Поиск аниме/дорам по году."""
+    await send_page(message, state, app, "year")
+
+
+@router.callback_query(PageCallback.filter(), flags={"route": "page"})
+async def page_callback_handler(
+    callback: CallbackQuery,
+    callback_data: PageCallback,
+    app: App,
+) -> None:
+    """Листание страниц результатов поиска."""
+    query = app.queries.get(callback_data.query)
+    page = await app.api.search(query, callback_data.page) if query else None
+    if page is None:
+        await callback.answer("Результаты устарели, повторите поиск")
+        return
+    await callback.message.edit_text(
+        page.text,
+        parse_mode=config.parse_mode,
+        reply_markup=page_keyboard(callback_data.query, page),
     )
+    await callback.answer()
+
+
+@router.message(FavoriteAddForm.kind, flags={"route": "favorites"})
+@router.message(FavoriteDeleteForm.kind, flags={"route": "favorites"})
+async def favorite_kind_state_handler(message: Message, state: FSMContext) -> None:
+    """Добавление/удаление из избранного: запрос названия."""
+    kind = parse_kind(message.text)
+    if kind is None:
+        await message.answer("Введи аниме или дораму")
+        return
+
+    await state.update_data(kind=kind)
+    if await state.get_state() == FavoriteAddForm.kind:
+        await state.set_state(FavoriteAddForm.name)
+        await message.answer("Введите название сериала, который вы хотите добавить")
+    else:
+        await state.set_state(FavoriteDeleteForm.name)
+        await message.answer("Введите название сериала, который нужно удалить:")
+
+
+@router.message(FavoriteAddForm.name, flags={"route": "favorites"})
+async def favorite_name_state_handler(message: Message, state: FSMContext) -> None:
+    """Добавление в избранное: запрос комментария."""
+    await state.update_data(name=message.text)
+    await state.set_state(FavoriteAddForm.comment)
+    await message.answer("Введите комментарии к сериалу")
+
+
+@router.message(FavoriteAddForm.comment, flags={"route": "favorites"})
+async def favorite_comment_state_handler(
+    message: Message,
+    state: FSMContext,
+    app: App,
+) -> None:
+    """Добавление в избранное: сохранение."""
+    data = await state.get_data()
+    await state.clear()
+    await app.favorites.add(message.chat.id, data["kind"], data["name"], message.text)
     await message.answer(
-        await api.random(film_type),
+        f"В раздел {KIND_TITLES[data['kind']]} добавлен '{data['name']}' "
+        f"с комментарием: {message.text}",
     )
 
 
-@dp.message(FilmFromTitleForm.title)
-async def anime_from_title_state_handler(message: Message, state: FSMContext) -> None:
-    """Поиск аниме/дорам по названию."""
-    print(await state.get_data())
-    await message.answer(await api.from_title(message.text, (await state.get_data())["film_type"]))
-
-
-@dp.message(FilmFromGenreForm.genre)
-async def anime_from_genre_state_handler(message: Message, state: FSMContext) -> None:
-    """Поиск аниме/дорам по жанру."""
-    await message.answer(await api.from_genre(message.text, (await state.get_data())["film_type"]))
-
-
-@dp.message(FilmFromActorForm.actor)
-async def anime_from_actor_state_handler(message: Message, state: FSMContext) -> None:
-    """Поиск аниме/дорам по жанру."""
-    await message.answer(await api.from_genre(message.text, (await state.get_data())["film_type"]))
-
-
-@dp.message(FilmFromYearForm.year)
-async def anime_from_year_state_handler(message: Message, state: FSMContext) -> None:
-    """Поиск аниме/дорам по жанру."""
-    await message.answer(await api.from_genre(message.text, (await state.get_data())["film_type"]))
-
-
-# TODO: Dealing with the database and favorites list
-"""
-    elif message.text == "Добавить в Избранное 📝":
-        message = self.bot.send_message(
-            message.chat.id,
-            "Введи, что ты хочешь добавить: аниме или дораму",
-        )
+@router.message(FavoriteListForm.kind, flags={"route": "favorites"})
+async def favorite_list_state_handler(
+    message: Message,
+    state: FSMContext,
+    app: App,
+) -> None:
+    """Просмотр избранного."""
+    kind = parse_kind(message.text)
+    if kind is None:
+        await message.answer("Введи аниме или дорамы")
+        return
+
+    await state.clear()
+    films = await app.favorites.list(message.chat.id, kind)
+    if not films:
+        await message.answer("Ваш список пуст 🥺")
+        return
+    for text in pack(["Ваш список избранного 🔥:", *map(str, films)]):
+        await message.answer(text)
+
+
+@router.message(FavoriteSimilarForm.kind, flags={"route": "similar"})
+async def favorite_similar_state_handler(
+    message: Message,
+    state: FSMContext,
+    app: App,
+) -> None:
+    """Похожее на избранное."""
+    kind = parse_kind(message.text)
+    if kind is None:
+        await message.answer("Введи аниме или дорамы")
+        return
+
+    await state.clear()
+    recommender = app.recommender
+    if recommender is None or recommender.index is None:
+        await message.answer(NO_RECOMMENDATIONS_MSG)
+        return
+    films = await app.favorites.list(message.chat.id, kind)
+    if not films:
+        await message.answer("Ваш список пуст 🥺")
+        return
+
+    docs = await recommender.recommend(
+        message.chat.id,
+        KIND_FILM_TYPES[kind],
+        [film.name for film in films],
+    )
+    if docs is None:
+        await message.answer(NOT_IN_CATALOG_MSG)
+        return
+    if not docs:
+        await message.answer(NO_SIMILAR_MSG)
+        return
+    cards = app.api.formatter.render_list(map(Film.from_doc, docs))
+    for text in pack(["Похоже на твоё избранное ✨:", *cards]):
+        await message.answer(text, parse_mode=config.parse_mode)
+
+
+@router.message(FavoriteDeleteForm.name, flags={"route": "favorites"})
+async def favorite_delete_state_handler(
+    message: Message,
+    state: FSMContext,
+    app: App,
+) -> None:
+    """Удаление из избранного."""
+    data = await state.get_data()
+    await state.clear()
+    if await app.favorites.delete(message.chat.id, data["kind"], message.text):
+        await message.answer(f"{message.text} удалён (-а) из избранного")
+    else:
+        await message.answer(f"{message.text} нет в вашем списке избранного")
+
+
+# Длина описания фильма в списке результатов inline-режима
+INLINE_DESCRIPTION_LENGTH = 100
+
+
+def inline_article(film: Film, app: App) -> InlineQueryResultArticle:
+    """Func to build inline result with the card of the film."""
+    title = f"{film.name} ({film.year})" if film.year else film.name
+    card = pack([app.api.formatter.render(film)])[0]
+    return InlineQueryResultArticle(
+        id=str(film.id),
+        title=title,
+        description=film.description[:INLINE_DESCRIPTION_LENGTH],
+        input_message_content=InputTextMessageContent(
+            message_text=card,
+            parse_mode=config.parse_mode,
+        ),
+    )
 
-    elif message.text == "Мой список 📜":
-        message = self.bot.send_message(
-            message.chat.id,
-            "Введи, что ты хочешь увидеть: аниме или дорамы",
-        )
 
-    elif message.text == "Удалить из Избранного 🚫":
-        message = self.bot.send_message(
-            message.chat.id,
-            "Введи, что ты хочешь удалить: аниме или дораму",
-        )
-"""
+@router.inline_query(flags={"route": "inline"})
+async def inline_query_handler(inline_query: InlineQuery, app: App) -> None:
+    """Автодополнение названий в inline-режиме."""
+    films = await app.api.autocomplete(inline_query.query, config.inline_limit)
+    if films is None:
+        # Only the last of fast keystrokes goes to the API
+        if not await app.debouncer.wait(inline_query.from_user.id):
+            return
+        films = await app.api.find_titles(inline_query.query, config.inline_limit)
+    await inline_query.answer(
+        [inline_article(film, app) for film in films],
+        cache_time=config.inline_cache_time,
+    )
 
 
-@dp.message()
+@router.message(flags={"route": "unknown"})
 async def any_messages_handler(message: Message) -> None:
     """Any messages handler."""
     await message.answer(
@@ -253,15 +615,17 @@ async def any_messages_handler(message: Message) -> None:
     )
 
 
-async def main() -> None:
-    """Bot startup."""
-    # TODO: Подключаем файл для сбора логов
-    # TODO: Подключаем базу данных для списка избранного
-    await api.init()
-    db_connection = sqlite3.connect("index.db", check_same_thread=False)
-
-    # create_tables(db_connection)
-    # user_data = load_user_data(db_connection)  # noqa: ERA001
+async def main(mode: str | None = None) -> None:
+    """Bot startup.
 
+    :param mode: polling or webhook, BOT_MODE from config by default
+    """
+    # TODO: Подключаем файл для сбора логов
+    dp = create_dispatcher()
     bot = Bot(token=config.telegam_bot_token, default=DefaultBotProperties())
-    await dp.start_polling(bot)
+    if (mode or config.bot_mode) == "webhook":
+        from film_bot.webhook import run_webhook  # noqa: PLC0415
+
+        await run_webhook(dp, bot)
+    else:
+        await dp.start_polling(bot)
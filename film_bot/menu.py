@@ -0,0 +1,126 @@
+"""Меню бота: клавиатуры и маршрутизация нажатий на кнопки.
+
+Все кнопки собраны в один словарь "нормализованный текст -> пункт меню", поэтому
+нажатие на кнопку находится одним поиском в словаре, а не проверкой цепочки
+фильтров. Набранный вручную текст кнопки с опечаткой тоже узнаётся, если бот не
+ждёт от пользователя другого ввода. Клавиатуры создаются один раз при импорте.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from aiogram.filters import Filter
+from aiogram.types import KeyboardButton, ReplyKeyboardMarkup
+
+from film_bot.vocabulary import Vocabulary
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+    from aiogram.fsm.state import State
+    from aiogram.types import Message
+
+# Тексты кнопок
+ANIME = "🌸 Аниме"
+DORAMA = "📺 Дорамы"
+FAVORITES = "❤️ Избранное"
+HELP = "❓ Что я умею?"
+BACK = "Вернуться в главное меню 📌"
+FAVORITES_LIST = "Мой список 📜"
+FAVORITES_ADD = "Добавить в Избранное 📝"
+FAVORITES_DELETE = "Удалить из Избранного 🚫"
+FAVORITES_SIMILAR = "Похожее на моё избранное ✨"
+
+
+def keyboard(*rows: list[str]) -> ReplyKeyboardMarkup:
+    """Func to build reply keyboard from rows of button texts."""
+    return ReplyKeyboardMarkup(
+        keyboard=[[KeyboardButton(text=text) for text in row] for row in rows],
+        resize_keyboard=True,
+    )
+
+
+MAIN_KEYBOARD = keyboard([ANIME, DORAMA, FAVORITES], [HELP])
+ANIME_KEYBOARD = keyboard(
+    [
+        "Поиск аниме по названию 🔎",
+        "Поиск аниме по жанру 🎭",
+        "Поиск аниме по году 🎯",
+    ],
+    ["Случайное аниме 💡", BACK],
+)
+DORAMA_KEYBOARD = keyboard(
+    [
+        "Поиск дорамы по названию 🔎",
+        "Поиск дорамы по жанру 🎭",
+        "Поиск дорамы по году 🎯",
+    ],
+    ["Случайная дорама 💡", "Поиск дорамы по актеру 💎", BACK],
+)
+FAVORITES_KEYBOARD = keyboard(
+    [FAVORITES_LIST, FAVORITES_ADD],
+    [FAVORITES_DELETE, FAVORITES_SIMILAR],
+    [BACK],
+)
+
+
+@dataclass(slots=True, frozen=True)
+class MenuEntry:
+    """Menu item.
+
+    Without a handler the bot answers with `text` and `keyboard`, setting
+    `state` and `film_type` of the FSM if they are given. The handler is called
+    with the message, the entry and the app of the bot.
+    """
+
+    text: str | None = None
+    keyboard: ReplyKeyboardMarkup | None = None
+    state: State | None = None
+    film_type: str | None = None
+    handler: Callable[[Message, MenuEntry, Any], Awaitable[Any]] | None = None
+    # Name of the entry in the metrics
+    route: str = "menu"
+
+
+def normalize(text: str) -> str:
+    """Func to normalize button text for lookup."""
+    return text.strip().casefold()
+
+
+def build_routes(entries: dict[str, MenuEntry]) -> dict[str, MenuEntry]:
+    """Func to build menu routes by normalized button text."""
+    routes = {}
+    for text, entry in entries.items():
+        key = normalize(text)
+        if key in routes:
+            msg = f"Кнопка меню {text!r} задана дважды"
+            raise ValueError(msg)
+        routes[key] = entry
+    return routes
+
+
+class MenuFilter(Filter):
+    """Match menu buttons with one dict lookup, pass the entry to the handler."""
+
+    def __init__(self, routes: dict[str, MenuEntry]) -> None:
+        """Init filter with routes from build_routes."""
+        self.routes = routes
+        # Typed button texts without emoji and with typos
+        self.typed = Vocabulary(routes)
+
+    async def __call__(
+        self,
+        message: Message,
+        raw_state: str | None = None,
+    ) -> bool | dict[str, MenuEntry]:
+        """Get menu entry of the message text."""
+        if message.text is None:
+            return False
+        entry = self.routes.get(normalize(message.text))
+        if entry is None and raw_state is None:
+            # Input of a search or a form is never taken for a button
+            key = self.typed.match(message.text)
+            entry = None if key is None else self.routes[key]
+        return False if entry is None else {"entry": entry}
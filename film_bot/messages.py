@@ -25,3 +25,22 @@ HELP_MSG = (
     "Случайный сериал 💡 - выдаст тебе случайное аниме или дораму (пользуйся, если не "
     "знаешь, что именно хочешь посмотреть)."
 )
+
+NOT_FOUND_MSG = "Не удалось получить данные."
+STALE_MSG = "⚠️ Кинопоиск сейчас недоступен, показаны данные от {}."
+
+TITLE_PROMPT = "Введи название {}, которое (-ую) хочешь посмотреть"
+GENRE_PROMPT = "Введи нужные жанры (если их несколько, то укажи их через запятую)."
+ACTOR_PROMPT = (
+    "Введи нужных актеров (если их несколько, то укажи их через запятую, без пробелов)"
+)
+YEAR_PROMPT = (
+    "Введи нужный год или диапазон годов (если вводишь "
+    "диапазон, то вводи в формате год-год)"
+)
+UNKNOWN_GENRE_MSG = "Не знаю жанр или страну «{}»."
+SUGGEST_MSG = "Возможно, ты имел (-а) в виду: {}"
+NO_RECOMMENDATIONS_MSG = "Подбор похожего сейчас недоступен 🥺"
+NOT_IN_CATALOG_MSG = "Не нашёл сериалы из твоего избранного в каталоге 🥺"
+NO_SIMILAR_MSG = "Не нашёл ничего похожего 🥺"
+FLOOD_MSG = "Слишком много сообщений подряд, подожди немного 🙏"
@@ -0,0 +1,445 @@
+"""Метрики бота в формате Prometheus.
+
+Собирает задержки обработчиков по маршрутам, задержки и статусы запросов к API,
+долю попаданий в кэши, задержки хранилища FSM и задержку цикла событий. Метрики
+отдаются по HTTP на METRICS_HOST:METRICS_PORT/metrics, METRICS_ENABLED=false
+отключает сбор целиком. Счётчики кэшей читаются из их собственной статистики
+только в момент запроса метрик, поэтому не замедляют обработку.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import time
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Any
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
+from aiogram.fsm.storage.base import BaseStorage
+from aiohttp import web
+from loguru import logger
+
+from film_bot.breaker import BreakerState
+from film_bot.config import config
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Iterator
+
+    from aiogram import Dispatcher
+    from aiogram.fsm.state import State
+    from aiogram.fsm.storage.base import StateType, StorageKey
+    from aiogram.types import TelegramObject
+
+    from film_bot.api import API
+    from film_bot.posters import PosterStore
+
+# Границы корзин гистограмм задержек в секундах
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Период проверки задержки цикла событий в секундах
+LOOP_LAG_INTERVAL = 0.5
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{v}"' for n, v in zip(names, values, strict=True))
+    return f"{{{pairs}}}"
+
+
+class Metric(ABC):
+    """Base of the metrics: name, help and label names."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, doc: str, labels: tuple[str, ...] = ()) -> None:
+        """Init metric and add it to the registry."""
+        self.name = name
+        self.doc = doc
+        self.label_names = labels
+        REGISTRY.append(self)
+
+    @abstractmethod
+    def samples(self) -> Iterator[str]:
+        """Lines of the exposition format."""
+
+    def render(self) -> str:
+        """Metric in the Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """Monotonic counter."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, doc: str, labels: tuple[str, ...] = ()) -> None:
+        """Init counter."""
+        super().__init__(name, doc, labels)
+        self.values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, value: float = 1) -> None:
+        """Increase the counter of the label values."""
+        self.values[labels] = self.values.get(labels, 0) + value
+
+    def samples(self) -> Iterator[str]:
+        """Lines of the exposition format."""
+        for labels, value in self.values.items():
+            yield f"{self.name}{_labels(self.label_names, labels)} {value}"
+
+
+class Gauge(Metric):
+    """Value read by a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        doc: str,
+        labels: tuple[str, ...] = (),
+        *,
+        kind: str = "gauge",
+    ) -> None:
+        """Init gauge.
+
+        :param kind: gauge, or counter for monotonic values read from stats
+        """
+        super().__init__(name, doc, labels)
+        self.kind = kind
+        self.callbacks: dict[tuple[str, ...], Callable[[], float]] = {}
+
+    def set_function(self, func: Callable[[], float], *labels: str) -> None:
+        """Read the value of the label values from func."""
+        self.callbacks[labels] = func
+
+    def samples(self) -> Iterator[str]:
+        """Lines of the exposition format."""
+        for labels, func in self.callbacks.items():
+            yield f"{self.name}{_labels(self.label_names, labels)} {func()}"
+
+
+class Histogram(Metric):
+    """Histogram with fixed buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        doc: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        """Init histogram."""
+        super().__init__(name, doc, labels)
+        self.buckets = buckets
+        # Counts by bucket (the last one is +Inf), sum and count by label values
+        self.values: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Add the value of the label values."""
+        item = self.values.get(labels)
+        if item is None:
+            item = self.values[labels] = [0] * (len(self.buckets) + 3)
+        item[bisect.bisect_left(self.buckets, value)] += 1
+        item[-2] += value
+        item[-1] += 1
+
+    def samples(self) -> Iterator[str]:
+        """Lines of the exposition format."""
+        names = (*self.label_names, "le")
+        for labels, item in self.values.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), item, strict=False):
+                cumulative += count
+                le = _labels(names, (*labels, str(bound)))
+                yield f"{self.name}_bucket{le} {cumulative}"
+            label_str = _labels(self.label_names, labels)
+            yield f"{self.name}_sum{label_str} {item[-2]}"
+            yield f"{self.name}_count{label_str} {item[-1]}"
+
+
+REGISTRY: list[Metric] = []
+
+HANDLER_SECONDS = Histogram(
+    "film_bot_handler_seconds",
+    "Время обработки обновления по маршрутам",
+    ("route",),
+)
+HANDLER_ERRORS = Counter(
+    "film_bot_handler_errors_total",
+    "Ошибки обработчиков по маршрутам",
+    ("route",),
+)
+API_SECONDS = Histogram(
+    "film_bot_api_request_seconds",
+    "Время запросов к API по эндпоинтам и статусам",
+    ("endpoint", "status"),
+)
+FSM_SECONDS = Histogram(
+    "film_bot_fsm_storage_seconds",
+    "Время операций хранилища FSM",
+    ("operation",),
+)
+LOOP_LAG_SECONDS = Histogram(
+    "film_bot_event_loop_lag_seconds",
+    "Задержка цикла событий",
+)
+CACHE_HITS = Gauge(
+    "film_bot_cache_hits_total",
+    "Попадания в кэши",
+    ("cache",),
+    kind="counter",
+)
+CACHE_MISSES = Gauge(
+    "film_bot_cache_misses_total",
+    "Промахи кэшей",
+    ("cache",),
+    kind="counter",
+)
+CACHE_HIT_RATIO = Gauge("film_bot_cache_hit_ratio", "Доля попаданий в кэши", ("cache",))
+API_STATE = Gauge("film_bot_api_state", "Состояние клиента API", ("value",))
+BREAKER_OPEN = Gauge(
+    "film_bot_api_breaker_open",
+    "Эндпоинт API отключён предохранителем",
+    ("endpoint",),
+)
+BREAKER_REJECTED = Gauge(
+    "film_bot_api_breaker_rejected_total",
+    "Запросы, отклонённые предохранителем",
+    ("endpoint",),
+    kind="counter",
+)
+LIMITER_WAITS = Gauge(
+    "film_bot_api_limiter_waits_total",
+    "Запросы к API, ждавшие ограничителя частоты",
+    kind="counter",
+)
+LIMITER_WAIT_SECONDS_TOTAL = Gauge(
+    "film_bot_api_limiter_wait_seconds_total",
+    "Суммарное ожидание ограничителя частоты",
+    kind="counter",
+)
+LIMITER_WAIT_SECONDS = Gauge(
+    "film_bot_api_limiter_wait_seconds",
+    "Ожидание ограничителя частоты: среднее и максимальное",
+    ("stat",),
+)
+API_CONNECTIONS = Gauge(
+    "film_bot_api_connections_total",
+    "Соединения с API: новые, повторно использованные и ждавшие пула",
+    ("kind",),
+    kind="counter",
+)
+API_POOL_WAIT_SECONDS = Gauge(
+    "film_bot_api_pool_wait_seconds_total",
+    "Суммарное ожидание свободного соединения в пуле",
+    kind="counter",
+)
+API_CONNECTION_REUSE = Gauge(
+    "film_bot_api_connection_reuse_ratio",
+    "Доля запросов к API по уже открытому соединению",
+)
+POSTER_BYTES = Gauge(
+    "film_bot_poster_bytes_total",
+    "Байты постеров: загруженные и не загруженные повторно благодаря file_id",
+    ("value",),
+    kind="counter",
+)
+POSTER_FAILURES = Gauge(
+    "film_bot_poster_failures_total",
+    "Постеры, вместо которых отправлена текстовая карточка",
+    kind="counter",
+)
+
+
+def render() -> str:
+    """Func to render all the metrics in the Prometheus text format."""
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+class MetricsMiddleware(BaseMiddleware):
+    """Measure handlers by route.
+
+    The route is the `route` flag of the handler or of the menu entry.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:  # noqa: ANN401
+        """Time the handler."""
+        entry = data.get("entry")
+        route = entry.route if entry is not None else get_flag(data, "route")
+        route = route or "other"
+        started_at = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            HANDLER_ERRORS.inc(route)
+            raise
+        finally:
+            HANDLER_SECONDS.observe(time.perf_counter() - started_at, route)
+
+
+class TimedStorage(BaseStorage):
+    """FSM storage wrapper that measures every operation."""
+
+    def __init__(self, storage: BaseStorage) -> None:
+        """Init wrapper of the storage."""
+        self.storage = storage
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        """Set state."""
+        started_at = time.perf_counter()
+        await self.storage.set_state(key, state)
+        FSM_SECONDS.observe(time.perf_counter() - started_at, "set_state")
+
+    async def get_state(self, key: StorageKey) -> str | State | None:
+        """Get state."""
+        started_at = time.perf_counter()
+        state = await self.storage.get_state(key)
+        FSM_SECONDS.observe(time.perf_counter() - started_at, "get_state")
+        return state
+
+    async def set_data(self, key: StorageKey, data: dict[str, Any]) -> None:
+        """Set data."""
+        started_at = time.perf_counter()
+        await self.storage.set_data(key, data)
+        FSM_SECONDS.observe(time.perf_counter() - started_at, "set_data")
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        """Get data."""
+        started_at = time.perf_counter()
+        data = await self.storage.get_data(key)
+        FSM_SECONDS.observe(time.perf_counter() - started_at, "get_data")
+        return data
+
+    async def close(self) -> None:
+        """Close the storage."""
+        await self.storage.close()
+
+
+def instrument_api(api: API) -> None:
+    """Func to add metrics of the API client."""
+
+    def observe(endpoint: str, status: int | None, seconds: float) -> None:
+        API_SECONDS.observe(seconds, endpoint, str(status or "error"))
+
+    api.observe_request = observe
+
+    caches = {
+        "responses": api.cache.stats,
+        "cards": api.formatter.stats,
+        "persons": api.person_ids.stats,
+        "titles": api.title_results.stats,
+    }
+    for name, stats in caches.items():
+        CACHE_HITS.set_function(lambda stats=stats: stats.hits, name)
+        CACHE_MISSES.set_function(lambda stats=stats: stats.misses, name)
+        CACHE_HIT_RATIO.set_function(lambda stats=stats: stats.hit_ratio, name)
+
+    API_STATE.set_function(lambda: api.coalesced, "coalesced")
+    API_STATE.set_function(lambda: len(api.random_pool), "random_pool")
+    API_STATE.set_function(lambda: api.limiter.stats.queue_depth, "limiter_queue")
+    limiter = api.limiter.stats
+    LIMITER_WAITS.set_function(lambda: limiter.waited)
+    LIMITER_WAIT_SECONDS_TOTAL.set_function(lambda: limiter.wait_time)
+    LIMITER_WAIT_SECONDS.set_function(lambda: limiter.avg_wait_time, "avg")
+    LIMITER_WAIT_SECONDS.set_function(lambda: limiter.max_wait_time, "max")
+    connections = api.connection_stats
+    API_CONNECTIONS.set_function(lambda: connections.created, "created")
+    API_CONNECTIONS.set_function(lambda: connections.reused, "reused")
+    API_CONNECTIONS.set_function(lambda: connections.queued, "queued")
+    API_POOL_WAIT_SECONDS.set_function(lambda: connections.pool_wait_time)
+    API_CONNECTION_REUSE.set_function(lambda: connections.reuse_ratio)
+    API_STATE.set_function(lambda: api.stale_served, "stale_served")
+    API_STATE.set_function(lambda: len(api.titles), "title_names")
+    if api.snapshot is not None:
+        API_STATE.set_function(lambda: len(api.snapshot), "snapshot_entries")
+    for endpoint, breaker in api.breakers.items():
+        BREAKER_OPEN.set_function(
+            lambda breaker=breaker: int(breaker.state is not BreakerState.CLOSED),
+            endpoint,
+        )
+        BREAKER_REJECTED.set_function(
+            lambda breaker=breaker: breaker.stats.rejected,
+            endpoint,
+        )
+
+
+def instrument_posters(posters: PosterStore) -> None:
+    """Func to add metrics of the poster file_id cache."""
+    stats = posters.stats
+    CACHE_HITS.set_function(lambda: stats.hits, "posters")
+    CACHE_MISSES.set_function(lambda: stats.misses, "posters")
+    CACHE_HIT_RATIO.set_function(lambda: stats.hit_ratio, "posters")
+    POSTER_BYTES.set_function(lambda: stats.bytes_saved, "saved")
+    POSTER_BYTES.set_function(lambda: stats.bytes_uploaded, "uploaded")
+    POSTER_FAILURES.set_function(lambda: stats.failures)
+
+
+class MetricsServer:
+    """HTTP server of the /metrics endpoint and event loop lag monitor."""
+
+    def __init__(self, host: str, port: int) -> None:
+        """Init server."""
+        self.host = host
+        self.port = port
+        self._runner: web.AppRunner | None = None
+        self._lag_task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        """Start serving."""
+        app = web.Application()
+        app.router.add_get("/metrics", self._metrics)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        self._lag_task = asyncio.create_task(self._monitor_lag())
+        logger.info("Метрики доступны на {}:{}/metrics", self.host, self.port)
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    @staticmethod
+    async def _metrics(_: web.Request) -> web.Response:
+        return web.Response(text=render(), content_type="text/plain", charset="utf-8")
+
+    @staticmethod
+    async def _monitor_lag() -> None:
+        """Measure how late the loop wakes up a sleeping task."""
+        loop = asyncio.get_running_loop()
+        while True:
+            started_at = loop.time()
+            await asyncio.sleep(LOOP_LAG_INTERVAL)
+            LOOP_LAG_SECONDS.observe(loop.time() - started_at - LOOP_LAG_INTERVAL)
+
+
+def setup(
+    dispatcher: Dispatcher,
+    api: API,
+    posters: PosterStore | None = None,
+) -> None:
+    """Func to add metrics to the dispatcher, the API client and the posters."""
+    middleware = MetricsMiddleware()
+    dispatcher.message.middleware(middleware)
+    dispatcher.callback_query.middleware(middleware)
+    dispatcher.inline_query.middleware(middleware)
+    instrument_api(api)
+    if posters is not None:
+        instrument_posters(posters)
+
+    server = MetricsServer(config.metrics_host, config.metrics_port)
+    dispatcher.startup.register(server.start)
+    dispatcher.shutdown.register(server.stop)
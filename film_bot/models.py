@@ -1,5 +1,10 @@
 """Just models."""
 
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
 from aiogram.fsm.state import State, StatesGroup
 
 
@@ -31,19 +36,86 @@ class FilmFromYearForm(StatesGroup):
     year = State()
 
 
-class Dorama:
-    def __init__(self, name: str, comments: str):
+class FavoriteAddForm(StatesGroup):
+    """Форма добавления сериала в избранное."""
+
+    kind = State()
+    name = State()
+    comment = State()
+
+
+class FavoriteListForm(StatesGroup):
+    """Форма просмотра списка избранного."""
+
+    kind = State()
+
+
+class FavoriteSimilarForm(StatesGroup):
+    """Форма подбора похожего на избранное."""
+
+    kind = State()
+
+
+class FavoriteDeleteForm(StatesGroup):
+    """Форма удаления сериала из избранного."""
+
+    kind = State()
+    name = State()
+
+
+@dataclass(slots=True, frozen=True)
+class Film:
+    """Фильм/сериал из ответа API, только поля, которые показывает бот."""
+
+    id: int | None
+    name: str
+    year: int | None
+    description: str
+    # URL of the poster preview, None if the film has no poster
+    poster: str | None = None
+
+    @classmethod
+    def from_doc(cls, doc: dict[str, Any]) -> Film:
+        """Extract film fields from the API document."""
+        return cls(
+            id=doc.get("id"),
+            name=doc.get("name") or doc.get("alternativeName") or "",
+            year=doc.get("year"),
+            description=doc.get("description") or "",
+            poster=(doc.get("poster") or {}).get("previewUrl"),
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class Card:
+    """Карточка фильма для отправки: текст и фильм (для постера)."""
+
+    text: str
+    film: Film
+
+
+class Favorite:
+    """Запись списка избранного."""
+
+    __slots__ = ("comments", "name")
+
+    def __init__(self, name: str, comments: str) -> None:
+        """Init record."""
         self.name = name
         self.comments = comments
 
-    def __str__(self):
+    def __str__(self) -> str:
+        """Format record for the favorites list."""
         return f"{self.name} - {self.comments}"
 
 
-class Anime:
-    def __init__(self, name: str, comments: str):
-        self.name = name
-        self.comments = comments
+class Dorama(Favorite):
+    """Дорама из списка избранного."""
+
+    __slots__ = ()
+
+
+class Anime(Favorite):
+    """Аниме из списка избранного."""
 
-    def __str__(self):
-        return f"{self.name}- {self.comments}"
+    __slots__ = ()
@@ -0,0 +1,101 @@
+"""Постраничный вывод результатов поиска.
+
+Результат поиска показывается по одной странице, листание - inline-кнопками
+"◀ ▶". Запросы хранятся в ограниченном LRU, в кнопках передаётся только его
+короткий идентификатор (callback data ограничена 64 байтами).
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from aiogram.filters.callback_data import CallbackData
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+from film_bot.cache import key_digest
+
+
+class PageCallback(CallbackData, prefix="page"):
+    """Callback data of the page buttons."""
+
+    query: str
+    page: int
+
+
+@dataclass(slots=True, frozen=True)
+class Query:
+    """Search query of the user.
+
+    :param search: kind of search: genre, actor or year
+    :param value: user's input
+    :param film_type: anime or dorama
+    """
+
+    search: str
+    value: str
+    film_type: str
+
+
+@dataclass(slots=True, frozen=True)
+class Page:
+    """One page of search results."""
+
+    text: str
+    number: int
+    has_next: bool
+    # False if some lookups are still running, e.g. slow search of an actor
+    complete: bool = True
+
+
+class QueryStore:
+    """LRU of queries by id used in the page buttons."""
+
+    def __init__(self, size: int = 10_000) -> None:
+        """Init store.
+
+        :param size: max count of stored queries
+        """
+        self.size = size
+        self._queries: OrderedDict[str, Query] = OrderedDict()
+
+    def __len__(self) -> int:
+        """Count of stored queries."""
+        return len(self._queries)
+
+    def add(self, query: Query) -> str:
+        """Store query, return its id."""
+        # The same query of different users gets the same id
+        query_id = key_digest((query.search, query.value, query.film_type))
+        self._queries[query_id] = query
+        self._queries.move_to_end(query_id)
+        while len(self._queries) > self.size:
+            self._queries.popitem(last=False)
+        return query_id
+
+    def get(self, query_id: str) -> Query | None:
+        """Get query by id or None if it was evicted."""
+        query = self._queries.get(query_id)
+        if query is not None:
+            self._queries.move_to_end(query_id)
+        return query
+
+
+def page_keyboard(query_id: str, page: Page) -> InlineKeyboardMarkup | None:
+    """Func to build "◀ ▶" buttons, None if there is only one page."""
+    buttons = []
+    if page.number > 1:
+        buttons.append(
+            InlineKeyboardButton(
+                text="◀",
+                callback_data=PageCallback(query=query_id, page=page.number - 1).pack(),
+            ),
+        )
+    if page.has_next:
+        buttons.append(
+            InlineKeyboardButton(
+                text="▶",
+                callback_data=PageCallback(query=query_id, page=page.number + 1).pack(),
+            ),
+        )
+    return InlineKeyboardMarkup(inline_keyboard=[buttons]) if buttons else None
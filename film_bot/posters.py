@@ -0,0 +1,260 @@
+"""Постеры фильмов.
+
+Карточка фильма отправляется фотографией постера (poster.previewUrl из ответа
+API). После первой загрузки Telegram возвращает file_id файла, он сохраняется в
+SQLite по id фильма, и следующие отправки того же постера используют file_id:
+постер не скачивается и не загружается повторно. Скачивание ограничено по числу
+одновременных загрузок, размеру и времени, при любой ошибке отправляется
+текстовая карточка.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from aiogram.exceptions import TelegramAPIError, TelegramBadRequest
+from aiogram.types import BufferedInputFile
+from aiohttp import ClientError, ClientSession, ClientTimeout, TCPConnector
+from loguru import logger
+from yarl import URL
+
+if TYPE_CHECKING:
+    from aiogram.types import Message
+
+    from film_bot.models import Card, Film
+
+# Максимальная длина подписи к фотографии, более длинная карточка отправляется
+# отдельным сообщением
+CAPTION_LIMIT = 1024
+CHUNK_SIZE = 64 * 1024
+
+SCHEMA = """
+PRAGMA journal_mode = WAL;
+CREATE TABLE IF NOT EXISTS posters (
+    film_id INTEGER PRIMARY KEY,
+    file_id TEXT NOT NULL,
+    size INTEGER NOT NULL
+);
+"""
+GET_SQL = "SELECT file_id, size FROM posters WHERE film_id = ?"
+SET_SQL = "INSERT OR REPLACE INTO posters (film_id, file_id, size) VALUES (?, ?, ?)"
+DELETE_SQL = "DELETE FROM posters WHERE film_id = ?"
+
+
+@dataclass
+class PosterStats:
+    """Poster metrics."""
+
+    # Sent by a saved file_id
+    hits: int = 0
+    # Downloaded and uploaded
+    misses: int = 0
+    # The text card was sent instead
+    failures: int = 0
+    # Bytes not downloaded and uploaded thanks to file_id and bytes uploaded
+    bytes_saved: int = 0
+    bytes_uploaded: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        """Share of the posters sent by file_id."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class PosterStore:
+    """Sender of the posters with file_id cache by film id."""
+
+    def __init__(  # noqa: PLR0913
+        self,
+        path: str,
+        *,
+        base_url: str,
+        concurrency: int,
+        max_bytes: int,
+        timeout: float,
+        parse_mode: str | None = None,
+        cache_size: int = 10_000,
+    ) -> None:
+        """Init store, the database and the HTTP session are opened by start().
+
+        :param path: database of file ids
+        :param base_url: URL relative poster links are resolved against
+        :param concurrency: max count of posters downloaded at the same time
+        :param max_bytes: larger posters are not downloaded
+        :param timeout: seconds to download one poster
+        :param parse_mode: parse mode of the captions
+        :param cache_size: max count of file ids kept in memory
+        """
+        self.path = path
+        self.base_url = URL(base_url)
+        self.concurrency = concurrency
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.parse_mode = parse_mode
+        self.cache_size = cache_size
+        self.stats = PosterStats()
+        # file_id and poster size by film id (LRU), loaded from the database on a miss
+        self._file_ids: OrderedDict[int, tuple[str, int]] = OrderedDict()
+        self._semaphore = asyncio.Semaphore(concurrency)
+        # Posters being downloaded, by film id
+        self._inflight: dict[int, asyncio.Task] = {}
+        self._connection: sqlite3.Connection | None = None
+        # The connection is used from the threads of asyncio.to_thread
+        self._lock = threading.Lock()
+        self._session: ClientSession | None = None
+
+    async def start(self) -> None:
+        """Open the database and the HTTP session."""
+        self._connection = await asyncio.to_thread(self._connect)
+        self._session = ClientSession(
+            connector=TCPConnector(limit=self.concurrency),
+            timeout=ClientTimeout(total=self.timeout),
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.executescript(SCHEMA)
+        return connection
+
+    async def stop(self) -> None:
+        """Close the HTTP session and the database."""
+        if self._inflight:
+            await asyncio.gather(*self._inflight.values(), return_exceptions=True)
+        if self._session is not None:
+            await self._session.close()
+        if self._connection is not None:
+            self._connection.close()
+        logger.info(
+            "Постеры: {:.0%} по file_id, сэкономлено {:.1f} МБ, загружено {:.1f} МБ",
+            self.stats.hit_ratio,
+            self.stats.bytes_saved / 2**20,
+            self.stats.bytes_uploaded / 2**20,
+        )
+
+    async def send(self, message: Message, card: Card) -> bool:
+        """Func to answer with the poster of the card.
+
+        :return: True if the text of the card was sent as the caption, False if
+            it should be sent as a message (no poster or the text is too long)
+        """
+        film = card.film
+        if film.id is None or not film.poster or self._session is None:
+            return False
+        caption = card.text if len(card.text) <= CAPTION_LIMIT else None
+
+        saved = await self._file_id(film.id)
+        if saved is not None:
+            file_id, size = saved
+            try:
+                await message.answer_photo(
+                    file_id,
+                    caption=caption,
+                    parse_mode=self.parse_mode,
+                )
+            except TelegramBadRequest as e:
+                # E.g. the file is from another bot, it is uploaded again
+                logger.warning("file_id постера {} не принят: {!r}", film.id, e)
+                await self._forget(film.id)
+            else:
+                self.stats.hits += 1
+                self.stats.bytes_saved += size
+                return caption is not None
+
+        data = await self._download(film)
+        if data is None:
+            self.stats.failures += 1
+            return False
+        try:
+            sent = await message.answer_photo(
+                BufferedInputFile(data, f"{film.id}.jpg"),
+                caption=caption,
+                parse_mode=self.parse_mode,
+            )
+        except TelegramAPIError as e:
+            logger.warning("Не удалось отправить постер {}: {!r}", film.id, e)
+            self.stats.failures += 1
+            return False
+        self.stats.misses += 1
+        self.stats.bytes_uploaded += len(data)
+        if sent.photo:
+            await self._save(film.id, sent.photo[-1].file_id, len(data))
+        return caption is not None
+
+    async def _file_id(self, film_id: int) -> tuple[str, int] | None:
+        """Get file_id and size of the poster, it may be saved by another worker."""
+        saved = self._file_ids.get(film_id)
+        if saved is not None:
+            self._file_ids.move_to_end(film_id)
+            return saved
+        row = await asyncio.to_thread(self._execute, GET_SQL, film_id)
+        if row is not None:
+            self._remember(film_id, row)
+        return row
+
+    async def _save(self, film_id: int, file_id: str, size: int) -> None:
+        self._remember(film_id, (file_id, size))
+        await asyncio.to_thread(self._execute, SET_SQL, film_id, file_id, size)
+
+    def _remember(self, film_id: int, saved: tuple[str, int]) -> None:
+        self._file_ids[film_id] = saved
+        self._file_ids.move_to_end(film_id)
+        if len(self._file_ids) > self.cache_size:
+            self._file_ids.popitem(last=False)
+
+    async def _forget(self, film_id: int) -> None:
+        self._file_ids.pop(film_id, None)
+        await asyncio.to_thread(self._execute, DELETE_SQL, film_id)
+
+    def _execute(self, sql: str, *args: str | int) -> tuple[str, int] | None:
+        try:
+            with self._lock, self._connection:
+                return self._connection.execute(sql, args).fetchone()
+        except sqlite3.Error as e:
+            logger.error("Ошибка базы данных постеров: {!r}", e)
+            return None
+
+    async def _download(self, film: Film) -> bytes | None:
+        """Download the poster, one download per film at a time."""
+        task = self._inflight.get(film.id)
+        if task is None:
+            url = self.base_url.join(URL(film.poster))
+            task = asyncio.create_task(self._fetch(url))
+            self._inflight[film.id] = task
+            task.add_done_callback(lambda _: self._inflight.pop(film.id, None))
+        return await asyncio.shield(task)
+
+    async def _fetch(self, url: URL) -> bytes | None:
+        """Download the image, None if it fails or is too large."""
+        async with self._semaphore:
+            try:
+                async with self._session.get(url) as response:
+                    image = response.content_type.startswith("image/")
+                    if response.status != 200 or not image:  # noqa: PLR2004
+                        logger.warning(
+                            "Постер {} недоступен: {} {}",
+                            url,
+                            response.status,
+                            response.content_type,
+                        )
+                        return None
+                    if (response.content_length or 0) > self.max_bytes:
+                        logger.warning("Постер {} слишком большой", url)
+                        return None
+                    chunks = []
+                    size = 0
+                    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                        size += len(chunk)
+                        if size > self.max_bytes:
+                            logger.warning("Постер {} слишком большой", url)
+                            return None
+                        chunks.append(chunk)
+            except (ClientError, TimeoutError) as e:
+                logger.warning("Ошибка загрузки постера {}: {!r}", url, e)
+                return None
+        return b"".join(chunks)
@@ -0,0 +1,262 @@
+"""Рекомендации "Похожее на моё избранное" по локальному каталогу.
+
+Каждый фильм каталога кодируется разреженным вектором признаков: жанры,
+страны, актёры и пятилетие выхода. Вес признака тем больше, чем реже он
+встречается (idf), признаки одного фильма не учитываются, строки нормированы.
+Избранное пользователя сводится к одному вектору, и косинусная близость ко всем
+фильмам каталога считается одним умножением разреженной матрицы на вектор.
+Результаты кэшируются для пользователя, пока не изменится его избранное.
+
+Нужны numpy и scipy: pip install film-bot[recommend].
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import defaultdict
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+from loguru import logger
+from scipy import sparse
+
+from film_bot.api import get_params
+from film_bot.cache import ResponseCache
+from film_bot.vocabulary import normalize
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from film_bot.catalog import Catalog
+
+FILM_TYPES = ("аниме", "дорама")
+# Вес признаков каждого вида, годы и страны важны меньше жанров и актёров
+FEATURE_WEIGHTS = {"genre": 1.0, "country": 0.5, "person": 1.0, "year": 0.5}
+# Ширина интервала годов выхода
+YEAR_BUCKET = 5
+
+
+class SimilarityIndex:
+    """Sparse feature matrix of the catalog and top-K cosine similarity."""
+
+    def __init__(
+        self,
+        films: list[tuple[int, str | None, int | None, list[str]]],
+        links: Iterable[tuple[str, int, Any]],
+    ) -> None:
+        """Build index.
+
+        :param films: id, type, year and names of every film (Catalog.films)
+        :param links: (kind, film id, value) of genres, countries and persons
+        """
+        self.ids = np.fromiter((film[0] for film in films), np.int64, len(films))
+        row_of = {film_id: i for i, film_id in enumerate(self.ids.tolist())}
+        # Rows of the films by normalized name
+        self.names: dict[str, list[int]] = defaultdict(list)
+        for i, (_, _, _, names) in enumerate(films):
+            for name in dict.fromkeys(map(normalize, names)):
+                self.names[name].append(i)
+
+        columns: dict[tuple[str, Any], int] = {}
+        rows: list[int] = []
+        cols: list[int] = []
+        countries: dict[str, list[int]] = defaultdict(list)
+        for kind, film_id, value in links:
+            i = row_of.get(film_id)
+            if i is None:
+                continue
+            rows.append(i)
+            cols.append(columns.setdefault((kind, value), len(columns)))
+            if kind == "country":
+                countries[value].append(i)
+        for i, (_, _, year, _) in enumerate(films):
+            if year:
+                rows.append(i)
+                key = ("year", year // YEAR_BUCKET)
+                cols.append(columns.setdefault(key, len(columns)))
+
+        self.matrix = self._weigh(rows, cols, columns, len(films))
+        self.masks = {
+            film_type: self._mask(film_type, films, countries)
+            for film_type in FILM_TYPES
+        }
+
+    def __len__(self) -> int:
+        """Count of films."""
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory of the matrix."""
+        m = self.matrix
+        return m.data.nbytes + m.indices.nbytes + m.indptr.nbytes
+
+    @staticmethod
+    def _weigh(
+        rows: list[int],
+        cols: list[int],
+        columns: dict[tuple[str, Any], int],
+        count: int,
+    ) -> sparse.csr_array:
+        """Build the idf weighted matrix with normalized rows."""
+        matrix = sparse.csr_array(
+            (np.ones(len(rows), np.float32), (rows, cols)),
+            shape=(count, len(columns)),
+        )
+        matrix.sum_duplicates()
+        matrix.data[:] = 1
+        # A feature of one film (e.g. an episodic actor) makes nothing similar
+        df = np.bincount(matrix.indices, minlength=len(columns))
+        kinds = np.array([FEATURE_WEIGHTS[kind] for kind, _ in columns], np.float32)
+        weights = kinds * np.log(count / np.maximum(df, 1), dtype=np.float32)
+        weights[df < 2] = 0  # noqa: PLR2004
+        matrix.data *= weights[matrix.indices]
+        matrix.eliminate_zeros()
+
+        norms = np.sqrt(matrix.multiply(matrix).sum(axis=1))
+        norms[norms == 0] = 1
+        return sparse.csr_array(
+            sparse.diags_array(1 / norms.astype(np.float32)) @ matrix,
+        )
+
+    @staticmethod
+    def _mask(
+        film_type: str,
+        films: list[tuple[int, str | None, int | None, list[str]]],
+        countries: dict[str, list[int]],
+    ) -> np.ndarray:
+        """Films of the film type by the same filters as get_params."""
+        params = get_params(film_type)
+        types = set(params.get("type", ()))
+        mask = np.fromiter(
+            (not types or film[1] in types for film in films),
+            bool,
+            len(films),
+        )
+        if names := params.get("countries.name"):
+            country = np.zeros(len(films), bool)
+            for name in names:
+                country[countries.get(name, [])] = True
+            mask &= country
+        return mask
+
+    def rows(self, names: Iterable[str], film_type: str) -> list[int]:
+        """Rows of the films by names, films of the film type go first."""
+        mask = self.masks[film_type]
+        rows = []
+        for name in names:
+            found = self.names.get(normalize(name))
+            if found:
+                rows.append(next((i for i in found if mask[i]), found[0]))
+        return rows
+
+    def similar(self, rows: list[int], film_type: str | None, k: int) -> list[int]:
+        """Ids of the films most similar to all of the rows, the closest first.
+
+        :param film_type: anime or dorama, None - films of any type
+        """
+        profile = np.asarray(self.matrix[rows].sum(axis=0)).ravel()
+        scores = self.matrix @ profile
+        if film_type is not None:
+            scores[~self.masks[film_type]] = 0
+        scores[rows] = 0
+        k = min(k, np.count_nonzero(scores > 0))
+        if not k:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return self.ids[top].tolist()
+
+
+class Recommender:
+    """Recommendations of the catalog films similar to the user's favorites."""
+
+    def __init__(
+        self,
+        catalog: Catalog,
+        *,
+        count: int,
+        cache_size: int,
+        cache_ttl: float,
+    ) -> None:
+        """Init recommender, the index is built by start().
+
+        :param count: count of recommended films
+        :param cache_size: count of users with cached recommendations
+        :param cache_ttl: seconds the recommendations of the user are kept
+        """
+        self.catalog = catalog
+        self.count = count
+        self.cache_ttl = cache_ttl
+        # Favorites and recommended ids by (chat_id, film type), size 1 each
+        self.cache = ResponseCache(cache_size)
+        # None until the index is built
+        self.index: SimilarityIndex | None = None
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        """Build the index in the background, the bot does not wait for it."""
+        self._task = asyncio.create_task(self._load())
+
+    async def stop(self) -> None:
+        """Stop building the index."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _load(self) -> None:
+        """Build the index of the catalog in a thread."""
+        started_at = time.perf_counter()
+        try:
+            self.index = await asyncio.to_thread(self._build)
+        except Exception:  # noqa: BLE001
+            logger.exception("Не удалось построить индекс рекомендаций")
+            return
+        logger.info(
+            "Индекс рекомендаций: {} фильмов, {} признаков, {:.1f} МБ за {:.1f} с",
+            len(self.index),
+            self.index.matrix.shape[1],
+            self.index.nbytes / 2**20,
+            time.perf_counter() - started_at,
+        )
+
+    def _build(self) -> SimilarityIndex:
+        links = (
+            (kind, film_id, value)
+            for kind in ("genre", "country", "person")
+            for film_id, value in self.catalog.links(kind)
+        )
+        return SimilarityIndex(self.catalog.films(), links)
+
+    async def recommend(
+        self,
+        chat_id: int,
+        film_type: str,
+        names: list[str],
+    ) -> list[dict[str, Any]] | None:
+        """Func to get films similar to the favorites.
+
+        :param film_type: anime or dorama
+        :param names: names of the favorites
+        :return: catalog documents, None if no favorite is in the catalog
+        """
+        if self.index is None:
+            return None
+        key = (chat_id, film_type)
+        favorites = tuple(sorted(names))
+        cached = self.cache.get(key)
+        if cached is not None and cached[0] == favorites:
+            ids = cached[1]
+        else:
+            rows = self.index.rows(names, film_type)
+            if not rows:
+                return None
+            ids = await asyncio.to_thread(
+                self.index.similar,
+                rows,
+                film_type,
+                self.count,
+            )
+            self.cache.set(key, (favorites, ids), 1, self.cache_ttl)
+        return await asyncio.to_thread(self.catalog.get_many, ids)
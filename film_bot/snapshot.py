@@ -0,0 +1,193 @@
+"""Снимок удачных ответов API на диске.
+
+Тела удачных ответов дописываются в файл, который читается через mmap, поэтому
+снимок переживает перезапуск бота, а чтение не требует системных вызовов и не
+держит ответы в памяти процесса. Пока API недоступно, ответы отдаются из
+снимка с пометкой о том, когда они были сохранены.
+
+Формат файла: заголовок MAGIC, затем записи из ключа (16 байт key_digest),
+времени сохранения, длины тела и самого тела. Новый ответ того же ключа
+дописывается в конец, при превышении объёма файл переписывается только со
+свежими записями.
+"""
+
+from __future__ import annotations
+
+import mmap
+import struct
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, BinaryIO
+
+from loguru import logger
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+MAGIC = b"FBSNAP1\n"
+# Ключ, время сохранения (unix time) и длина тела
+RECORD = struct.Struct("<16sdI")
+
+
+class StaleResponse(dict):
+    """Decoded response taken from the snapshot instead of the API."""
+
+    def __init__(self, data: dict[str, Any], saved_at: float) -> None:
+        """Init response.
+
+        :param data: decoded response
+        :param saved_at: unix time when the response was received
+        """
+        super().__init__(data)
+        self.saved_at = saved_at
+
+
+class ResponseSnapshot:
+    """Append-only memory-mapped file of the latest response of every key."""
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int,
+        max_age: float,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """Init snapshot, the file is read by open().
+
+        :param path: snapshot file
+        :param max_bytes: file size that triggers compaction
+        :param max_age: seconds a response may be served after it was saved
+        :param clock: wall clock, the snapshot outlives the process
+        """
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.size = 0
+        self._clock = clock
+        self._file: BinaryIO | None = None
+        self._map: mmap.mmap | None = None
+        # Body offset, body length and save time by key
+        self._index: dict[bytes, tuple[int, int, float]] = {}
+
+    def __len__(self) -> int:
+        """Count of saved responses."""
+        return len(self._index)
+
+    def open(self) -> None:
+        """Open the file and index its records, a broken tail is cut off."""
+        try:
+            self._open()
+        except OSError as e:
+            logger.warning("Снимок ответов API недоступен: {!r}", e)
+            self.close()
+
+    def _open(self) -> None:
+        self._file = self.path.open("a+b")
+        if self.path.stat().st_size < len(MAGIC):
+            self._file.truncate(0)
+            self._file.write(MAGIC)
+            self._file.flush()
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[: len(MAGIC)] != MAGIC:
+            logger.warning("Неизвестный формат снимка {}, он очищен", self.path)
+            self._reset()
+            return
+
+        offset = len(MAGIC)
+        while offset + RECORD.size <= len(self._map):
+            key, saved_at, length = RECORD.unpack_from(self._map, offset)
+            start = offset + RECORD.size
+            if start + length > len(self._map):
+                break
+            self._index[key] = (start, length, saved_at)
+            offset = start + length
+        if offset < len(self._map):
+            # Written partially, e.g. the process was killed
+            self._file.truncate(offset)
+            self._remap()
+        self.size = offset
+        logger.info("Снимок ответов API: {} записей", len(self._index))
+
+    def close(self) -> None:
+        """Close the file."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def get(self, key: str) -> tuple[bytes, float] | None:
+        """Get body and save time of the key or None if it is missing or too old.
+
+        :param key: key_digest of the request
+        """
+        item = self._index.get(bytes.fromhex(key))
+        if item is None or self._map is None:
+            return None
+        start, length, saved_at = item
+        if saved_at + self.max_age < self._clock():
+            return None
+        if start + length > len(self._map):
+            # Appended after the file was mapped
+            self._remap()
+        return self._map[start : start + length], saved_at
+
+    def set(self, key: str, body: bytes) -> None:
+        """Save the body of a successful response.
+
+        :param key: key_digest of the request
+        """
+        if self._file is None or len(body) > self.max_bytes // 2:
+            return
+        now = self._clock()
+        record = RECORD.pack(bytes.fromhex(key), now, len(body))
+        try:
+            self._file.write(record + body)
+            self._file.flush()
+        except OSError as e:
+            logger.warning("Не удалось сохранить ответ в снимок: {!r}", e)
+            return
+        self._index[bytes.fromhex(key)] = (self.size + RECORD.size, len(body), now)
+        self.size += len(record) + len(body)
+        if self.size > self.max_bytes:
+            self._compact()
+
+    def _remap(self) -> None:
+        self._map.close()
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _reset(self) -> None:
+        """Replace the file with an empty snapshot."""
+        self._map.close()
+        self._file.truncate(0)
+        self._file.write(MAGIC)
+        self._file.flush()
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._index.clear()
+        self.size = len(MAGIC)
+
+    def _compact(self) -> None:
+        """Rewrite the file with the newest responses, up to half of max_bytes."""
+        self._remap()
+        expired_at = self._clock() - self.max_age
+        newest = sorted(self._index.items(), key=lambda item: -item[1][2])
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        size = len(MAGIC)
+        try:
+            with tmp.open("wb") as file:
+                file.write(MAGIC)
+                for key, (start, length, saved_at) in newest:
+                    if saved_at < expired_at or size > self.max_bytes // 2:
+                        break
+                    file.write(RECORD.pack(key, saved_at, length))
+                    file.write(self._map[start : start + length])
+                    size += RECORD.size + length
+            tmp.replace(self.path)
+        except OSError as e:
+            logger.warning("Не удалось сжать снимок ответов API: {!r}", e)
+            return
+        # Indexing the new file
+        self.close()
+        self._index.clear()
+        self.open()
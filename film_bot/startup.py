@@ -0,0 +1,135 @@
+"""Профилирование запуска бота.
+
+В режиме `python -m film_bot --profile-startup` замеряется время импорта каждого
+модуля (собственное и вместе с вложенными импортами), время до готовности бота
+(выполнены обработчики startup) и время до обработки первого обновления. Отчёт
+пишется в лог после первого обновления, бот продолжает работать.
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from importlib.abc import Loader, MetaPathFinder
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Sequence
+    from importlib.machinery import ModuleSpec
+    from types import ModuleType
+
+    from aiogram import Dispatcher
+    from aiogram.types import TelegramObject
+
+# Количество самых медленных модулей в отчёте
+TOP_MODULES = 15
+
+
+class _TimedLoader(Loader):
+    """Loader wrapper measuring execution of the module."""
+
+    def __init__(self, loader: Loader, name: str, profiler: ImportProfiler) -> None:
+        self.loader = loader
+        self.name = name
+        self.profiler = profiler
+
+    def __getattr__(self, name: str) -> Any:  # noqa: ANN401
+        return getattr(self.loader, name)
+
+    def create_module(self, spec: ModuleSpec) -> ModuleType | None:
+        """Create module with the wrapped loader."""
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module: ModuleType) -> None:
+        """Execute module and record its time."""
+        stack = self.profiler.stack
+        stack.append(0.0)
+        started_at = time.perf_counter()
+        try:
+            self.loader.exec_module(module)
+        finally:
+            total = time.perf_counter() - started_at
+            nested = stack.pop()
+            self.profiler.modules[self.name] = (total - nested, total)
+            if stack:
+                stack[-1] += total
+
+
+class ImportProfiler(MetaPathFinder):
+    """Meta path finder recording import time of every module."""
+
+    def __init__(self) -> None:
+        """Init profiler, the time of the process start is now."""
+        self.started_at = time.perf_counter()
+        # Own and cumulative seconds by module name
+        self.modules: dict[str, tuple[float, float]] = {}
+        self.stack: list[float] = []
+        self.ready_at: float | None = None
+        self.first_update_at: float | None = None
+
+    def find_spec(
+        self,
+        fullname: str,
+        path: Sequence[str] | None,
+        target: ModuleType | None = None,
+    ) -> ModuleSpec | None:
+        """Find the spec with the other finders and wrap its loader."""
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is None:
+                continue
+            if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                spec.loader = _TimedLoader(spec.loader, fullname, self)
+            return spec
+        return None
+
+    def enable(self) -> None:
+        """Start recording imports."""
+        sys.meta_path.insert(0, self)
+
+    def disable(self) -> None:
+        """Stop recording imports."""
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def setup(self, dispatcher: Dispatcher) -> None:
+        """Record readiness and the first update of the dispatcher."""
+        dispatcher.startup.register(self._ready)
+        dispatcher.update.outer_middleware(self._first_update)
+
+    async def _ready(self) -> None:
+        self.ready_at = time.perf_counter()
+
+    async def _first_update(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:  # noqa: ANN401
+        try:
+            return await handler(event, data)
+        finally:
+            if self.first_update_at is None:
+                self.first_update_at = time.perf_counter()
+                self.disable()
+                from loguru import logger  # noqa: PLC0415
+
+                logger.info("Профиль запуска:\n{}", self.report())
+
+    def report(self, top: int = TOP_MODULES) -> str:
+        """Text report of the slowest imports and startup milestones."""
+        lines = [f"{'модуль':<48} {'своё, мс':>9} {'всего, мс':>10}"]
+        slowest = sorted(self.modules.items(), key=lambda item: -item[1][0])
+        for name, (own, total) in slowest[:top]:
+            lines.append(f"{name:<48} {own * 1000:9.1f} {total * 1000:10.1f}")
+        imports = sum(own for own, _ in self.modules.values())
+        lines.append(f"Импорт {len(self.modules)} модулей: {imports * 1000:.0f} мс")
+        for title, at in (
+            ("Готов к работе", self.ready_at),
+            ("Первое обновление обработано", self.first_update_at),
+        ):
+            if at is not None:
+                lines.append(f"{title}: {(at - self.started_at) * 1000:.0f} мс")
+        return "\n".join(lines)
@@ -0,0 +1,102 @@
+"""Общие для нескольких процессов хранилища: состояния FSM и кэш ответов API.
+
+Если задан REDIS_URL, состояния FSM и кэш ответов хранятся в Redis (или любом
+сервере с протоколом Redis), иначе - в памяти процесса.
+"""
+
+from __future__ import annotations
+
+import time
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING
+
+from aiogram.fsm.storage.memory import MemoryStorage
+from loguru import logger
+
+from film_bot.config import config
+
+if TYPE_CHECKING:
+    from aiogram.fsm.storage.base import BaseStorage
+    from redis.asyncio import Redis
+
+KEY_PREFIX = "film_bot:cache:"
+
+
+class SharedCache(ABC):
+    """Cache of raw API responses shared by the workers."""
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes | None:
+        """Get value or None."""
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        """Put value for `ttl` seconds."""
+
+
+class MemorySharedCache(SharedCache):
+    """In-process implementation, e.g. for tests and a single worker."""
+
+    def __init__(self) -> None:
+        """Init cache."""
+        self._items: dict[str, tuple[float, bytes]] = {}
+
+    async def get(self, key: str) -> bytes | None:
+        """Get value or None."""
+        item = self._items.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._items[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        """Put value for `ttl` seconds."""
+        self._items[key] = (time.monotonic() + ttl, value)
+
+
+class RedisSharedCache(SharedCache):
+    """Implementation over the Redis protocol.
+
+    Errors of the server are logged and treated as a miss, so an unavailable
+    Redis only disables sharing of the cache.
+    """
+
+    def __init__(self, redis: Redis) -> None:
+        """Init cache with redis.asyncio client."""
+        from redis.exceptions import RedisError  # noqa: PLC0415
+
+        self.redis = redis
+        self._errors = (RedisError, OSError)
+
+    async def get(self, key: str) -> bytes | None:
+        """Get value or None."""
+        try:
+            return await self.redis.get(KEY_PREFIX + key)
+        except self._errors as e:
+            logger.warning("Общий кэш недоступен: {!r}", e)
+            return None
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        """Put value for `ttl` seconds."""
+        try:
+            await self.redis.set(KEY_PREFIX + key, value, px=int(ttl * 1000))
+        except self._errors as e:
+            logger.warning("Общий кэш недоступен: {!r}", e)
+
+
+def create_storages() -> tuple[BaseStorage, SharedCache | None]:
+    """Func to create FSM storage and shared response cache by config.
+
+    :return: FSM storage and shared cache (None - only local cache is used)
+    """
+    # Empty REDIS_URL= in .env means no Redis as well
+    if not config.redis_url:
+        return MemoryStorage(), None
+
+    from aiogram.fsm.storage.redis import RedisStorage  # noqa: PLC0415
+
+    storage = RedisStorage.from_url(config.redis_url)
+    return storage, RedisSharedCache(storage.redis)
@@ -0,0 +1,217 @@
+"""Инкрементальная синхронизация локального каталога с кинопоиском.
+
+Записи запрашиваются постранично в порядке возрастания updatedAt, каждая страница
+сразу сохраняется в каталог, а курсор (updatedAt последней сохранённой записи)
+записывается в каталог, поэтому после перезапуска синхронизация продолжается с
+места остановки:
+
+    python -m film_bot.sync --db catalog.db --concurrency 4 --rate 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING, Any
+
+from loguru import logger
+
+from film_bot.api import API, get_params
+from film_bot.catalog import Catalog
+from film_bot.limiter import Priority, TokenBucket
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+PAGE_LIMIT = 250
+# Курсор по умолчанию - синхронизация с самого начала
+START_CURSOR = "1970-01-01T00:00:00.000Z"
+FILM_TYPES = ("аниме", "дорама")
+
+
+def _api_date(cursor: str) -> str:
+    """Func to convert ISO cursor to the API date format (dd.mm.yyyy)."""
+    return datetime.fromisoformat(cursor).strftime("%d.%m.%Y")
+
+
+@dataclass
+class SyncStats:
+    """Sync progress counters."""
+
+    pages: int = 0
+    records: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since start."""
+        return time.monotonic() - self.started_at
+
+    @property
+    def pages_per_sec(self) -> float:
+        """Pages per second."""
+        return self.pages / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def records_per_sec(self) -> float:
+        """Records per second."""
+        return self.records / self.elapsed if self.elapsed else 0.0
+
+
+class CatalogSync:
+    """Sync job for the local catalog."""
+
+    def __init__(
+        self,
+        api: API,
+        catalog: Catalog,
+        *,
+        concurrency: int = 4,
+        rate: float = 3.0,
+        limit: int = PAGE_LIMIT,
+    ) -> None:
+        """Init sync job.
+
+        :param concurrency: max count of simultaneous requests
+        :param rate: max count of requests per second (on top of the API limit)
+        :param limit: records per page
+        """
+        self.api = api
+        self.catalog = catalog
+        self.concurrency = concurrency
+        self.limit = limit
+        self.rate_limit = TokenBucket(rate, 1)
+        self.stats = SyncStats()
+        # Catalog connection is shared, so pages are written one by one
+        self._write_lock = asyncio.Lock()
+
+    async def run(self, film_types: Iterable[str] = FILM_TYPES) -> SyncStats:
+        """Sync all film types."""
+        for film_type in film_types:
+            await self.sync(film_type)
+
+        logger.info(
+            "Синхронизация завершена: {} стр. ({:.1f}/с), {} записей ({:.1f}/с)",
+            self.stats.pages,
+            self.stats.pages_per_sec,
+            self.stats.records,
+            self.stats.records_per_sec,
+        )
+        return self.stats
+
+    async def sync(self, film_type: str) -> None:
+        """Sync one film type starting from the saved cursor."""
+        state_name = f"cursor:{film_type}"
+        cursor = self.catalog.get_state(state_name) or START_CURSOR
+        today = datetime.now(UTC).strftime("%d.%m.%Y")
+
+        params = get_params(film_type)
+        params["sortField"] = "updatedAt"
+        params["sortType"] = "1"
+        params["updatedAt"] = f"{_api_date(cursor)}-{today}"
+        params["limit"] = self.limit
+
+        # The first page tells how many pages there are
+        last = await self._load_page(params, 1)
+        if last is None:
+            return
+        pages, last_updated = last
+        if last_updated:
+            await self._save_cursor(state_name, last_updated)
+
+        # Cursors of the loaded pages, the checkpoint moves only over a
+        # contiguous prefix, so no page is skipped after a restart
+        done: dict[int, str | None] = {}
+        checkpoint = 1
+        next_page = iter(range(2, pages + 1))
+
+        async def worker() -> None:
+            nonlocal checkpoint
+            for page in next_page:
+                result = await self._load_page(params, page)
+                if result is None:
+                    # Failed page stops the checkpoint from moving
+                    return
+                done[page] = result[1]
+
+                cursor = None
+                while checkpoint + 1 in done:
+                    checkpoint += 1
+                    cursor = done.pop(checkpoint) or cursor
+                if cursor:
+                    await self._save_cursor(state_name, cursor)
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+
+    async def _save_cursor(self, state_name: str, cursor: str) -> None:
+        """Save checkpoint to the catalog."""
+        async with self._write_lock:
+            await asyncio.to_thread(self.catalog.set_state, state_name, cursor)
+
+    async def _load_page(
+        self,
+        params: dict[str, Any],
+        page: int,
+    ) -> tuple[int, str | None] | None:
+        """Load a page and save it to the catalog.
+
+        :return: total count of pages and updatedAt of the last record
+        """
+        await self.rate_limit.acquire(Priority.BACKGROUND)
+        data = await self.api._request(  # noqa: SLF001
+            "movie",
+            {**params, "page": page},
+            cache=False,
+            priority=Priority.BACKGROUND,
+        )
+        if data is None:
+            logger.error("Не удалось загрузить страницу {}", page)
+            return None
+
+        docs = data["docs"]
+        async with self._write_lock:
+            await asyncio.to_thread(self.catalog.ingest, docs)
+
+        self.stats.pages += 1
+        self.stats.records += len(docs)
+        logger.debug(
+            "Страница {}/{}: {} записей, {:.1f} стр./с, {:.1f} записей/с",
+            page,
+            data["pages"],
+            len(docs),
+            self.stats.pages_per_sec,
+            self.stats.records_per_sec,
+        )
+        return data["pages"], docs[-1].get("updatedAt") if docs else None
+
+
+async def main() -> None:
+    """Sync command."""
+    parser = argparse.ArgumentParser(description="Синхронизация каталога")
+    parser.add_argument("--db", default="catalog.db", help="путь к базе каталога")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=3.0, help="запросов в секунду")
+    parser.add_argument("--limit", type=int, default=PAGE_LIMIT)
+    args = parser.parse_args()
+
+    api = API()
+    await api.init()
+    catalog = Catalog(args.db)
+    try:
+        await CatalogSync(
+            api,
+            catalog,
+            concurrency=args.concurrency,
+            rate=args.rate,
+            limit=args.limit,
+        ).run()
+    finally:
+        await api.close()
+        catalog.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,173 @@
+"""Индекс названий для автодополнения в inline-режиме.
+
+Названия и альтернативные названия фильмов хранятся в памяти: отсортированный
+список слов с номерами названий, в которых они встречаются, и индекс триграмм.
+Запрос "naruto shipp" находит названия, в которых есть слово "naruto" и слово,
+начинающееся с "shipp"; если таких мало, добавляются похожие по триграммам
+(запрос с опечаткой). Индекс строится из локального каталога и пополняется
+фильмами из ответов API.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import math
+from array import array
+from bisect import bisect_left
+from typing import TYPE_CHECKING
+
+from film_bot.vocabulary import normalize, trigrams
+
+if TYPE_CHECKING:
+    from collections.abc import Hashable, Iterable
+
+# Сколько названий просматривается для короткого запроса (например, одной буквы)
+# и для запроса с опечаткой
+SCAN_LIMIT = 1000
+# Доля общих с запросом триграмм, начиная с которой название считается похожим
+MIN_SIMILARITY = 0.5
+# Поиск по триграммам выполняется для запросов не короче
+MIN_TRIGRAM_QUERY = 3
+
+
+class TitleIndex:
+    """Word prefix and trigram index of film names."""
+
+    def __init__(self) -> None:
+        """Init empty index."""
+        # Normalized name and film id of every entry
+        self.entries: list[tuple[str, int]] = []
+        self._known: set[tuple[str, int]] = set()
+        # Sorted distinct words and numbers of the entries having them
+        self._words: list[str] = []
+        self._sorted = True
+        self._postings: dict[str, array] = {}
+        self._trigrams: dict[str, array] = {}
+
+    def __len__(self) -> int:
+        """Count of names."""
+        return len(self.entries)
+
+    def add(self, film_id: int, names: Iterable[str]) -> None:
+        """Add names of the film, known names are skipped."""
+        for name in names:
+            key = normalize(name)
+            if not key or (key, film_id) in self._known:
+                continue
+            self._known.add((key, film_id))
+            entry = len(self.entries)
+            self.entries.append((key, film_id))
+            for word in set(key.split()):
+                postings = self._postings.get(word)
+                if postings is None:
+                    postings = self._postings[word] = array("I")
+                    self._words.append(word)
+                    self._sorted = False
+                postings.append(entry)
+            for trigram in trigrams(key):
+                postings = self._trigrams.get(trigram)
+                if postings is None:
+                    postings = self._trigrams[trigram] = array("I")
+                postings.append(entry)
+
+    def search(self, query: str, limit: int) -> list[int]:
+        """Ids of the films with names matching the query, the best first.
+
+        Names starting with the query go first, then names having its words. If
+        there are none, names similar by trigrams are found.
+        """
+        key = normalize(query)
+        if not key:
+            return []
+        entries = self._prefix(key)
+        entries.sort(key=lambda e: self._rank(key, e))
+        ids = list(dict.fromkeys(self.entries[e][1] for e in entries))
+        if not ids and len(key) >= MIN_TRIGRAM_QUERY:
+            # Nothing starts with the key, it may have a typo
+            return self._similar(key, limit)
+        return ids[:limit]
+
+    def _rank(self, key: str, entry: int) -> tuple[bool, int]:
+        name = self.entries[entry][0]
+        return not name.startswith(key), len(name)
+
+    def _prefix(self, key: str) -> list[int]:
+        """Entries having all words of the key, the last one as a prefix."""
+        *words, last = key.split()
+        if words:
+            found: set[int] | None = None
+            for word in words:
+                postings = self._postings.get(word)
+                if postings is None:
+                    return []
+                found = set(postings) if found is None else found & set(postings)
+            # A word of the name starts with the last word of the key
+            last = f" {last}"
+            return [e for e in found if last in f" {self.entries[e][0]}"]
+
+        if not self._sorted:
+            self._words.sort()
+            self._sorted = True
+        entries: list[int] = []
+        i = bisect_left(self._words, last)
+        while (
+            i < len(self._words)
+            and self._words[i].startswith(last)
+            and len(entries) < SCAN_LIMIT
+        ):
+            entries.extend(self._postings[self._words[i]])
+            i += 1
+        return list(dict.fromkeys(entries))[:SCAN_LIMIT]
+
+    def _similar(self, key: str, limit: int) -> list[int]:
+        """Ids of the films with names sharing most trigrams with the key.
+
+        A name sharing the required part of the trigrams has at least one of the
+        rarest ones, so only their entries are checked.
+        """
+        grams = trigrams(key)
+        # The key is a prefix, its end is not the end of a name
+        grams.discard(f"{key[-2:]} ")
+        need = math.ceil(len(grams) * MIN_SIMILARITY)
+        postings = sorted((self._trigrams.get(g, ()) for g in grams), key=len)
+        # Entries of the rarest trigrams first, up to the limit
+        rarest = itertools.chain.from_iterable(postings[: len(grams) - need + 1])
+        scored = []
+        for entry in dict.fromkeys(itertools.islice(rarest, SCAN_LIMIT)):
+            name = self.entries[entry][0]
+            # Padded as by trigrams
+            padded = f"  {name} "
+            shared = sum(gram in padded for gram in grams)
+            if shared >= need:
+                scored.append((-shared, len(name), entry))
+        ids: list[int] = []
+        for *_, entry in heapq.nsmallest(limit * 2, scored):
+            film_id = self.entries[entry][1]
+            if film_id not in ids:
+                ids.append(film_id)
+        return ids[:limit]
+
+
+class Debouncer:
+    """Let through only the last of the calls of a key made within the delay."""
+
+    def __init__(self, delay: float) -> None:
+        """Init debouncer.
+
+        :param delay: seconds without a newer call of the key
+        """
+        self.delay = delay
+        self._calls: dict[Hashable, int] = {}
+        self._counter = itertools.count()
+
+    async def wait(self, key: Hashable) -> bool:
+        """Wait for the delay, False if a newer call of the key was made."""
+        call = next(self._counter)
+        self._calls[key] = call
+        await asyncio.sleep(self.delay)
+        if self._calls.get(key) != call:
+            return False
+        del self._calls[key]
+        return True
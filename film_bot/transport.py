@@ -0,0 +1,97 @@
+"""Настройки HTTP транспорта для запросов к API.
+
+Пул соединений, таймауты, кэш DNS и статистика переиспользования соединений.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from aiohttp import ClientSession, ClientTimeout, TCPConnector, TraceConfig
+
+from film_bot.config import config
+
+if TYPE_CHECKING:
+    from types import SimpleNamespace
+
+    from aiohttp import TraceConnectionQueuedEndParams, TraceConnectionQueuedStartParams
+
+
+@dataclass
+class ConnectionStats:
+    """Connection pool metrics."""
+
+    created: int = 0
+    reused: int = 0
+    queued: int = 0
+    pool_wait_time: float = 0.0
+
+    @property
+    def reuse_ratio(self) -> float:
+        """Share of requests served by an already open connection."""
+        total = self.created + self.reused
+        return self.reused / total if total else 0.0
+
+
+def _trace_config(stats: ConnectionStats) -> TraceConfig:
+    """Func to build aiohttp trace hooks that fill the stats."""
+    trace = TraceConfig()
+
+    async def on_create(*_: object) -> None:
+        stats.created += 1
+
+    async def on_reuse(*_: object) -> None:
+        stats.reused += 1
+
+    async def on_queued_start(
+        _: ClientSession,
+        ctx: SimpleNamespace,
+        __: TraceConnectionQueuedStartParams,
+    ) -> None:
+        stats.queued += 1
+        ctx.queued_at = time.monotonic()
+
+    async def on_queued_end(
+        _: ClientSession,
+        ctx: SimpleNamespace,
+        __: TraceConnectionQueuedEndParams,
+    ) -> None:
+        stats.pool_wait_time += time.monotonic() - ctx.queued_at
+
+    trace.on_connection_create_end.append(on_create)
+    trace.on_connection_reuseconn.append(on_reuse)
+    trace.on_connection_queued_start.append(on_queued_start)
+    trace.on_connection_queued_end.append(on_queued_end)
+    return trace
+
+
+def create_session(
+    base_url: str,
+    headers: dict[str, str],
+    stats: ConnectionStats,
+) -> ClientSession:
+    """Func to create a session with tuned connection pool.
+
+    :param headers: headers sent with every request
+    :param stats: connection metrics to fill
+    """
+    connector = TCPConnector(
+        limit=config.http_pool_size,
+        limit_per_host=config.http_pool_per_host,
+        ttl_dns_cache=config.http_dns_cache_ttl,
+        keepalive_timeout=config.http_keepalive_timeout,
+    )
+    timeout = ClientTimeout(
+        connect=config.http_connect_timeout,
+        sock_read=config.http_read_timeout,
+    )
+    return ClientSession(
+        base_url=base_url,
+        connector=connector,
+        timeout=timeout,
+        headers={**headers, "Accept-Encoding": "gzip, deflate"},
+        auto_decompress=True,
+        trace_configs=[_trace_config(stats)],
+    )
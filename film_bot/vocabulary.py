@@ -0,0 +1,257 @@
+"""Словари жанров и стран с поиском, устойчивым к опечаткам.
+
+Ввод пользователя приводится к каноническому названию до запроса к API:
+регистр, "ё", лишние пробелы и знаки не важны, опечатка в одну-три буквы
+исправляется. Кандидаты ищутся по индексу триграмм, расстояние Левенштейна
+считается только для них. Если близкого названия нет, предлагаются похожие без
+обращения к сети.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+# Жанры kinopoisk.dev
+GENRES = (
+    "аниме",
+    "биография",
+    "боевик",
+    "вестерн",
+    "военный",
+    "детектив",
+    "детский",
+    "для взрослых",
+    "документальный",
+    "драма",
+    "игра",
+    "история",
+    "комедия",
+    "концерт",
+    "короткометражка",
+    "криминал",
+    "мелодрама",
+    "музыка",
+    "мультфильм",
+    "мюзикл",
+    "новости",
+    "приключения",
+    "реальное ТВ",
+    "семейный",
+    "спорт",
+    "ток-шоу",
+    "триллер",
+    "ужасы",
+    "фантастика",
+    "фильм-нуар",
+    "фэнтези",
+    "церемония",
+)
+GENRE_ALIASES = {
+    "фентези": "фэнтези",
+    "ужастик": "ужасы",
+    "романтика": "мелодрама",
+    "мультик": "мультфильм",
+    "мультсериал": "мультфильм",
+    "документалка": "документальный",
+    "нуар": "фильм-нуар",
+    "военные": "военный",
+}
+# Страны, в которых снимают аниме и дорамы, и самые частые остальные
+COUNTRIES = (
+    "Япония",
+    "Корея Южная",
+    "Китай",
+    "Тайвань",
+    "Гонконг",
+    "Таиланд",
+    "Филиппины",
+    "Индия",
+    "США",
+    "Великобритания",
+    "Франция",
+    "Германия",
+    "Италия",
+    "Испания",
+    "Канада",
+    "Россия",
+    "СССР",
+    "Турция",
+)
+COUNTRY_ALIASES = {
+    "корея": "Корея Южная",
+    "южная корея": "Корея Южная",
+    "кндр": "Корея Северная",
+    "сша": "США",
+    "америка": "США",
+    "англия": "Великобритания",
+    "тайланд": "Таиланд",
+}
+
+_WORDS = re.compile(r"[\w-]+")
+
+
+def normalize(text: str) -> str:
+    """Func to normalize text: case, "ё", spaces, emoji and punctuation."""
+    return " ".join(_WORDS.findall(text.casefold().replace("ё", "е")))
+
+
+def trigrams(text: str) -> set[str]:
+    """Func to get trigrams of the normalized text, padded at the edges."""
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def max_distance(text: str) -> int:
+    """Func to get the number of typos allowed in the text of such length."""
+    return max(1, min(3, len(text) // 4))
+
+
+def distance(a: str, b: str, limit: int) -> int:
+    """Func to get Levenshtein distance, or limit + 1 if it is larger."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char in enumerate(a, 1):
+        current = [i]
+        for j, other in enumerate(b, 1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (char != other),
+                ),
+            )
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return min(previous[-1], limit + 1)
+
+
+class Vocabulary:
+    """Names with a trigram index for typo-tolerant lookup."""
+
+    def __init__(
+        self,
+        names: Iterable[str],
+        aliases: dict[str, str] | None = None,
+    ) -> None:
+        """Init vocabulary.
+
+        :param names: canonical names
+        :param aliases: other spellings of the names
+        """
+        # Canonical name by normalized name or alias
+        self.names: dict[str, str] = {normalize(name): name for name in names}
+        for alias, name in (aliases or {}).items():
+            self.names[normalize(alias)] = name
+        self._keys = list(self.names)
+        self._index: dict[str, list[int]] = defaultdict(list)
+        self._sizes: dict[str, int] = {}
+        for i, key in enumerate(self._keys):
+            key_trigrams = trigrams(key)
+            self._sizes[key] = len(key_trigrams)
+            for trigram in key_trigrams:
+                self._index[trigram].append(i)
+
+    def __len__(self) -> int:
+        """Count of names and aliases."""
+        return len(self._keys)
+
+    def _candidates(self, key: str) -> list[tuple[int, str]]:
+        """Keys sharing trigrams with the key, the most similar first."""
+        shared = Counter(i for t in trigrams(key) for i in self._index.get(t, ()))
+        return [(count, self._keys[i]) for i, count in shared.most_common()]
+
+    def match(self, text: str) -> str | None:
+        """Canonical name of the text or None if there is no close one.
+
+        A typo is corrected only if one name is closer than the others.
+        """
+        key = normalize(text)
+        name = self.names.get(key)
+        if name is not None or not key:
+            return name
+
+        limit = max_distance(key)
+        size = len(trigrams(key))
+        found: dict[str, int] = {}
+        for shared, candidate in self._candidates(key):
+            # Every typo changes at most 3 trigrams, farther names are skipped
+            if shared >= max(size, self._sizes[candidate]) - 3 * limit:
+                found[candidate] = distance(key, candidate, limit)
+        best = sorted((d, self.names[k]) for k, d in found.items() if d <= limit)
+        if not best or (len(best) > 1 and best[0][0] == best[1][0]):
+            return None
+        return best[0][1]
+
+    def suggest(self, text: str, limit: int = 3) -> list[str]:
+        """Canonical names similar to the text, the closest first."""
+        key = normalize(text)
+
+        def rank(item: tuple[int, str]) -> tuple[int, int]:
+            shared, candidate = item
+            return distance(key, candidate, len(key) + len(candidate)), -shared
+
+        ranked = sorted(self._candidates(key), key=rank)
+        suggestions: list[str] = []
+        for _, candidate in ranked:
+            name = self.names[candidate]
+            if name not in suggestions:
+                suggestions.append(name)
+            if len(suggestions) == limit:
+                break
+        return suggestions
+
+
+GENRE_VOCABULARY = Vocabulary(GENRES, GENRE_ALIASES)
+COUNTRY_VOCABULARY = Vocabulary(COUNTRIES, COUNTRY_ALIASES)
+
+
+@dataclass(slots=True, frozen=True)
+class GenreQuery:
+    """Genre search input split into known genres and countries."""
+
+    genres: tuple[str, ...]
+    countries: tuple[str, ...]
+    # Parts of the input without a close genre or country
+    unknown: tuple[str, ...]
+
+
+def parse_genres(text: str) -> GenreQuery:
+    """Func to split comma separated input into canonical genres and countries."""
+    genres: list[str] = []
+    countries: list[str] = []
+    unknown: list[str] = []
+    for part in text.split(","):
+        key = normalize(part)
+        if not key:
+            continue
+        # An exact name of either vocabulary goes before a corrected typo
+        genre = GENRE_VOCABULARY.names.get(key)
+        country = None if genre else COUNTRY_VOCABULARY.names.get(key)
+        if genre is None and country is None:
+            genre = GENRE_VOCABULARY.match(key)
+            country = None if genre else COUNTRY_VOCABULARY.match(key)
+        if genre is not None:
+            genres.append(genre)
+        elif country is not None:
+            countries.append(country)
+        else:
+            unknown.append(part.strip())
+    return GenreQuery(
+        tuple(dict.fromkeys(genres)),
+        tuple(dict.fromkeys(countries)),
+        tuple(unknown),
+    )
+
+
+def suggest(text: str, limit: int = 3) -> list[str]:
+    """Func to get genres, then countries similar to the text."""
+    suggestions = GENRE_VOCABULARY.suggest(text, limit)
+    return suggestions or COUNTRY_VOCABULARY.suggest(text, limit)
@@ -0,0 +1,201 @@
+"""Фоновый прогрев кэша.
+
+Держит запас случайных аниме и дорам, чтобы кнопка "Случайное" отвечала из
+памяти, и заранее загружает самые популярные за последнее время поиски по жанру
+и году. Запросы прогрева идут с фоновым приоритетом и собственным ограничением
+частоты, поэтому не мешают запросам пользователей. Статистика поисков
+сохраняется в файл, поэтому после перезапуска прогреваются те же запросы.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+from collections import Counter, deque
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from loguru import logger
+
+from film_bot.limiter import Priority, TokenBucket
+from film_bot.pages import Query
+
+if TYPE_CHECKING:
+    from film_bot.api import API
+
+FILM_TYPES = ("аниме", "дорама")
+# Поиски, результат которых одинаков для всех пользователей
+WARM_SEARCHES = frozenset({"genre", "year"})
+# Множитель популярности за каждый цикл прогрева, старые поиски постепенно забываются
+DECAY = 0.5
+MIN_SCORE = 0.1
+
+
+class RandomPool:
+    """Prefetched random films by film type."""
+
+    def __init__(self, size: int) -> None:
+        """Init pool.
+
+        :param size: count of films of every type, refilled at a quarter
+        """
+        self.size = size
+        # Set when the pool needs a refill
+        self.low = asyncio.Event()
+        self.low.set()
+        self._films: dict[str, deque[dict[str, Any]]] = {t: deque() for t in FILM_TYPES}
+
+    def __len__(self) -> int:
+        """Count of films of all types."""
+        return sum(map(len, self._films.values()))
+
+    def take(self, film_type: str) -> dict[str, Any] | None:
+        """Take a film or None if the pool is empty."""
+        films = self._films.get(film_type)
+        if films is None:
+            return None
+        doc = films.popleft() if films else None
+        if len(films) <= self.size // 4:
+            self.low.set()
+        return doc
+
+    def put(self, film_type: str, doc: dict[str, Any]) -> bool:
+        """Add a film, False if it is already in the pool."""
+        films = self._films[film_type]
+        if any(film.get("id") == doc.get("id") for film in films):
+            return False
+        films.append(doc)
+        return True
+
+    def missing(self, film_type: str) -> int:
+        """Count of films to add to fill the pool."""
+        return max(0, self.size - len(self._films[film_type]))
+
+
+class CacheWarmer:
+    """Background refill of the random pool and warming of popular searches."""
+
+    def __init__(  # noqa: PLR0913
+        self,
+        api: API,
+        *,
+        rate: float,
+        interval: float,
+        top_k: int,
+        state_path: str | None = None,
+        warm_searches: bool = True,
+    ) -> None:
+        """Init warmer.
+
+        :param rate: max requests per second of the warmer
+        :param interval: seconds between warming cycles
+        :param top_k: count of the most popular searches to warm
+        :param state_path: JSON file for search popularity, None - do not save
+        :param warm_searches: False - only refill the random pool
+        """
+        self.api = api
+        self.rate_limit = TokenBucket(rate, 1)
+        self.interval = interval
+        self.top_k = top_k
+        self.state_path = Path(state_path) if state_path else None
+        self.warm_searches = warm_searches
+        self.usage: Counter[tuple[str, str, str]] = Counter()
+        self._tasks: list[asyncio.Task] = []
+
+    def record(self, query: Query) -> None:
+        """Count the search of the user."""
+        if self.warm_searches and query.search in WARM_SEARCHES:
+            value = query.value.strip().casefold()
+            self.usage[query.search, value, query.film_type] += 1
+
+    def top(self) -> list[Query]:
+        """Most popular searches."""
+        return [Query(*key) for key, _ in self.usage.most_common(self.top_k)]
+
+    async def start(self) -> None:
+        """Load popularity and start background tasks."""
+        self._tasks = [asyncio.create_task(self._fill_pool())]
+        if not self.warm_searches:
+            return
+        self._load()
+        if not self.usage:
+            # Nothing is known after the first start, the current year is a guess
+            year = str(datetime.now(UTC).year)
+            for film_type in FILM_TYPES:
+                self.usage["year", year, film_type] = MIN_SCORE
+        self._tasks.append(asyncio.create_task(self._warm()))
+
+    async def stop(self) -> None:
+        """Stop background tasks and save popularity."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self.warm_searches:
+            self._save()
+
+    async def _fill_pool(self) -> None:
+        """Refill the random pool when it runs low."""
+        pool = self.api.random_pool
+        while True:
+            # Refilling at least every interval, e.g. after errors of the API
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(pool.low.wait(), self.interval)
+            pool.low.clear()
+
+            for film_type in FILM_TYPES:
+                # Duplicates are possible, attempts are limited
+                for _ in range(pool.missing(film_type) * 2):
+                    if not pool.missing(film_type):
+                        break
+                    await self.rate_limit.acquire(Priority.BACKGROUND)
+                    try:
+                        doc = await self.api.random_doc(film_type, Priority.BACKGROUND)
+                    except Exception:  # noqa: BLE001
+                        logger.exception("Ошибка пополнения случайных фильмов")
+                        doc = None
+                    if doc is None:
+                        break
+                    pool.put(film_type, doc)
+
+    async def _warm(self) -> None:
+        """Warm the first pages of popular searches every interval."""
+        while True:
+            for query in self.top():
+                await self.rate_limit.acquire(Priority.BACKGROUND)
+                try:
+                    await self.api.search(query, priority=Priority.BACKGROUND)
+                except Exception:  # noqa: BLE001
+                    logger.exception("Ошибка прогрева поиска {}", query)
+
+            # Forgetting old searches
+            for key in list(self.usage):
+                self.usage[key] *= DECAY
+                if self.usage[key] < MIN_SCORE:
+                    del self.usage[key]
+            self._save()
+            await asyncio.sleep(self.interval)
+
+    def _load(self) -> None:
+        """Load popularity of searches from the file."""
+        if self.state_path is None or not self.state_path.exists():
+            return
+        try:
+            items = json.loads(self.state_path.read_text(encoding="utf-8"))
+            self.usage = Counter({(s, v, t): score for s, v, t, score in items})
+        except (OSError, ValueError) as e:
+            logger.warning("Не удалось загрузить статистику поисков: {!r}", e)
+
+    def _save(self) -> None:
+        """Save popularity of searches to the file."""
+        if self.state_path is None:
+            return
+        items = [[*key, score] for key, score in self.usage.most_common()]
+        # Written aside and renamed, so a stop while saving keeps the old file
+        tmp = self.state_path.with_suffix(self.state_path.suffix + ".tmp")
+        try:
+            tmp.write_text(json.dumps(items, ensure_ascii=False), encoding="utf-8")
+            tmp.replace(self.state_path)
+        except OSError as e:
+            logger.warning("Не удалось сохранить статистику поисков: {!r}", e)
@@ -0,0 +1,125 @@
+"""Получение обновлений через вебхук вместо long polling.
+
+Обновления принимает aiohttp сервер, запросы без верного секретного токена
+отклоняются. При остановке сервер дожидается обработки уже принятых обновлений.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import secrets
+import signal
+from typing import TYPE_CHECKING
+
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+from loguru import logger
+
+from film_bot.config import config
+
+if TYPE_CHECKING:
+    from aiogram import Bot, Dispatcher
+
+
+class WebhookHandler(SimpleRequestHandler):
+    """Request handler that finishes accepted updates on shutdown."""
+
+    async def close(self) -> None:
+        """Wait for updates in progress, then close bot session."""
+        if self._background_feed_update_tasks:
+            logger.info(
+                "Ожидание обработки {} обновлений",
+                len(self._background_feed_update_tasks),
+            )
+            await asyncio.wait(
+                self._background_feed_update_tasks,
+                timeout=config.webhook_shutdown_timeout,
+            )
+        await super().close()
+
+
+def create_app(
+    dispatcher: Dispatcher,
+    bot: Bot,
+    secret_token: str | None,
+    *,
+    handle_in_background: bool = True,
+) -> web.Application:
+    """Func to build aiohttp application serving the webhook.
+
+    :param secret_token: expected X-Telegram-Bot-Api-Secret-Token header
+    :param handle_in_background: answer Telegram before the handler finishes
+    """
+    app = web.Application()
+    # Registered before the dispatcher hooks, so updates in progress are
+    # finished before API session and database are closed
+    WebhookHandler(
+        dispatcher=dispatcher,
+        bot=bot,
+        secret_token=secret_token,
+        handle_in_background=handle_in_background,
+    ).register(app, path=config.webhook_path)
+    setup_application(app, dispatcher, bot=bot)
+    return app
+
+
+def get_secret_token() -> str:
+    """Func to get WEBHOOK_SECRET or generate one if the bot sets the webhook.
+
+    Without WEBHOOK_URL the webhook is set manually, so the secret must be known.
+    """
+    if config.webhook_secret:
+        return config.webhook_secret
+    if not config.webhook_url:
+        msg = "WEBHOOK_SECRET обязателен, если WEBHOOK_URL не задан"
+        raise ValueError(msg)
+    return secrets.token_urlsafe(32)
+
+
+async def set_webhook(bot: Bot, secret_token: str, allowed_updates: list[str]) -> None:
+    """Func to register WEBHOOK_URL in Telegram."""
+    # Empty WEBHOOK_URL= in .env means unset as well
+    if not config.webhook_url:
+        logger.warning("WEBHOOK_URL не задан, вебхук нужно установить вручную")
+        return
+    await bot.set_webhook(
+        f"{config.webhook_url.rstrip('/')}{config.webhook_path}",
+        secret_token=secret_token,
+        allowed_updates=allowed_updates,
+    )
+
+
+async def serve(app: web.Application) -> None:
+    """Serve the application on WEBHOOK_HOST:WEBHOOK_PORT until SIGINT/SIGTERM."""
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, config.webhook_host, config.webhook_port)
+    await site.start()
+    logger.info(
+        "Вебхук слушает {}:{}{}",
+        config.webhook_host,
+        config.webhook_port,
+        config.webhook_path,
+    )
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    try:
+        await stop.wait()
+    finally:
+        logger.info("Остановка вебхука")
+        await runner.cleanup()
+
+
+async def run_webhook(dispatcher: Dispatcher, bot: Bot) -> None:
+    """Serve the webhook until SIGINT/SIGTERM."""
+    secret_token = get_secret_token()
+
+    async def on_startup(bot: Bot) -> None:
+        await set_webhook(bot, secret_token, dispatcher.resolve_used_update_types())
+
+    dispatcher.startup.register(on_startup)
+    await serve(create_app(dispatcher, bot, secret_token))
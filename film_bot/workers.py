@@ -0,0 +1,304 @@
+"""Запуск бота в нескольких процессах.
+
+Главный процесс получает обновления (long polling или вебхук) и раздаёт их
+воркерам по chat_id: обновления одного чата всегда попадают в один воркер и
+обрабатываются в нём по порядку, разные чаты обрабатываются параллельно.
+Состояния FSM и кэш ответов API общие для воркеров, если задан REDIS_URL:
+
+    python -m film_bot.workers --workers 4 --mode webhook
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import multiprocessing
+import os
+import queue
+import secrets
+import signal
+from typing import TYPE_CHECKING, Any
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramNetworkError, TelegramServerError
+from aiogram.types import Update
+from aiohttp import ClientError, web
+from loguru import logger
+
+from film_bot.config import config
+from film_bot.limiter import backoff
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Hashable
+    from multiprocessing.queues import Queue
+
+# Поля обновления, из которых берётся чат (или пользователь) для распределения
+UPDATE_FIELDS = (
+    "message",
+    "edited_message",
+    "callback_query",
+    "inline_query",
+    "chosen_inline_result",
+    "my_chat_member",
+    "chat_member",
+)
+QUEUE_SIZE = 10_000
+# Пауза перед повтором getUpdates после ошибки сети или сервера Telegram, с
+POLL_RETRY_DELAY = 1.0
+POLL_RETRY_MAX_DELAY = 5.0
+
+
+def chat_key(update: dict[str, Any]) -> int:
+    """Func to get chat (or user) id of the raw update."""
+    for field in UPDATE_FIELDS:
+        event = update.get(field)
+        if not event:
+            continue
+        chat = event.get("chat") or (event.get("message") or {}).get("chat")
+        if chat:
+            return chat["id"]
+        if user := event.get("from"):
+            return user["id"]
+    return update["update_id"]
+
+
+class ChatSequencer:
+    """Run tasks of one chat one after another, of different chats in parallel."""
+
+    def __init__(self, limit: int = 100) -> None:
+        """Init sequencer.
+
+        :param limit: max count of updates processed at the same time
+        """
+        self._tails: dict[Hashable, asyncio.Task] = {}
+        self._semaphore = asyncio.Semaphore(limit)
+
+    def submit(self, chat_id: Hashable, func: Callable[[], Awaitable[Any]]) -> None:
+        """Schedule func after the previous task of the chat."""
+        previous = self._tails.get(chat_id)
+
+        async def run() -> None:
+            if previous is not None:
+                await asyncio.wait([previous])
+            async with self._semaphore:
+                try:
+                    await func()
+                except Exception:  # noqa: BLE001
+                    logger.exception("Ошибка обработки обновления чата {}", chat_id)
+
+        task = asyncio.create_task(run())
+        self._tails[chat_id] = task
+        task.add_done_callback(lambda t: self._forget(chat_id, t))
+
+    def _forget(self, chat_id: Hashable, task: asyncio.Task) -> None:
+        # Only the last task of the chat is kept
+        if self._tails.get(chat_id) is task:
+            del self._tails[chat_id]
+
+    async def join(self) -> None:
+        """Wait for all scheduled tasks."""
+        while self._tails:
+            await asyncio.wait(list(self._tails.values()))
+
+
+async def _serve_worker(updates: Queue) -> None:
+    """Process updates from the queue with the bot dispatcher."""
+    from film_bot.main import dp  # noqa: PLC0415
+
+    bot = Bot(token=config.telegam_bot_token)
+    await dp.emit_startup(bot=bot, dispatcher=dp)
+    sequencer = ChatSequencer()
+    loop = asyncio.get_running_loop()
+    try:
+        while (raw := await loop.run_in_executor(None, updates.get)) is not None:
+            update = Update.model_validate(raw, context={"bot": bot})
+            # Inline queries do not wait for each other, a newer query of the user
+            # supersedes the one waiting for a pause in typing
+            inline = "inline_query" in raw
+            key = ("inline", raw["update_id"]) if inline else chat_key(raw)
+            sequencer.submit(key, lambda update=update: dp.feed_update(bot, update))
+        await sequencer.join()
+    finally:
+        await dp.emit_shutdown(bot=bot, dispatcher=dp)
+        await bot.session.close()
+
+
+def _worker(index: int, updates: Queue, workers: int) -> None:
+    """Worker process entry point."""
+    # The main process stops workers through the queue
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Every worker serves its metrics on its own port
+    config.metrics_port += index
+    # and writes its own snapshot of API responses
+    if config.snapshot_path:
+        config.snapshot_path = f"{config.snapshot_path}.{index}"
+    # Popular searches are warmed by one worker: it saves one popularity file,
+    # and the warmed responses are shared by the workers through REDIS_URL.
+    # The random pool is in the memory of every worker, each one refills its own
+    config.warmer_searches = config.warmer_searches and index == 0
+    # The limit of outgoing messages is shared by all the workers
+    config.send_rate /= workers
+    logger.info("Воркер {} запущен, pid {}", index, os.getpid())
+    asyncio.run(_serve_worker(updates))
+
+
+class Router:
+    """Distribute raw updates to the workers by chat."""
+
+    def __init__(self, queues: list[Queue]) -> None:
+        """Init router with the queues of the workers."""
+        self.queues = queues
+
+    async def put(self, raw: dict[str, Any]) -> None:
+        """Send update to the worker of its chat."""
+        updates = self.queues[chat_key(raw) % len(self.queues)]
+        try:
+            updates.put_nowait(raw)
+        except queue.Full:
+            await asyncio.get_running_loop().run_in_executor(None, updates.put, raw)
+
+
+async def _poll(router: Router) -> None:
+    """Get updates with long polling until SIGINT/SIGTERM."""
+    # The handlers are enough here, the app is built by the workers only
+    from film_bot.main import router as handlers  # noqa: PLC0415
+
+    bot = Bot(token=config.telegam_bot_token)
+    await bot.delete_webhook()
+    allowed_updates = handlers.resolve_used_update_types()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    offset = None
+    failures = 0
+    try:
+        while not stop.is_set():
+            get_updates = asyncio.ensure_future(
+                bot.get_updates(
+                    offset=offset,
+                    timeout=30,
+                    allowed_updates=allowed_updates,
+                ),
+            )
+            stopped = asyncio.ensure_future(stop.wait())
+            await asyncio.wait(
+                [get_updates, stopped],
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not get_updates.done():
+                get_updates.cancel()
+                break
+            stopped.cancel()
+
+            try:
+                result = get_updates.result()
+            except (TelegramNetworkError, TelegramServerError, ClientError) as e:
+                # As the aiogram polling does: wait and request again
+                delay = backoff(failures, POLL_RETRY_DELAY, POLL_RETRY_MAX_DELAY)
+                failures += 1
+                logger.warning(
+                    "Ошибка получения обновлений: {!r}, повтор через {:.1f} с",
+                    e,
+                    delay,
+                )
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(stop.wait(), delay)
+                continue
+            failures = 0
+
+            for update in result:
+                offset = update.update_id + 1
+                await router.put(update.model_dump(mode="json", exclude_unset=True))
+    finally:
+        await bot.session.close()
+
+
+async def _webhook(router: Router) -> None:
+    """Receive updates with the webhook until SIGINT/SIGTERM."""
+    from film_bot.main import router as handlers  # noqa: PLC0415
+    from film_bot.webhook import (  # noqa: PLC0415
+        get_secret_token,
+        serve,
+        set_webhook,
+    )
+
+    secret_token = get_secret_token()
+
+    async def handle(request: web.Request) -> web.Response:
+        header = request.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+        if not secrets.compare_digest(header, secret_token):
+            return web.Response(status=401)
+        try:
+            raw = await request.json()
+            # Checked here, an invalid update would stop the worker
+            Update.model_validate(raw)
+        except ValueError:
+            return web.Response(status=400)
+        await router.put(raw)
+        return web.Response()
+
+    async def on_startup(_: web.Application) -> None:
+        bot = Bot(token=config.telegam_bot_token)
+        await set_webhook(bot, secret_token, handlers.resolve_used_update_types())
+        await bot.session.close()
+
+    app = web.Application()
+    app.router.add_post(config.webhook_path, handle)
+    app.on_startup.append(on_startup)
+    await serve(app)
+
+
+def main() -> None:
+    """Start workers and receive updates in the main process."""
+    parser = argparse.ArgumentParser(description="Запуск нескольких воркеров бота")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--mode",
+        choices=("polling", "webhook"),
+        default=config.bot_mode,
+        help="способ получения обновлений (по умолчанию BOT_MODE из .env)",
+    )
+    args = parser.parse_args()
+
+    if not config.redis_url and args.workers > 1:
+        logger.warning(
+            "REDIS_URL не задан: у каждого воркера свой кэш ответов API",
+        )
+
+    context = multiprocessing.get_context("spawn")
+    queues = [context.Queue(QUEUE_SIZE) for _ in range(args.workers)]
+    processes = [
+        context.Process(
+            target=_worker,
+            args=(i, updates, args.workers),
+            name=f"film-bot-{i}",
+        )
+        for i, updates in enumerate(queues)
+    ]
+    for process in processes:
+        process.start()
+
+    router = Router(queues)
+    try:
+        asyncio.run(_webhook(router) if args.mode == "webhook" else _poll(router))
+    finally:
+        # Workers finish queued updates and stop
+        for updates, process in zip(queues, processes, strict=True):
+            try:
+                updates.put_nowait(None)
+            except queue.Full:
+                logger.warning(
+                    "Очередь воркера {} переполнена, он остановлен без неё",
+                    process.name,
+                )
+                process.terminate()
+        for process in processes:
+            process.join()
+
+
+if __name__ == "__main__":
+    main()
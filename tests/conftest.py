@@ -0,0 +1,79 @@
+"""Общие фикстуры: часы, настройки без .env и клиент API фейкового сервера."""
+
+from __future__ import annotations
+
+import contextlib
+from typing import TYPE_CHECKING
+
+import pytest
+from aiohttp.test_utils import TestServer
+
+from film_bot.api import API
+from film_bot.config import get_config
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Callable, Iterator
+    from contextlib import AbstractAsyncContextManager
+    from pathlib import Path
+
+    from benchmarks.fake_kinopoisk import FakeKinopoisk
+    from film_bot.storage import SharedCache
+
+
+class Clock:
+    """Time source moved by the test."""
+
+    def __init__(self) -> None:
+        """Init clock at zero."""
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """Get current time."""
+        return self.now
+
+
+@pytest.fixture
+def clock() -> Clock:
+    """Clock for the classes taking a time source."""
+    return Clock()
+
+
+@pytest.fixture
+def env(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    """Config without .env and files of the bot, API limits out of the way."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("TELEGAM_BOT_TOKEN", "1:fake")
+    monkeypatch.setenv("KINOPOISK_API_KEY", "fake")
+    monkeypatch.setenv("SNAPSHOT_PATH", "")
+    monkeypatch.setenv("API_RATE", "1000")
+    monkeypatch.setenv("API_BURST", "1000")
+    get_config.cache_clear()
+    yield
+    get_config.cache_clear()
+
+
+@pytest.fixture
+def serve_api(
+    env: None,  # noqa: ARG001
+    monkeypatch: pytest.MonkeyPatch,
+) -> Callable[..., AbstractAsyncContextManager[API]]:
+    """Start the fake server and an API client of it, in the running loop."""
+
+    @contextlib.asynccontextmanager
+    async def serve(
+        fake: FakeKinopoisk,
+        shared_cache: SharedCache | None = None,
+    ) -> AsyncIterator[API]:
+        server = TestServer(fake.app())
+        await server.start_server()
+        monkeypatch.setenv("KINOPOISK_API_URL", str(server.make_url("/v1.4/")))
+        get_config.cache_clear()
+        api = API(shared_cache)
+        await api.init()
+        try:
+            yield api
+        finally:
+            await api.close()
+            await server.close()
+
+    return serve
@@ -0,0 +1,154 @@
+"""Клиент API с фейковым сервером kinopoisk.dev: общие запросы, кэши и снимок."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING
+
+import pytest
+
+from benchmarks.fake_kinopoisk import FakeKinopoisk, make_records
+from film_bot.snapshot import StaleResponse
+from film_bot.storage import MemorySharedCache
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from contextlib import AbstractAsyncContextManager
+
+    from film_bot.api import API
+
+    ServeAPI = Callable[..., AbstractAsyncContextManager[API]]
+
+PARAMS = {"type": ["anime"], "page": 1}
+
+
+@pytest.fixture
+def fake() -> FakeKinopoisk:
+    """Server answering after a delay, so requests overlap."""
+    return FakeKinopoisk(make_records(50), latency=0.05)
+
+
+def test_identical_requests_are_coalesced(
+    fake: FakeKinopoisk,
+    serve_api: ServeAPI,
+) -> None:
+    """Concurrent identical requests share one HTTP request, then the cache."""
+
+    async def run() -> list:
+        async with serve_api(fake) as api:
+            results = await asyncio.gather(
+                *(api._request("movie", PARAMS) for _ in range(5)),  # noqa: SLF001
+            )
+            assert api.coalesced == 4
+            results.append(await api._request("movie", PARAMS))  # noqa: SLF001
+            return results
+
+    results = asyncio.run(run())
+    assert fake.requests == 1
+    assert results[0]["docs"]
+    assert all(result == results[0] for result in results)
+
+
+def test_different_requests_are_not_coalesced(
+    fake: FakeKinopoisk,
+    serve_api: ServeAPI,
+) -> None:
+    """Requests with other params and uncacheable random films go separately."""
+
+    async def run() -> int:
+        async with serve_api(fake) as api:
+            await asyncio.gather(
+                api._request("movie", PARAMS),  # noqa: SLF001
+                api._request("movie", {**PARAMS, "page": 2}),  # noqa: SLF001
+                api._request("movie/random", {"type": ["anime"]}),  # noqa: SLF001
+                api._request("movie/random", {"type": ["anime"]}),  # noqa: SLF001
+            )
+            return api.coalesced
+
+    assert asyncio.run(run()) == 0
+    assert fake.requests == 4
+
+
+def test_cancelled_caller_does_not_cancel_shared_request(
+    fake: FakeKinopoisk,
+    serve_api: ServeAPI,
+) -> None:
+    """The request goes on for the other callers if the first one is cancelled."""
+
+    async def run() -> dict:
+        async with serve_api(fake) as api:
+            first = asyncio.ensure_future(api._request("movie", PARAMS))  # noqa: SLF001
+            await asyncio.sleep(0.01)
+            second = asyncio.ensure_future(api._request("movie", PARAMS))  # noqa: SLF001
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second
+
+    assert asyncio.run(run())["docs"]
+    assert fake.requests == 1
+
+
+def test_saved_response_is_served_while_api_is_down(
+    fake: FakeKinopoisk,
+    serve_api: ServeAPI,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """With the breaker open the response comes from the snapshot, marked stale."""
+    monkeypatch.setenv("SNAPSHOT_PATH", "snapshot.bin")
+    monkeypatch.setenv("API_MAX_RETRIES", "0")
+    monkeypatch.setenv("BREAKER_THRESHOLD", "1")
+
+    async def run() -> tuple[dict, dict, int, int]:
+        async with serve_api(fake) as api:
+            fresh = await api._request("movie", PARAMS)  # noqa: SLF001
+            api.cache.clear()
+            fake.error_rate = 1.0
+            stale = await api._request("movie", PARAMS)  # noqa: SLF001
+            requests = fake.requests
+            # The breaker is open, the API is not requested
+            again = await api._request("movie", PARAMS)  # noqa: SLF001
+            assert again == stale
+            return fresh, stale, requests, api.stale_served
+
+    fresh, stale, requests, stale_served = asyncio.run(run())
+    assert isinstance(stale, StaleResponse)
+    assert not isinstance(fresh, StaleResponse)
+    assert stale == fresh
+    assert fake.requests == requests == 2
+    assert stale_served == 2
+
+
+def test_workers_share_responses(fake: FakeKinopoisk, serve_api: ServeAPI) -> None:
+    """A response loaded by one worker is taken from the shared cache by another."""
+    shared_cache = MemorySharedCache()
+
+    async def run() -> tuple[dict, dict]:
+        async with (
+            serve_api(fake, shared_cache) as first,
+            serve_api(fake, shared_cache) as second,
+        ):
+            loaded = await first._request("movie", PARAMS)  # noqa: SLF001
+            shared = await second._request("movie", PARAMS)  # noqa: SLF001
+            # Now it is in the local cache of the second worker
+            assert await second._request("movie", PARAMS) is shared  # noqa: SLF001
+            return loaded, shared
+
+    loaded, shared = asyncio.run(run())
+    assert shared == loaded
+    assert fake.requests == 1
+
+
+def test_shared_values_expire() -> None:
+    """A value is served until its ttl is over."""
+
+    async def run() -> list[bytes | None]:
+        shared_cache = MemorySharedCache()
+        await shared_cache.set("fresh", b"1", 60)
+        await shared_cache.set("old", b"2", 0)
+        return [
+            await shared_cache.get("fresh"),
+            await shared_cache.get("old"),
+            await shared_cache.get("missing"),
+        ]
+
+    assert asyncio.run(run()) == [b"1", None, None]
@@ -0,0 +1,76 @@
+"""Предохранитель запросов: переходы между состояниями."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from film_bot.breaker import BreakerState, CircuitBreaker
+
+if TYPE_CHECKING:
+    from conftest import Clock
+
+
+def _opened(clock: Clock) -> CircuitBreaker:
+    breaker = CircuitBreaker("movie", threshold=3, reset_timeout=10, clock=clock)
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.failure()
+    return breaker
+
+
+def test_opens_after_threshold_failures(clock: Clock) -> None:
+    """Consecutive failures open the breaker, then requests are rejected."""
+    breaker = _opened(clock)
+    assert breaker.state is BreakerState.OPEN
+    assert not breaker.allow()
+    assert breaker.stats.opened == 1
+    assert breaker.stats.rejected == 1
+    assert breaker.retry_in == 10
+
+
+def test_success_resets_failures() -> None:
+    """Failures separated by a success do not open the breaker."""
+    breaker = CircuitBreaker("movie", threshold=2, reset_timeout=10)
+    breaker.failure()
+    breaker.success()
+    breaker.failure()
+    assert breaker.state is BreakerState.CLOSED
+    assert breaker.retry_in == 0
+
+
+def test_probe_success_closes(clock: Clock) -> None:
+    """After the timeout one probe goes through, its success closes the breaker."""
+    breaker = _opened(clock)
+    clock.now = 10
+    assert breaker.allow()
+    assert breaker.state is BreakerState.HALF_OPEN
+    # Only one probe at a time
+    assert not breaker.allow()
+
+    breaker.success()
+    assert breaker.state is BreakerState.CLOSED
+    assert breaker.allow()
+
+
+def test_probe_failure_opens_again(clock: Clock) -> None:
+    """A failed probe opens the breaker for another timeout."""
+    breaker = _opened(clock)
+    clock.now = 10
+    assert breaker.allow()
+    breaker.failure()
+    assert breaker.state is BreakerState.OPEN
+    assert breaker.stats.opened == 2
+    clock.now = 19.9
+    assert not breaker.allow()
+    clock.now = 20
+    assert breaker.allow()
+
+
+def test_hung_probe_does_not_block_forever(clock: Clock) -> None:
+    """Without an answer to the probe another one goes after the timeout."""
+    breaker = _opened(clock)
+    clock.now = 10
+    assert breaker.allow()
+    clock.now = 20
+    assert breaker.allow()
+    assert breaker.state is BreakerState.HALF_OPEN
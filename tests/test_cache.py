@@ -0,0 +1,74 @@
+"""Кэш ответов API: время жизни, вытеснение по объёму и ключи."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from film_bot.cache import YEAR_TTL, ResponseCache, make_key, ttl_for
+
+if TYPE_CHECKING:
+    from conftest import Clock
+
+
+def test_entry_expires_after_ttl(clock: Clock) -> None:
+    """An entry is served until its TTL passes, then counted as a miss."""
+    cache = ResponseCache(100, clock=clock)
+    cache.set("a", "value", 10, ttl=5)
+
+    clock.now = 4.9
+    assert cache.get("a") == "value"
+    clock.now = 5.0
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    assert cache.size == 0
+    assert cache.stats.hits == 1
+    assert cache.stats.misses == 1
+    assert cache.stats.expirations == 1
+
+
+def test_least_recently_used_is_evicted() -> None:
+    """Over the budget the entry read longest ago is evicted first."""
+    cache = ResponseCache(30)
+    cache.set("a", 1, 10, ttl=60)
+    cache.set("b", 2, 10, ttl=60)
+    cache.set("c", 3, 10, ttl=60)
+    # "a" becomes the most recently used
+    assert cache.get("a") == 1
+
+    cache.set("d", 4, 10, ttl=60)
+    assert cache.get("b") is None
+    assert [cache.get(key) for key in "acd"] == [1, 3, 4]
+    assert cache.size == 30
+    assert cache.stats.evictions == 1
+
+
+def test_replaced_entry_is_resized() -> None:
+    """Setting a key again replaces the value and its size."""
+    cache = ResponseCache(30)
+    cache.set("a", 1, 20, ttl=60)
+    cache.set("a", 2, 5, ttl=60)
+    assert cache.get("a") == 2
+    assert cache.size == 5
+
+
+def test_uncacheable_values_are_skipped() -> None:
+    """Zero TTL and values larger than the budget are not stored."""
+    cache = ResponseCache(10)
+    cache.set("random", 1, 1, ttl=0)
+    cache.set("large", 2, 11, ttl=60)
+    assert len(cache) == 0
+    assert cache.size == 0
+
+
+def test_key_ignores_order_of_list_values() -> None:
+    """Order of genres does not change the key, the endpoint slashes neither."""
+    first = make_key("/movie/", {"genres.name": ["драма", "аниме"], "page": 1})
+    second = make_key("movie", {"page": "1", "genres.name": ["аниме", "драма "]})
+    assert first == second
+
+
+def test_ttl_by_endpoint() -> None:
+    """Random films are not cached, selections by year live longest."""
+    assert ttl_for("movie/random", {}) == 0
+    assert ttl_for("movie", {"year": "2020"}) == YEAR_TTL
+    assert ttl_for("movie", {}) < YEAR_TTL
@@ -0,0 +1,102 @@
+"""Избранное: запись в базу и кэш, перенос из старой схемы."""
+
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+from typing import TYPE_CHECKING
+
+from film_bot.db import FavoritesRepository
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+    from pathlib import Path
+
+    from film_bot.models import Favorite
+
+
+def _records(films: list[Favorite]) -> list[tuple[str, str]]:
+    return [(film.name, film.comments) for film in films]
+
+
+def _run(path: Path, scenario: Callable[[FavoritesRepository], Awaitable]) -> None:
+    async def run() -> None:
+        repository = FavoritesRepository(str(path), cache_size=1)
+        await repository.start()
+        try:
+            await scenario(repository)
+        finally:
+            await repository.close()
+
+    asyncio.run(run())
+
+
+def test_changes_go_to_cache_and_database(tmp_path: Path) -> None:
+    """Cached lists follow additions and deletions, the database keeps them."""
+    path = tmp_path / "favorites.db"
+
+    async def change(repository: FavoritesRepository) -> None:
+        assert _records(await repository.list(1, "anime")) == []
+        await repository.add(1, "anime", "Naruto", "")
+        await repository.add(1, "anime", "Bleach", "old")
+        await repository.add(1, "anime", "Bleach", "new")
+        await repository.add(2, "dorama", "Goblin", "")
+        assert _records(await repository.list(1, "anime")) == [
+            ("Naruto", ""),
+            ("Bleach", "new"),
+        ]
+        assert await repository.delete(1, "anime", "Naruto")
+        assert not await repository.delete(1, "anime", "Naruto")
+        # Lists of other users and kinds do not change
+        assert _records(await repository.list(1, "dorama")) == []
+        assert _records(await repository.list(2, "dorama")) == [("Goblin", "")]
+
+    async def reopen(repository: FavoritesRepository) -> None:
+        assert _records(await repository.list(1, "anime")) == [("Bleach", "new")]
+        assert _records(await repository.list(2, "dorama")) == [("Goblin", "")]
+
+    _run(path, change)
+    _run(path, reopen)
+
+
+def test_returned_list_is_a_copy(tmp_path: Path) -> None:
+    """Changing the returned list does not change the cache."""
+
+    async def scenario(repository: FavoritesRepository) -> None:
+        await repository.add(1, "anime", "Naruto", "")
+        films = await repository.list(1, "anime")
+        films.clear()
+        assert _records(await repository.list(1, "anime")) == [("Naruto", "")]
+
+    _run(tmp_path / "favorites.db", scenario)
+
+
+def test_legacy_tables_are_migrated(tmp_path: Path) -> None:
+    """Favorites of the old doramas/anime tables move to the new table."""
+    path = tmp_path / "favorites.db"
+    with sqlite3.connect(path) as connection:
+        connection.executescript(
+            """
+            CREATE TABLE doramas (chat_id INTEGER, name TEXT, comment TEXT);
+            CREATE TABLE anime (chat_id INTEGER, name TEXT, comment TEXT);
+            INSERT INTO doramas VALUES (1, 'Goblin', NULL), (1, 'Goblin', 'again');
+            INSERT INTO anime VALUES (1, 'Naruto', 'best'), (2, 'Bleach', '');
+            """,
+        )
+    connection.close()
+
+    async def scenario(repository: FavoritesRepository) -> None:
+        assert _records(await repository.list(1, "dorama")) == [("Goblin", "")]
+        assert _records(await repository.list(1, "anime")) == [("Naruto", "best")]
+        assert _records(await repository.list(2, "anime")) == [("Bleach", "")]
+
+    _run(path, scenario)
+    with sqlite3.connect(path) as connection:
+        tables = {
+            row[0]
+            for row in connection.execute(
+                "SELECT name FROM sqlite_master WHERE type IN ('table', 'index')",
+            )
+        }
+    connection.close()
+    assert tables == {"favorites"}
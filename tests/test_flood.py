@@ -0,0 +1,135 @@
+"""Отправка сообщений: склейка очереди чата, RetryAfter и отсев флуда."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Any
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import GetMe, SendMessage
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+from benchmarks.fakes import FAKE_TOKEN
+from film_bot.flood import SEPARATOR, SendScheduler
+from film_bot.formatting import MESSAGE_LIMIT
+
+if TYPE_CHECKING:
+    from aiogram.methods import TelegramMethod
+
+KEYBOARD = InlineKeyboardMarkup(
+    inline_keyboard=[[InlineKeyboardButton(text="ещё", callback_data="more")]],
+)
+
+
+class Requests:
+    """Fake next request middleware recording the sent methods."""
+
+    def __init__(self, failures: int = 0) -> None:
+        """Init recorder.
+
+        :param failures: count of first requests answered with RetryAfter
+        """
+        self.failures = failures
+        self.sent: list[TelegramMethod] = []
+
+    async def __call__(self, bot: Bot, method: TelegramMethod) -> Any:  # noqa: ANN401, ARG002
+        """Record the method and answer with its number."""
+        if self.failures:
+            self.failures -= 1
+            raise TelegramRetryAfter(method, "Too Many Requests", retry_after=0)
+        self.sent.append(method)
+        return len(self.sent)
+
+
+def _send_all(
+    methods: list[TelegramMethod],
+    requests: Requests,
+    scheduler: SendScheduler,
+) -> list[Any]:
+    """Send the first method, then the rest while the chat waits for a token."""
+
+    async def run() -> list[Any]:
+        bot = Bot(FAKE_TOKEN)
+        first = await scheduler(requests, bot, methods[0])
+        rest = await asyncio.gather(
+            *(scheduler(requests, bot, method) for method in methods[1:]),
+        )
+        await bot.session.close()
+        return [first, *rest]
+
+    return asyncio.run(run())
+
+
+def _scheduler() -> SendScheduler:
+    return SendScheduler(rate=1000, chat_rate=50, chat_burst=1, retries=1)
+
+
+def test_queued_messages_are_merged() -> None:
+    """Messages to a chat waiting for its turn go as one request."""
+    scheduler = _scheduler()
+    requests = Requests()
+    methods = [SendMessage(chat_id=1, text=str(i)) for i in range(4)]
+    methods.append(SendMessage(chat_id=2, text="other chat"))
+    results = _send_all(methods, requests, scheduler)
+
+    assert [method.text for method in requests.sent] == [
+        "0",
+        # Another chat does not wait for the queue of the first one
+        "other chat",
+        SEPARATOR.join("123"),
+    ]
+    # Every caller gets the answer to the request its text went with
+    assert results == [1, 3, 3, 3, 2]
+    assert scheduler.merged == 2
+
+
+def test_keyboard_goes_with_the_last_text() -> None:
+    """A message with a keyboard can be merged, later messages can not join it."""
+    scheduler = _scheduler()
+    requests = Requests()
+    methods = [
+        SendMessage(chat_id=1, text="0"),
+        SendMessage(chat_id=1, text="1"),
+        SendMessage(chat_id=1, text="2", reply_markup=KEYBOARD),
+        SendMessage(chat_id=1, text="3"),
+    ]
+    _send_all(methods, requests, scheduler)
+
+    assert [method.text for method in requests.sent] == ["0", "1\n\n2", "3"]
+    assert requests.sent[1].reply_markup == KEYBOARD
+    assert requests.sent[2].reply_markup is None
+
+
+def test_messages_that_can_not_be_merged() -> None:
+    """Texts over the limit, other parse modes and other methods go apart."""
+    scheduler = _scheduler()
+    requests = Requests()
+    long_text = "x" * (MESSAGE_LIMIT - 1)
+    methods = [
+        SendMessage(chat_id=1, text="0"),
+        SendMessage(chat_id=1, text=long_text),
+        SendMessage(chat_id=1, text="2"),
+        SendMessage(chat_id=1, text="3", parse_mode="HTML"),
+        GetMe(),
+    ]
+    _send_all(methods, requests, scheduler)
+
+    assert [getattr(method, "text", None) for method in requests.sent] == [
+        "0",
+        None,
+        long_text,
+        "2",
+        "3",
+    ]
+    assert scheduler.merged == 0
+
+
+def test_retry_after_is_repeated() -> None:
+    """A request answered with RetryAfter is sent again after the pause."""
+    scheduler = _scheduler()
+    requests = Requests(failures=1)
+    _send_all([SendMessage(chat_id=1, text="0")], requests, scheduler)
+
+    assert [method.text for method in requests.sent] == ["0"]
+    assert scheduler.retried == 1
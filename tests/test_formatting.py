@@ -0,0 +1,113 @@
+"""Карточки фильмов и упаковка текста в сообщения для каждого режима разметки."""
+
+from __future__ import annotations
+
+import re
+
+import pytest
+
+from film_bot.formatting import (
+    MESSAGE_LIMIT,
+    PARSE_MODES,
+    CardFormatter,
+    _cut,
+    pack,
+)
+from film_bot.models import Film
+
+MODES = list(PARSE_MODES)
+# Специальные символы всех режимов разметки
+SPECIAL = "Tom & Jerry <3 [1.5] (x_y) *!* "
+
+
+def _words(text: str) -> str:
+    return "".join(text.split())
+
+
+def _check_markup(message: str, parse_mode: str | None) -> None:
+    """Check that the message is not cut inside an entity or an escape."""
+    assert len(message) <= MESSAGE_LIMIT
+    if parse_mode == "HTML":
+        assert re.search(r"&[#\w]*$", message) is None
+        assert not re.match(r"^[#\w]*;", message)
+    if parse_mode == "MarkdownV2":
+        escapes = len(message) - len(message.rstrip("\\"))
+        assert escapes % 2 == 0
+
+
+@pytest.mark.parametrize("parse_mode", MODES)
+def test_list_fits_messages(parse_mode: str | None) -> None:
+    """Cards of a long list are packed whole into messages up to the limit."""
+    formatter = CardFormatter(parse_mode=parse_mode)
+    films = [Film(i, f"{SPECIAL}{i}", 2000 + i, SPECIAL * 40) for i in range(1, 40)]
+    cards = formatter.render_list(films)
+    messages = pack(cards)
+
+    assert len(messages) > 1
+    for message in messages:
+        _check_markup(message, parse_mode)
+    # Every card is in one message
+    for card in cards:
+        assert any(card in message for message in messages)
+
+
+@pytest.mark.parametrize("parse_mode", MODES)
+def test_long_card_is_split_by_words(parse_mode: str | None) -> None:
+    """A card longer than the limit is split at spaces, no text is lost."""
+    formatter = CardFormatter(parse_mode=parse_mode)
+    card = formatter.render(Film(1, SPECIAL, 2000, SPECIAL * 500))
+    messages = pack([card])
+
+    assert len(messages) > 1
+    for message in messages:
+        _check_markup(message, parse_mode)
+    assert _words("".join(messages)) == _words(card)
+
+
+@pytest.mark.parametrize(
+    ("text", "parse_mode"),
+    [
+        ("x" * 4090 + "&amp;" * 10, "HTML"),
+        ("&lt;" * 2000, "HTML"),
+        ("x" * 4095 + "\\." * 10, "MarkdownV2"),
+        ("\\." * 3000, "MarkdownV2"),
+        ("y" * 9000, None),
+    ],
+)
+def test_word_longer_than_limit(text: str, parse_mode: str | None) -> None:
+    """A text without spaces is cut outside of entities and escapes."""
+    cut = _cut(text, MESSAGE_LIMIT)
+    assert 0 < cut <= MESSAGE_LIMIT
+    messages = pack([text])
+    for message in messages:
+        _check_markup(message, parse_mode)
+    assert "".join(messages) == text
+
+
+def test_line_end_is_preferred() -> None:
+    """The text is split at the last line end before the limit."""
+    text = "a" * 100 + "\n" + "b b " * 2000
+    assert _cut(text, MESSAGE_LIMIT) == 100
+    # Without line ends, at the last space
+    text = "b b " * 2000
+    assert _cut(text, MESSAGE_LIMIT) == text.rfind(" ", 0, MESSAGE_LIMIT)
+
+
+def test_cards_are_cached_by_film_and_layout() -> None:
+    """A card is rendered once, films without id are not cached."""
+    formatter = CardFormatter(size=1)
+    film = Film(1, "A", 2000, "d")
+    assert formatter.render(film) is formatter.render(film)
+    formatter.render(film, "short")
+    assert formatter.stats.hits == 1
+    assert formatter.stats.evictions == 1
+    formatter.render(Film(None, "B", 2000, "d"))
+    assert len(formatter) == 1
+
+
+def test_list_numbers_are_escaped() -> None:
+    """The dot after the number is escaped for MarkdownV2."""
+    formatter = CardFormatter(parse_mode="MarkdownV2")
+    assert formatter.render_list([Film(1, "A.b", 2000, "d.")], start=3) == [
+        "3\\. *A\\.b*, 2000\n\nd\\.",
+    ]
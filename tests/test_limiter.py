@@ -0,0 +1,81 @@
+"""Ограничитель частоты запросов: приоритеты, пауза и Retry-After."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+from film_bot.limiter import Priority, TokenBucket, backoff, retry_after
+
+
+def test_interactive_requests_go_before_background() -> None:
+    """Waiters get tokens by priority, in the order of arrival within one."""
+
+    async def run() -> tuple[list[str], TokenBucket]:
+        bucket = TokenBucket(rate=200, burst=1)
+        await bucket.acquire()
+        order: list[str] = []
+
+        async def take(name: str, priority: Priority) -> None:
+            await bucket.acquire(priority)
+            order.append(name)
+
+        waiters = [
+            ("background 1", Priority.BACKGROUND),
+            ("background 2", Priority.BACKGROUND),
+            ("interactive 1", Priority.INTERACTIVE),
+            ("interactive 2", Priority.INTERACTIVE),
+        ]
+        await asyncio.gather(*(take(*waiter) for waiter in waiters))
+        return order, bucket
+
+    order, bucket = asyncio.run(run())
+    assert order == ["interactive 1", "interactive 2", "background 1", "background 2"]
+    assert bucket.stats.acquired == 5
+    assert bucket.stats.waited == 4
+    assert bucket.stats.queue_depth == 0
+    assert bucket.stats.max_wait_time >= bucket.stats.avg_wait_time > 0
+
+
+def test_burst_is_available_without_waiting() -> None:
+    """A full bucket gives `burst` tokens at once, then try_acquire fails."""
+    bucket = TokenBucket(rate=1, burst=3)
+    assert bucket.idle
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+    assert not bucket.idle
+
+
+def test_pause_delays_tokens() -> None:
+    """No tokens are given until the pause (e.g. Retry-After) is over."""
+
+    async def run() -> float:
+        bucket = TokenBucket(rate=1000, burst=5)
+        bucket.pause(0.05)
+        assert not bucket.try_acquire()
+        started_at = time.monotonic()
+        await bucket.acquire()
+        return time.monotonic() - started_at
+
+    assert asyncio.run(run()) >= 0.04
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        ("7", 7.0),
+        (None, None),
+        ("", None),
+        ("soon", None),
+        ("Wed, 21 Oct 2015 07:28:00 GMT", 0.0),
+    ],
+)
+def test_retry_after(value: str | None, expected: float | None) -> None:
+    """Seconds and past HTTP dates are parsed, garbage is ignored."""
+    assert retry_after(value) == expected
+
+
+def test_backoff_is_capped() -> None:
+    """The delay never exceeds the cap, however many attempts were made."""
+    assert all(0 <= backoff(attempt, cap=2.0) <= 2.0 for attempt in range(20))
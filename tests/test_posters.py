@@ -0,0 +1,45 @@
+"""Постеры: ограниченный кэш file_id поверх базы."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING
+
+from film_bot.posters import PosterStore
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_file_ids_are_bounded(tmp_path: Path) -> None:
+    """Only recent file ids stay in memory, the rest are read from the database."""
+
+    async def run() -> list[tuple[str, int] | None]:
+        store = PosterStore(
+            str(tmp_path / "posters.db"),
+            base_url="http://localhost/",
+            concurrency=1,
+            max_bytes=1,
+            timeout=1,
+            cache_size=2,
+        )
+        await store.start()
+        try:
+            for film_id in range(1, 4):
+                await store._save(film_id, f"file {film_id}", film_id)  # noqa: SLF001
+            assert list(store._file_ids) == [2, 3]  # noqa: SLF001
+            # A hit moves the film to the end, film 1 comes back from the database
+            saved = [await store._file_id(film_id) for film_id in (2, 1, 4)]  # noqa: SLF001
+            assert list(store._file_ids) == [2, 1]  # noqa: SLF001
+            await store._forget(1)  # noqa: SLF001
+            saved.append(await store._file_id(1))  # noqa: SLF001
+        finally:
+            await store.stop()
+        return saved
+
+    assert asyncio.run(run()) == [
+        ("file 2", 2),
+        ("file 1", 1),
+        None,
+        None,
+    ]
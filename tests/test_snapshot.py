@@ -0,0 +1,98 @@
+"""Снимок ответов API: перезапуск, обрезанный файл, возраст и сжатие."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from film_bot.snapshot import MAGIC, RECORD, ResponseSnapshot
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from conftest import Clock
+
+KEY_A = "aa" * 16
+KEY_B = "bb" * 16
+
+
+def _snapshot(path: Path, clock: Clock, max_bytes: int = 1 << 20) -> ResponseSnapshot:
+    snapshot = ResponseSnapshot(str(path), max_bytes, max_age=100, clock=clock)
+    snapshot.open()
+    return snapshot
+
+
+def test_responses_survive_reopen(tmp_path: Path, clock: Clock) -> None:
+    """The latest body of every key is read back after a restart."""
+    path = tmp_path / "snapshot.bin"
+    snapshot = _snapshot(path, clock)
+    snapshot.set(KEY_A, b"first")
+    snapshot.set(KEY_B, b"other")
+    clock.now += 1
+    snapshot.set(KEY_A, b"second")
+    assert snapshot.get(KEY_A) == (b"second", clock.now)
+    snapshot.close()
+
+    snapshot = _snapshot(path, clock)
+    assert len(snapshot) == 2
+    assert snapshot.get(KEY_A) == (b"second", clock.now)
+    assert snapshot.get(KEY_B)[0] == b"other"
+    snapshot.close()
+
+
+def test_partial_record_is_cut_off(tmp_path: Path, clock: Clock) -> None:
+    """A record written partially (the process was killed) is dropped on open."""
+    path = tmp_path / "snapshot.bin"
+    snapshot = _snapshot(path, clock)
+    snapshot.set(KEY_A, b"complete")
+    snapshot.close()
+    complete_size = path.stat().st_size
+    with path.open("ab") as file:
+        file.write(RECORD.pack(bytes.fromhex(KEY_B), clock.now, 100) + b"short")
+
+    snapshot = _snapshot(path, clock)
+    assert path.stat().st_size == complete_size
+    assert snapshot.get(KEY_A)[0] == b"complete"
+    assert snapshot.get(KEY_B) is None
+    # Appending goes on after the last complete record
+    snapshot.set(KEY_B, b"again")
+    snapshot.close()
+    snapshot = _snapshot(path, clock)
+    assert snapshot.get(KEY_B)[0] == b"again"
+    snapshot.close()
+
+
+def test_unknown_file_is_reset(tmp_path: Path, clock: Clock) -> None:
+    """A file of another format is replaced with an empty snapshot."""
+    path = tmp_path / "snapshot.bin"
+    path.write_bytes(b"something else entirely")
+    snapshot = _snapshot(path, clock)
+    assert len(snapshot) == 0
+    snapshot.close()
+    assert path.read_bytes() == MAGIC
+
+
+def test_old_responses_are_not_served(tmp_path: Path, clock: Clock) -> None:
+    """A response older than max_age is treated as missing."""
+    snapshot = _snapshot(tmp_path / "snapshot.bin", clock)
+    snapshot.set(KEY_A, b"body")
+    clock.now += 101
+    assert snapshot.get(KEY_A) is None
+    snapshot.close()
+
+
+def test_compaction_keeps_newest(tmp_path: Path, clock: Clock) -> None:
+    """Over max_bytes the file is rewritten with the newest responses only."""
+    path = tmp_path / "snapshot.bin"
+    body = b"x" * 100
+    max_bytes = 4 * (RECORD.size + len(body))
+    snapshot = _snapshot(path, clock, max_bytes)
+    keys = [f"{i:032x}" for i in range(6)]
+    for key in keys:
+        clock.now += 1
+        snapshot.set(key, body)
+
+    assert path.stat().st_size <= max_bytes
+    assert snapshot.size == path.stat().st_size
+    assert snapshot.get(keys[-1]) == (body, clock.now)
+    assert snapshot.get(keys[0]) is None
+    snapshot.close()
@@ -0,0 +1,49 @@
+"""Синхронизация каталога с фейковым сервером kinopoisk.dev в том же процессе."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING
+
+from benchmarks.fake_kinopoisk import FakeKinopoisk, make_records
+from film_bot.catalog import Catalog
+from film_bot.sync import FILM_TYPES, CatalogSync
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from contextlib import AbstractAsyncContextManager
+    from pathlib import Path
+
+    from film_bot.api import API
+
+RECORDS = 3000
+
+
+def test_full_sync_and_resume(
+    tmp_path: Path,
+    serve_api: Callable[[FakeKinopoisk], AbstractAsyncContextManager[API]],
+) -> None:
+    """All records are synced, a restart requests only the pages after the cursor."""
+    fake = FakeKinopoisk(make_records(RECORDS))
+
+    async def sync_twice() -> tuple[int, int, int, int]:
+        catalog = Catalog(str(tmp_path / "catalog.db"))
+        try:
+            async with serve_api(fake) as api:
+                full = await CatalogSync(api, catalog, rate=1000).run()
+                full_requests = fake.requests
+                assert len(catalog) == RECORDS
+
+                # As after a restart
+                fake.requests = 0
+                resumed = await CatalogSync(api, catalog, rate=1000).run()
+                return full.records, full_requests, resumed.records, fake.requests
+        finally:
+            catalog.close()
+
+    full, full_requests, resumed, resumed_requests = asyncio.run(sync_twice())
+    assert full == RECORDS
+    # One page of the records of the last day for every film type
+    assert resumed < RECORDS
+    assert resumed_requests == len(FILM_TYPES)
+    assert full_requests > resumed_requests
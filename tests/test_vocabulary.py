@@ -0,0 +1,87 @@
+"""Словари жанров и стран: нормализация, исправление опечаток и разбор ввода."""
+
+from __future__ import annotations
+
+import pytest
+
+from film_bot.vocabulary import (
+    GENRE_VOCABULARY,
+    GenreQuery,
+    Vocabulary,
+    distance,
+    normalize,
+    parse_genres,
+    suggest,
+)
+
+
+def test_normalize() -> None:
+    """Case, "ё", extra spaces, emoji and punctuation are dropped."""
+    assert normalize("  Ёлки!!  ПАЛКИ 🎄 ") == "елки палки"
+    assert normalize("ток-шоу") == "ток-шоу"
+    assert normalize("?!") == ""
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("Драма", "драма"),
+        ("комедея", "комедия"),
+        ("фентези", "фэнтези"),
+        ("фэнтэзи", "фэнтези"),
+        ("мелодрамма", "мелодрама"),
+        ("ТОК ШОУ", "ток-шоу"),
+        ("ужастик", "ужасы"),
+        ("", None),
+        ("абвгд", None),
+    ],
+)
+def test_genre_match(text: str, expected: str | None) -> None:
+    """Exact names, aliases and typos give the canonical genre."""
+    assert GENRE_VOCABULARY.match(text) == expected
+
+
+def test_ambiguous_typo_is_not_corrected() -> None:
+    """A typo equally close to two names is not guessed."""
+    vocabulary = Vocabulary(["кот", "кит"])
+    assert vocabulary.match("кут") is None
+    assert vocabulary.match("кт") is None
+    assert vocabulary.match("кита") == "кит"
+
+
+def test_distance_stops_at_limit() -> None:
+    """Distances over the limit are reported as limit + 1."""
+    assert distance("драма", "драма", 1) == 0
+    assert distance("драма", "дрaма", 1) == 1
+    assert distance("драма", "комедия", 2) == 3
+    assert distance("а", "аааааа", 2) == 3
+
+
+def test_parse_genres_splits_genres_and_countries() -> None:
+    """Genres, countries and unknown parts are separated, duplicates dropped."""
+    query = parse_genres("Комедея, корея ,драма,, комедия, Япония, абырвалг ")
+    assert query == GenreQuery(
+        genres=("комедия", "драма"),
+        countries=("Корея Южная", "Япония"),
+        unknown=("абырвалг",),
+    )
+
+
+def test_parse_genres_empty_input() -> None:
+    """Only commas and spaces give an empty query."""
+    assert parse_genres(" , ,") == GenreQuery((), (), ())
+
+
+def test_exact_name_goes_before_typo_of_other_vocabulary() -> None:
+    """An exact country is not taken for a genre with a typo."""
+    assert parse_genres("Китай").countries == ("Китай",)
+    assert parse_genres("Китай").genres == ()
+
+
+def test_suggest_without_close_match() -> None:
+    """Similar genres are offered, countries only if no genre is similar."""
+    suggestions = suggest("коме")
+    assert suggestions[0] == "комедия"
+    assert len(suggestions) == 3
+    assert suggest("япна") == ["Япония"]
+    assert suggest("zzz") == []